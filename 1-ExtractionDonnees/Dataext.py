@@ -1,115 +1,50 @@
 import os
-import json
-from bs4 import BeautifulSoup
+import sys
+import argparse
+from functools import partial
 
-awr_folder = '/Users/paki/Desktop/Data/AWR/'
-all_data = []
-
-# === Fonction 1 : extraire les requêtes complètes
-def extract_complete_sql_texts(soup):
-    sql_texts = {}
-    sections = soup.find_all("h3", class_="awr")
-
-    for section in sections:
-        if "Complete List of SQL Text" in section.text:
-            table = section.find_next("table")
-            if not table:
-                continue
-
-            rows = table.find_all("tr")
-            headers = [th.text.strip() for th in rows[0].find_all("th")]
-            header_map = {h: i for i, h in enumerate(headers)}
-
-            sql_id_idx = header_map.get("SQL Id")
-            sql_text_idx = header_map.get("SQL Text")
-
-            if sql_id_idx is None or sql_text_idx is None:
-                continue
-
-            for row in rows[1:]:
-                cells = row.find_all("td")
-                if len(cells) <= max(sql_id_idx, sql_text_idx):
-                    continue
-
-                sql_id = cells[sql_id_idx].text.strip()
-                sql_text = cells[sql_text_idx].text.strip()
-                sql_texts[sql_id] = sql_text
-
-    return sql_texts
-
-# === Fonction 2 : extraire les métriques
-def extract_metrics_from_executions(soup, filename):
-    local_data = {}
-    sections = soup.find_all("h3", class_="awr")
-    for section in sections:
-        if section.text.strip() == "SQL ordered by Executions":
-            table = section.find_next("table")
-            if not table:
-                print(f"⚠️ Pas de table après SQL ordered by Executions dans {filename}")
-                return {}
-
-            rows = table.find_all("tr")
-            headers = [th.text.strip() for th in rows[0].find_all("th")]
-            header_map = {header: idx for idx, header in enumerate(headers)}
-
-            # Index dynamiques
-            sql_id_idx = header_map.get("SQL Id")
-            rows_proc_idx = header_map.get("Rows Processed")
-            elapsed_idx = header_map.get("Elapsed Time (s)")
-            executions_idx = header_map.get("Executions")
-            cpu_idx = header_map.get("%CPU")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from awrtools.cache import DEFAULT_CACHE_PATH, extract_report_cached, sql_statistics_records_cached
+from awrtools.pipeline import JsonArrayWriter, Throughput, iter_extractions, list_reports
+from awrtools.stream import extract_report, sql_statistics_records
 
-            if sql_id_idx is None:
-                print(f"⚠️ Colonne SQL Id manquante dans {filename}")
-                return {}
-
-            for row in rows[1:]:
-                cells = [td.text.strip() for td in row.find_all("td")]
-                if len(cells) < len(header_map):
-                    continue
-
-                try:
-                    sql_id = cells[sql_id_idx]
-                    rows_processed = int(cells[rows_proc_idx].replace(',', '')) if rows_proc_idx is not None and cells[rows_proc_idx] else 0
-                    elapsed_time = float(cells[elapsed_idx].replace(',', '')) if elapsed_idx is not None and cells[elapsed_idx] else 0
-                    cpu_percent = float(cells[cpu_idx].replace('%', '').replace(',', '.')) if cpu_idx is not None and cells[cpu_idx] else 0
-
-                    local_data[sql_id] = {
-                        "query_id": sql_id,
-                        "awr_file": filename,
-                        "rows_processed": rows_processed,
-                        "elapsed_time": elapsed_time,
-                        "cpu_percent": cpu_percent
-                    }
-
-                except Exception as e:
-                    print(f"⚠️ Erreur dans {filename} pour SQL Id={sql_id} : {e}")
-    return local_data
-
-# === Parcours des fichiers AWR
-for filename in os.listdir(awr_folder):
-    if filename.endswith('.html'):
-        print(f"🔍 Traitement de {filename}...")
-        with open(os.path.join(awr_folder, filename), 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'lxml')
-
-            # 1. Extraire requêtes complètes
-            sql_texts = extract_complete_sql_texts(soup)
-
-            # 2. Extraire métriques
-            metrics = extract_metrics_from_executions(soup, filename)
-
-            # 3. Fusionner les deux
-            if metrics:
-                for sql_id, entry in metrics.items():
-                    entry['query_text'] = sql_texts.get(sql_id, "")
-                    all_data.append(entry)
-
-# === Sauvegarde finale
-if not all_data:
+awr_folder = '/Users/paki/Desktop/Data/AWR/'
+output_file = 'Data.json'
+
+parser = argparse.ArgumentParser(description="Extraction des métriques SQL des rapports AWR")
+parser.add_argument('--awr-folder', default=awr_folder, help="Dossier des rapports AWR (.html)")
+parser.add_argument('--output', default=output_file, help="Fichier JSON de sortie")
+parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                    help="Nombre de processus d'extraction (1 = séquentiel)")
+parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                    help="Base du cache d'extraction partagé (par empreinte du contenu)")
+parser.add_argument('--no-cache', action='store_true', help="Reparser tous les rapports")
+parser.add_argument('--all-sql-sections', action='store_true',
+                    help="Un enregistrement large par SQL Id fusionnant toutes les tables 'SQL ordered by ...'")
+args = parser.parse_args()
+
+# Seuls les rapports nouveaux ou modifiés sont parsés, les autres viennent du cache
+if args.all_sql_sections:
+    extract = sql_statistics_records if args.no_cache else partial(sql_statistics_records_cached, cache_path=args.cache)
+else:
+    extract = extract_report if args.no_cache else partial(extract_report_cached, cache_path=args.cache)
+
+# === Parcours des fichiers AWR (extraction en flux, répartie sur plusieurs processus)
+# Métriques de "SQL ordered by Executions" + texte de "Complete List of SQL Text",
+# écrites dans le JSON dès qu'un rapport est terminé
+stats = Throughput()
+with JsonArrayWriter(args.output) as writer:
+    for filename, size, records, error in iter_extractions(list_reports(args.awr_folder), args.workers, extract):
+        stats.add(filename, size, records, error)
+        if error:
+            print(f"⚠️ Erreur sur {filename} : {error}")
+            continue
+        print(f"🔍 {filename} : {len(records)} requête(s)")
+        writer.write(records)
+
+# === Bilan
+print(f"📈 {stats.summary()}")
+if not writer.count:
     print("❌ Aucune donnée extraite.")
 else:
-    with open('Data.json', 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, indent=4)
-    print("✅ Fichier créé : Data.json")
-
+    print(f"✅ Fichier créé : {args.output}")
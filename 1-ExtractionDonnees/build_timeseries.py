@@ -0,0 +1,51 @@
+import os
+import sys
+import argparse
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from awrtools.cache import DEFAULT_CACHE_PATH, read_snapshot_cached
+from awrtools.pipeline import iter_extractions, list_reports
+from awrtools.timeseries import connect, import_json, ingest_snapshot, read_snapshot
+
+awr_folder = '/Users/paki/Desktop/Data/AWR/'
+db_file = 'awr_timeseries.db'
+
+parser = argparse.ArgumentParser(description="Série temporelle des snapshots AWR (sessions, DB time, métriques SQL)")
+parser.add_argument('--awr-folder', default=awr_folder, help="Dossier des rapports AWR (.html)")
+parser.add_argument('--db', default=db_file, help="Base SQLite de la série temporelle")
+parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                    help="Nombre de processus d'extraction (1 = séquentiel)")
+parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                    help="Base du cache d'extraction partagé (par empreinte du contenu)")
+parser.add_argument('--no-cache', action='store_true', help="Reparser tous les rapports")
+parser.add_argument('--data-json', help="Importer un Data.json existant au lieu des rapports")
+parser.add_argument('--sessions-json', help="sessions_moyenne.json de Sessions.py (avec --data-json)")
+args = parser.parse_args()
+
+conn = connect(args.db)
+
+if args.data_json:
+    # Jointure par nom de rapport : Data.json (requêtes) + sessions_moyenne.json (en-têtes)
+    if not args.sessions_json:
+        parser.error("--sessions-json est requis avec --data-json")
+    imported, skipped = import_json(conn, args.data_json, args.sessions_json)
+    print(f"✅ {imported} snapshot(s) importé(s), {skipped} rapport(s) sans en-tête complet ignoré(s)")
+    sys.exit(0)
+
+extract = read_snapshot if args.no_cache else partial(read_snapshot_cached, cache_path=args.cache)
+
+imported = 0
+for filename, size, snapshot, error in iter_extractions(list_reports(args.awr_folder), args.workers, extract):
+    if error:
+        print(f"⚠️ Erreur sur {filename} : {error}")
+        continue
+    key = ingest_snapshot(conn, snapshot['header'], snapshot['records'], filename)
+    if key is None:
+        print(f"[IGNORÉ] En-tête de snapshot incomplet dans {filename}")
+        continue
+    imported += 1
+    print(f"🔍 {filename} : snapshot {key[2]}-{key[3]}, {len(snapshot['records'])} requête(s)")
+
+conn.close()
+print(f"✅ {imported} snapshot(s) dans {args.db}")
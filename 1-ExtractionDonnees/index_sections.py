@@ -0,0 +1,36 @@
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from awrtools.pipeline import list_reports
+from awrtools.section_index import SectionIndex, get_index
+
+awr_folder = '/Users/paki/Desktop/Data/AWR/'
+
+parser = argparse.ArgumentParser(description="Construction des index de sections (<rapport>.sections.json)")
+parser.add_argument('--awr-folder', default=awr_folder, help="Dossier des rapports AWR (.html)")
+parser.add_argument('--index-dir', default=None,
+                    help="Dossier des index (par défaut à côté des rapports)")
+parser.add_argument('--force', action='store_true', help="Reconstruire même les index à jour")
+args = parser.parse_args()
+
+if args.index_dir:
+    os.makedirs(args.index_dir, exist_ok=True)
+
+# Un seul passage par rapport; les index déjà à jour (taille et date) sont conservés
+built = kept = 0
+for path in list_reports(args.awr_folder):
+    filename = os.path.basename(path)
+    if args.force:
+        index = SectionIndex.build(path)
+        index.save(args.index_dir)
+    elif SectionIndex.load(path, args.index_dir) is not None:
+        kept += 1
+        continue
+    else:
+        index = get_index(path, args.index_dir)
+    built += 1
+    print(f"🔍 {filename} : {len(index.titles)} section(s)")
+
+print(f"✅ {built} index construit(s), {kept} déjà à jour")
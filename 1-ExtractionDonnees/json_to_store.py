@@ -0,0 +1,26 @@
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.store import convert_json, read_metrics
+
+json_file = '/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json'
+store_dir = '/Users/paki/Desktop/PFE/1- ExtractionDonnees/metrics_store'
+
+parser = argparse.ArgumentParser(description="Conversion de Data.json en magasin colonne (Parquet)")
+parser.add_argument('--json', default=json_file, help="Fichier Data.json à convertir")
+parser.add_argument('--store', default=store_dir, help="Dossier du magasin colonne")
+parser.add_argument('--partition-by', choices=['snap_range', 'awr_file'], default='snap_range',
+                    help="Partitionnement : plages de snapshots ou un dossier par rapport AWR")
+args = parser.parse_args()
+
+if os.path.exists(args.store) and os.listdir(args.store):
+    print(f"❌ Le dossier {args.store} n'est pas vide (les données seraient ajoutées en double).")
+    sys.exit(1)
+
+count = convert_json(args.json, args.store, args.partition_by)
+print(f"✅ {count} lignes converties dans {args.store}")
+
+# Vérification rapide : relecture d'une seule colonne
+print(f"🔍 Relecture : {len(read_metrics(args.store, columns=['query_id']))} lignes")
@@ -0,0 +1,43 @@
+import os
+import sys
+import argparse
+
+import joblib
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.forest import compile_model
+from awrtools.memo import content_key
+
+models_dir = os.path.dirname(os.path.abspath(__file__))
+model_files = ['XGext.pkl', 'RandomForest_model.pkl']
+data_path = '/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json'
+
+parser = argparse.ArgumentParser(description="Compile les modèles .pkl en forêts NumPy (.npz)")
+parser.add_argument('models', nargs='*', default=[os.path.join(models_dir, f) for f in model_files],
+                    help="Modèles .pkl à compiler (XGBClassifier ou RandomForestClassifier)")
+parser.add_argument('--data', default=data_path,
+                    help="Data.json servant à vérifier que les prédictions sont identiques")
+args = parser.parse_args()
+
+data = pd.read_json(args.data) if os.path.exists(args.data) else None
+
+for pkl_path in args.models:
+    model = joblib.load(pkl_path)
+    compiled = compile_model(model)
+    # Le .npz n'est utilisé à la place du .pkl que si leurs empreintes concordent
+    with open(pkl_path, 'rb') as f:
+        compiled.source_digest = content_key(f.read())
+
+    # === Vérification : mêmes prédictions que le modèle d'origine
+    if data is not None:
+        X = data.reindex(columns=compiled.features, fill_value=0)
+        differences = (model.predict(X) != compiled.predict(X)).sum()
+        if differences:
+            print(f"❌ {os.path.basename(pkl_path)} : {differences} prédiction(s) différente(s), non exporté")
+            continue
+
+    npz_path = os.path.splitext(pkl_path)[0] + '.npz'
+    compiled.save(npz_path)
+    print(f"✅ {os.path.basename(npz_path)} : {compiled.n_trees} arbres, {len(compiled.left)} nœuds, "
+          f"profondeur {compiled.max_depth} ({os.path.getsize(npz_path) / 1024:.0f} Ko)")
@@ -1,45 +1,74 @@
 import sqlite3
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
+from sklearn.metrics import accuracy_score, classification_report
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 import numpy as np
-
-# Paramètres de la droite de régression
-slope = 2.57e-04
-intercept = 136.40
-seuil_multiplicateur = 1.5  # Multiplicateur pour définir un seuil de temps "trop long"
-
-# Fonction pour calculer le seuil de temps
-def get_regression_threshold(rows_processed):
-    return (slope * rows_processed + intercept) * seuil_multiplicateur
-
-# Fonction pour évaluer la performance
-def is_bad_performance_regression(rows_processed, elapsed_time):
-    threshold = get_regression_threshold(rows_processed)
-    return 1 if elapsed_time > threshold else 0
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.labels import bad_performance
+from awrtools.thresholds import load_thresholds
+from awrtools.training import RF_TREES, TrainingManifest, has_all_classes, warm_start_forest
+
+db_file = '/Users/paki/Desktop/PFE/Base de donnees/awr_data_corrected.db'
+model_path = 'RandomForest_model.pkl'
+
+parser = argparse.ArgumentParser(description="Entraînement du modèle Random Forest")
+parser.add_argument('--db', default=db_file, help="Base SQLite awr_data")
+parser.add_argument('--model', default=model_path, help="Modèle .pkl (lu et mis à jour avec --incremental)")
+parser.add_argument('--incremental', action='store_true',
+                    help="Ajouter des arbres appris sur les seuls nouveaux snapshots (warm start)")
+parser.add_argument('--trees', type=int, default=RF_TREES, help="Arbres ajoutés en mode incrémental")
+parser.add_argument('--max-estimators', type=int, default=None,
+                    help="Fenêtre glissante : nombre maximal d'arbres gardés (les plus anciens sont retirés)")
+parser.add_argument('--thresholds-version', type=int, default=None,
+                    help="Version des seuils (par défaut la dernière)")
+args = parser.parse_args()
+
+# Paramètres de la droite de régression : mêmes seuils versionnés que XGext.py et l'application
+thresholds = load_thresholds(version=args.thresholds_version)
+slope, intercept = thresholds.rows_params
+seuil_multiplicateur = thresholds.multiplier  # Multiplicateur pour définir un seuil de temps "trop long"
+
+# Snapshots déjà vus par le modèle (manifeste à côté du .pkl)
+manifest = TrainingManifest.load(args.model)
+incremental = args.incremental and os.path.exists(args.model)
+if args.incremental and not incremental:
+    print(f"⚠️ {args.model} introuvable : entraînement complet")
 
 # Connexion à la base de données
-conn = sqlite3.connect('/Users/paki/Desktop/PFE/Base de donnees/awr_data_corrected.db')
+conn = sqlite3.connect(args.db)
 
-# Requête SQL
+# Requête SQL (en mode incrémental : rapports absents du manifeste uniquement)
 query = '''
     SELECT query_id, awr_file, elapsed_time, rows_processed
-    FROM awr_data;
+    FROM awr_data
 '''
+if incremental and manifest.seen:
+    conn.execute('CREATE TEMP TABLE seen_files (awr_file TEXT PRIMARY KEY)')
+    conn.executemany('INSERT INTO seen_files VALUES (?)', [(f,) for f in manifest.seen])
+    query += ' WHERE awr_file NOT IN (SELECT awr_file FROM seen_files)'
 
 # Chargement des données
 df = pd.read_sql(query, conn)
 conn.close()
 
+if df.empty:
+    print("✅ Aucun nouveau snapshot : modèle inchangé")
+    exit()
+
 # Affichage initial
 print(df.head())
 
-# Ajout de la colonne Bad_performance
-df['Bad_performance'] = df.apply(
-    lambda row: is_bad_performance_regression(row['rows_processed'], row['elapsed_time']),
-    axis=1
+# Ajout de la colonne Bad_performance (calcul vectorisé sur les colonnes entières)
+df['Bad_performance'] = bad_performance(
+    df['elapsed_time'], df['rows_processed'],
+    rows_params=thresholds.params_for('rows', df), multiplier=seuil_multiplicateur
 )
 
 # Vérification
@@ -53,22 +82,47 @@ df = df.fillna(0)
 X = df[['elapsed_time', 'rows_processed']]
 y = df['Bad_performance']
 
-# Division des données
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Modèle Random Forest
-rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
-rf_model.fit(X_train, y_train)
-
-# Évaluation
-y_pred_rf = rf_model.predict(X_test)
-print(f"\nPrécision du modèle Random Forest : {rf_model.score(X_test, y_test):.2f}")
+# Division des données (en mode incrémental : tout le lot est appris, après avoir été
+# évalué par le modèle précédent qui ne l'a jamais vu)
+if incremental:
+    X_train, X_test, y_train, y_test = X, X, y, y
+    if not has_all_classes(y_train):
+        print("⚠️ Les nouveaux snapshots ne contiennent qu'une classe : mise à jour reportée")
+        exit()
+    rf_model = joblib.load(args.model)
+    y_pred_rf = rf_model.predict(X_test)
+else:
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+# Modèle Random Forest (complet, ou arbres ajoutés sur les nouveaux snapshots)
+start = time.perf_counter()
+if incremental:
+    rf_model = warm_start_forest(rf_model, X_train, y_train,
+                                 trees=args.trees, max_estimators=args.max_estimators)
+else:
+    rf_model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    rf_model.fit(X_train, y_train)
+    y_pred_rf = rf_model.predict(X_test)
+duration = time.perf_counter() - start
+print(f"⏱️ Entraînement {'incrémental' if incremental else 'complet'} : {duration:.2f}s, "
+      f"{len(rf_model.estimators_)} arbres")
+
+# Évaluation (modèle précédent sur les nouveaux snapshots en mode incrémental)
+accuracy = accuracy_score(y_test, y_pred_rf)
+print(f"\nPrécision du modèle Random Forest{' (modèle précédent, nouveaux snapshots)' if incremental else ''} : {accuracy:.2f}")
 print("\nRésultats de la classification par Random Forest :\n", classification_report(y_test, y_pred_rf))
 
 # Sauvegarde du modèle
-joblib.dump(rf_model, 'RandomForest_model.pkl')
-print("Modèle Random Forest entraîné et sauvegardé dans 'RandomForest_model.pkl'")
+joblib.dump(rf_model, args.model)
+manifest.record('incremental' if incremental else 'full', df['awr_file'], len(df),
+                accuracy=round(float(accuracy), 4), seconds=round(duration, 3),
+                thresholds_version=thresholds.version)
+manifest.save()
+print(f"Modèle Random Forest entraîné et sauvegardé dans '{args.model}' ({len(manifest.seen)} snapshot(s) vus)")
 
 # Affichage de l'équation utilisée
-print(f"\nÉquation de régression utilisée pour définir 'Bad_performance':")
+print(f"\nÉquation de régression utilisée pour définir 'Bad_performance' (seuils v{thresholds.version}):")
 print(f"Temps seuil (secondes) = ({slope:.2e} * Nombre de lignes traitées + {intercept:.2f}) * {seuil_multiplicateur:.1f}")
+if thresholds.group_by in df:
+    print(f"(droite globale; {len(thresholds.groups.get('rows', {}))} droite(s) par {thresholds.group_by} "
+          f"pour les lignes de leur groupe)")
@@ -1,64 +1,113 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
+from sklearn.metrics import accuracy_score, classification_report
 from xgboost import XGBClassifier
 import joblib
+import os
+import sys
+import time
+import argparse
 
-# --- 1. Paramètres des régressions ---
-slope_rows = 2.78e-04
-intercept_rows = 106.40
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.labels import bad_performance
+from awrtools.store import load_metrics
+from awrtools.thresholds import load_thresholds
+from awrtools.training import XGB_ROUNDS, TrainingManifest, continue_xgboost, has_all_classes
 
-slope_cpu = -3.06
-intercept_cpu = 250.51
-
-seuil_multiplicateur = 1.5
-
-# --- 2. Fonctions d'évaluation ---
-def get_regression_threshold_rows(rows_processed):
-    return (slope_rows * rows_processed + intercept_rows) * seuil_multiplicateur
+# --- 1. Paramètres des régressions : dernière version ajustée (3-Courbes/FitThresholds.py) ---
+# --- 2. Charger les données (Data.json ou dossier du magasin colonne) ---
+json_path = '/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json'
+model_path = 'XGext.pkl'
 
-def get_regression_threshold_cpu(cpu_percent):
-    return (slope_cpu * cpu_percent + intercept_cpu) * seuil_multiplicateur
+parser = argparse.ArgumentParser(description="Entraînement du modèle XGBoost")
+parser.add_argument('--data', default=json_path, help="Data.json ou dossier du magasin colonne")
+parser.add_argument('--model', default=model_path, help="Modèle .pkl (lu et mis à jour avec --incremental)")
+parser.add_argument('--incremental', action='store_true',
+                    help="Poursuivre le boosting du modèle existant sur les seuls nouveaux snapshots")
+parser.add_argument('--rounds', type=int, default=XGB_ROUNDS, help="Arbres ajoutés en mode incrémental")
+parser.add_argument('--thresholds-version', type=int, default=None,
+                    help="Version des seuils (par défaut la dernière)")
+args = parser.parse_args()
 
-def is_bad_performance(row):
-    threshold_rows = get_regression_threshold_rows(row['rows_processed'])
-    threshold_cpu = get_regression_threshold_cpu(row['cpu_percent'])
-    # Mauvaise performance si elapsed_time dépasse au moins un des seuils
-    return 1 if (row['elapsed_time'] > threshold_rows) or (row['elapsed_time'] > threshold_cpu) else 0
+thresholds = load_thresholds(version=args.thresholds_version)
+print(f"📐 Seuils {thresholds.describe()}")
 
-# --- 3. Charger les données ---
-json_path = '/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json'
+# Snapshots déjà vus par le modèle (manifeste à côté du .pkl)
+manifest = TrainingManifest.load(args.model)
+incremental = args.incremental and os.path.exists(args.model)
+if args.incremental and not incremental:
+    print(f"⚠️ {args.model} introuvable : entraînement complet")
 
+# --- 3. Nettoyage (filtres appliqués à la lecture) ---
+filters = [('rows_processed', '>', 0), ('elapsed_time', '>', 0), ('cpu_percent', '>=', 0)]
+if incremental and manifest.seen:
+    filters.append(('awr_file', 'not in', sorted(manifest.seen)))
 try:
-    df = pd.read_json(json_path)
-    print(f"✅ Données chargées depuis {json_path}")
+    df = load_metrics(
+        args.data,
+        columns=['awr_file', 'elapsed_time', 'rows_processed', 'cpu_percent']
+                + ([thresholds.group_by] if thresholds.group_by not in (None, 'awr_file') else []),
+        filters=filters
+    )
+    print(f"✅ Données chargées depuis {args.data} ({len(df)} lignes)")
 except Exception as e:
     print(f"❌ Erreur lors du chargement : {e}")
     exit()
 
-# --- 4. Nettoyage ---
-df = df[(df['rows_processed'] > 0) & (df['elapsed_time'] > 0) & (df['cpu_percent'] >= 0)]
+if df.empty:
+    print("✅ Aucun nouveau snapshot : modèle inchangé")
+    exit()
+
 df = df.fillna(0)
 
-# --- 5. Détection des mauvaises performances avec les 2 critères ---
-df['Bad_performance'] = df.apply(is_bad_performance, axis=1)
+# --- 4. Détection des mauvaises performances avec les 2 critères ---
+# Mauvaise performance si elapsed_time dépasse au moins un des seuils (calcul vectorisé)
+df['Bad_performance'] = bad_performance(
+    df['elapsed_time'], df['rows_processed'], df['cpu_percent'],
+    rows_params=thresholds.params_for('rows', df), cpu_params=thresholds.params_for('cpu', df),
+    multiplier=thresholds.multiplier
+)
 
-# --- 6. Préparation des données pour le modèle ---
+# --- 5. Préparation des données pour le modèle ---
 X = df[['elapsed_time', 'rows_processed', 'cpu_percent']]
 y = df['Bad_performance']
 
-# --- 7. Split entraînement/test ---
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+# --- 6. Split entraînement/test ---
+# En mode incrémental, tout le lot est appris (le manifeste ne marque comme vus que
+# des snapshots réellement appris); il est d'abord évalué par le modèle précédent,
+# qui ne l'a jamais vu (évaluation « test puis entraînement »).
+if incremental:
+    X_train, X_test, y_train, y_test = X, X, y, y
+    if not has_all_classes(y_train):
+        print("⚠️ Les nouveaux snapshots ne contiennent qu'une classe : mise à jour reportée")
+        exit()
+    previous_model = joblib.load(args.model)
+    y_pred_xgb = previous_model.predict(X_test)
+else:
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# --- 8. Entraînement XGBoost ---
-xgb_model = XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42)
-xgb_model.fit(X_train, y_train)
+# --- 7. Entraînement XGBoost (complet, ou reprise du boosting sur les nouveaux snapshots) ---
+start = time.perf_counter()
+if incremental:
+    xgb_model = continue_xgboost(previous_model, X_train, y_train, rounds=args.rounds)
+else:
+    xgb_model = XGBClassifier(eval_metric='logloss', random_state=42, n_jobs=-1)
+    xgb_model.fit(X_train, y_train)
+    y_pred_xgb = xgb_model.predict(X_test)
+duration = time.perf_counter() - start
+print(f"⏱️ Entraînement {'incrémental' if incremental else 'complet'} : {duration:.2f}s, "
+      f"{xgb_model.get_booster().num_boosted_rounds()} arbres")
 
-# --- 9. Évaluation ---
-y_pred_xgb = xgb_model.predict(X_test)
-print(f"\n✅ Précision XGBoost : {xgb_model.score(X_test, y_test):.2f}")
+# --- 8. Évaluation (modèle précédent sur les nouveaux snapshots en mode incrémental) ---
+accuracy = accuracy_score(y_test, y_pred_xgb)
+print(f"\n✅ Précision XGBoost{' (modèle précédent, nouveaux snapshots)' if incremental else ''} : {accuracy:.2f}")
 print("\n🧠 Rapport de classification :\n", classification_report(y_test, y_pred_xgb))
 
-# --- 10. Sauvegarde ---
-joblib.dump(xgb_model, 'XGext.pkl')
-print("📦 Modèle sauvegardé dans 'XGext.pkl'")
+# --- 9. Sauvegarde ---
+joblib.dump(xgb_model, args.model)
+manifest.record('incremental' if incremental else 'full', df['awr_file'], len(df),
+                accuracy=round(float(accuracy), 4), seconds=round(duration, 3),
+                thresholds_version=thresholds.version)
+manifest.save()
+print(f"📦 Modèle sauvegardé dans '{args.model}' ({len(manifest.seen)} snapshot(s) vus)")
+print("🔧 Relancer CompileModels.py pour mettre à jour la version NumPy (.npz)")
@@ -1,16 +1,31 @@
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import matplotlib.ticker as ticker
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.plotting import BINS, MODES, TOP_N, regression_plot
+from awrtools.store import load_metrics
 
 # --- 1. Paramètres ---
 json_file = '/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json'
-
-# --- 2. Charger le fichier JSON ---
+output_file = '/Users/paki/Desktop/PFE/3-Courbes/courbe_rows.png'
+
+parser = argparse.ArgumentParser(description="Temps d'exécution vs nombre de lignes traitées (image sans affichage)")
+parser.add_argument('--data', default=json_file, help="Data.json ou dossier du magasin colonne")
+parser.add_argument('--output', default=output_file, help="Image générée (.png, .svg, .pdf)")
+parser.add_argument('--mode', choices=MODES, default='auto',
+                    help="density/hexbin : grille agrégée; scatter : nuage classique; auto : selon le volume")
+parser.add_argument('--bins', type=int, default=BINS, help="Résolution de la grille")
+parser.add_argument('--top-n', type=int, default=TOP_N, help="Nombre de query_id étiquetés (plus grands écarts)")
+args = parser.parse_args()
+
+# --- 2. Charger les données (Data.json ou dossier du magasin colonne) ---
 try:
-    df = pd.read_json(json_file)
-    print(f"✅ Données chargées depuis {json_file}")
+    df = load_metrics(args.data, columns=['query_id', 'rows_processed', 'elapsed_time'])
+    print(f"✅ Données chargées depuis {args.data}")
 except Exception as e:
     print(f"❌ Erreur lors du chargement du JSON : {e}")
     exit()
@@ -23,37 +38,19 @@ df_clean = df[
 ]
 
 # --- 4. Régression linéaire ---
-coef = np.polyfit(df_clean['rows_processed'], df_clean['elapsed_time'], 1)
-poly1d_fn = np.poly1d(coef)
-
-# --- 5. Tracer le graphique ---
-plt.figure(figsize=(14, 7))
-sns.scatterplot(data=df_clean, x='rows_processed', y='elapsed_time', alpha=0.6, label="Données")
-
-# --- 6. Ajouter les query_id sur les points ---
-for i in range(df_clean.shape[0]):
-    plt.text(
-        df_clean['rows_processed'].iloc[i],
-        df_clean['elapsed_time'].iloc[i],
-        df_clean['query_id'].iloc[i],
-        fontsize=8,
-        alpha=0.7
-    )
-
-# --- 7. Courbe de régression ---
-x_vals = np.linspace(df_clean['rows_processed'].min(), df_clean['rows_processed'].max(), 100)
-plt.plot(x_vals, poly1d_fn(x_vals), color='red', label=f"Régression : y = {coef[0]:.2e}x + {coef[1]:.2f}")
-
-# --- 8. Mise en forme ---
-plt.title("Temps d'exécution vs nombre de lignes traitées", fontsize=16)
-plt.xlabel("Nombre de lignes traitées", fontsize=14)
-plt.ylabel("Temps écoulé (secondes)", fontsize=14)
-plt.grid(True)
-plt.legend(fontsize=12)
-
-# Axe X avec séparateurs de milliers
-formatter = ticker.FuncFormatter(lambda x, _: f'{int(x):,}')
-plt.gca().xaxis.set_major_formatter(formatter)
-
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+x = df_clean['rows_processed'].to_numpy(np.float64)
+y = df_clean['elapsed_time'].to_numpy(np.float64)
+coef = np.polyfit(x, y, 1)
+
+# --- 5. Tracer le graphique (densité + query_id des plus grands écarts à la droite) ---
+start = time.perf_counter()
+mode = regression_plot(
+    x, y, df_clean['query_id'].to_numpy(), coef, args.output,
+    title="Temps d'exécution vs nombre de lignes traitées",
+    xlabel="Nombre de lignes traitées", ylabel="Temps écoulé (secondes)",
+    mode=args.mode, bins=args.bins, top_n=args.top_n,
+    # Axe X avec séparateurs de milliers
+    x_formatter=ticker.FuncFormatter(lambda x, _: f'{int(x):,}'),
+)
+print(f"📈 {len(x)} points ({mode}), rendu en {time.perf_counter() - start:.2f}s")
+print(f"💾 Graphique enregistré dans {args.output}")
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.thresholds import CHUNK_SIZE, HUBER_K, THRESHOLDS_DIR, fit_thresholds, load_thresholds, save_thresholds
+
+# === Ajustement automatique des droites de seuil (remplace les np.polyfit recopiés à la main)
+json_file = '/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json'
+
+parser = argparse.ArgumentParser(description="Ajuste les droites de seuil (lignes traitées, %CPU) et enregistre une nouvelle version")
+parser.add_argument('--data', default=json_file, help="Data.json, CSV, base SQLite ou dossier du magasin colonne")
+parser.add_argument('--group-by', default=None,
+                    help="Droite supplémentaire par groupe (ex. awr_file, sql_module), "
+                         "utilisée par les étiqueteurs pour les lignes de ce groupe")
+parser.add_argument('--output-dir', default=THRESHOLDS_DIR, help="Dossier des versions de seuils")
+parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Lignes lues par lot")
+parser.add_argument('--k', type=float, default=HUBER_K, help="Constante de Huber (robustesse aux extrêmes)")
+parser.add_argument('--dry-run', action='store_true', help="Afficher les droites sans enregistrer de version")
+args = parser.parse_args()
+
+previous = load_thresholds(args.output_dir)
+print(f"📐 Seuils actuels : {previous.describe()}")
+
+start = time.perf_counter()
+thresholds = fit_thresholds(args.data, group_by=args.group_by, k=args.k, chunk_size=args.chunk_size)
+print(f"⏱️ Ajustement en {time.perf_counter() - start:.2f}s")
+
+for name, fit in thresholds.fits.items():
+    print(f"  • {name} : elapsed_time = {fit['slope']:.3e} x + {fit['intercept']:.2f} "
+          f"(échelle {fit['scale'] or 0:.2f}, {fit['n']} lignes, {fit['iterations']} itérations)")
+    if args.group_by:
+        print(f"    {len(thresholds.groups.get(name, {}))} droite(s) par {args.group_by}")
+
+if args.dry_run:
+    print("ℹ️ Mode --dry-run : aucune version enregistrée")
+else:
+    path = save_thresholds(thresholds, args.output_dir)
+    print(f"✅ Nouvelle version : {thresholds.describe()}")
+    print(f"💾 Enregistrée dans {path}")
@@ -1,49 +1,51 @@
 import os
-import re
+import sys
 import json
+import argparse
+from functools import partial
 
-folder_path = '/Users/paki/Desktop/PFE/AWR'
-result = {}
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.cache import DEFAULT_CACHE_PATH, read_header_cached
+from awrtools.header import read_header
+from awrtools.pipeline import iter_extractions, list_reports
 
-# Regex plus souple pour extraire Snap Type et Sessions
-snap_pattern = re.compile(
-    r'<tr><td[^>]*>(Begin Snap:|End Snap:)</td>(?:<td[^>]*>.*?</td>){2}<td[^>]*>(\d+)</td>',
-    re.IGNORECASE
-)
-
-# Liste des fichiers .html ou .txt dans le dossier
-files = [f for f in os.listdir(folder_path) if f.endswith('.html') or f.endswith('.txt')]
+folder_path = '/Users/paki/Desktop/PFE/AWR'
+output_file = '/Users/paki/Desktop/PFE/4-Sessions/sessions_moyenne.json'
 
-for filename in files:
-    file_path = os.path.join(folder_path, filename)
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+parser = argparse.ArgumentParser(description="Sessions et en-tête des snapshots des rapports AWR")
+parser.add_argument('--awr-folder', default=folder_path, help="Dossier des rapports AWR")
+parser.add_argument('--output', default=output_file, help="Fichier JSON de sortie")
+parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                    help="Nombre de processus de lecture (1 = séquentiel)")
+parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                    help="Base du cache d'extraction partagé avec Dataext.py et pdf.py")
+parser.add_argument('--no-cache', action='store_true', help="Relire tous les rapports")
+args = parser.parse_args()
 
-    # Chercher Begin Snap et End Snap sessions
-    matches = snap_pattern.findall(content)
-    begin_sessions = None
-    end_sessions = None
 
-    for snap_type, sessions in matches:
-        if snap_type.strip().lower() == 'begin snap:':
-            begin_sessions = int(sessions)
-        elif snap_type.strip().lower() == 'end snap:':
-            end_sessions = int(sessions)
+# En-tête lu par mmap, arrêt après la table des snapshots (Begin Snap / End Snap / Elapsed / DB Time)
+extract = read_header if args.no_cache else partial(read_header_cached, cache_path=args.cache)
 
+result = {}
+for filename, size, header, error in iter_extractions(list_reports(args.awr_folder, ('.html', '.txt')),
+                                                      args.workers, extract):
+    if error:
+        print(f"⚠️ Erreur sur {filename} : {error}")
+        continue
+    begin_sessions, end_sessions = header.get('begin_sessions'), header.get('end_sessions')
     if begin_sessions is not None and end_sessions is not None:
-        moyenne = (begin_sessions + end_sessions) / 2
-        awr_name = os.path.splitext(filename)[0]  # Nom de fichier 
+        awr_name = os.path.splitext(filename)[0]  # Nom de fichier
         result[awr_name] = {
-            "moyenne_sessions": moyenne,
-            "begin_sessions": begin_sessions,
-            "end_sessions": end_sessions
+            "moyenne_sessions": (begin_sessions + end_sessions) / 2,
+            **header,
         }
     else:
         print(f"[IGNORÉ] Pas de Snap complet trouvé dans {filename}")
 
-# Sauvegarder en JSON dans /Users/paki/Desktop/PFE
-output_file = '/Users/paki/Desktop/PFE/4-Sessions/sessions_moyenne.json'
-with open(output_file, 'w', encoding='utf-8') as json_file:
+# Ordre stable quel que soit l'ordre de fin des processus
+result = dict(sorted(result.items()))
+
+with open(args.output, 'w', encoding='utf-8') as json_file:
     json.dump(result, json_file, indent=4)
 
-print(f"✅ Traitement terminé. Résultats sauvegardés dans : {output_file}")
+print(f"✅ Traitement terminé. Résultats sauvegardés dans : {args.output}")
@@ -0,0 +1,78 @@
+import os
+import sys
+import csv
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.baseline import MIN_HISTORY, Z_THRESHOLD, BaselineEngine
+from awrtools.pipeline import iter_json_array
+from awrtools.stream import parse_awr_name
+from awrtools.timeseries import connect, iter_snapshot_records
+
+# === Série temporelle (build_timeseries.py) ou Data.json
+data_path = "/Users/paki/Desktop/PFE/1- ExtractionDonnees/awr_timeseries.db"
+state_path = "/Users/paki/Desktop/PFE/5-Agent/baseline.npz"
+output_path = "/Users/paki/Desktop/PFE/derives_sql.csv"
+
+parser = argparse.ArgumentParser(description="Ligne de base par SQL Id et détection de dérive")
+parser.add_argument('--input', default=data_path,
+                    help="Base de la série temporelle (.db) ou Data.json")
+parser.add_argument('--state', default=state_path,
+                    help="Lignes de base (.npz) : reprises si le fichier existe, enregistrées à la fin")
+parser.add_argument('--output', default=output_path, help="CSV des dérives détectées")
+parser.add_argument('--max-ids', type=int, default=1_000_000, help="Nombre maximal de SQL Id suivis")
+parser.add_argument('--max-age', type=int, default=None,
+                    help="Oublier les SQL Id absents des N derniers snapshots")
+parser.add_argument('--min-history', type=int, default=MIN_HISTORY,
+                    help="Snapshots d'historique nécessaires avant de signaler une dérive")
+parser.add_argument('--z-threshold', type=float, default=Z_THRESHOLD, help="Écart minimal en écarts-types")
+args = parser.parse_args()
+
+
+def iter_json_snapshots(path):
+    # Data.json : un groupe d'enregistrements par rapport, rejoués par snapshot croissant
+    by_file = {}
+    for record in iter_json_array(path):
+        record = {k.strip(): v for k, v in record.items()}
+        by_file.setdefault(record.get('awr_file'), []).append(record)
+    for awr_file in sorted(by_file, key=lambda f: (parse_awr_name(f or '') or (0, 0, 0))[1:]):
+        yield {'awr_file': awr_file}, by_file[awr_file]
+
+
+if os.path.exists(args.state):
+    engine = BaselineEngine.load(args.state, max_ids=args.max_ids)
+    engine.min_history, engine.z_threshold = args.min_history, args.z_threshold
+    print(f"📂 Lignes de base reprises : {len(engine)} SQL Id, {engine.snapshots} snapshot(s)")
+else:
+    engine = BaselineEngine(max_ids=args.max_ids, min_history=args.min_history, z_threshold=args.z_threshold)
+
+if args.input.endswith(('.db', '.sqlite')):
+    conn = connect(args.input)
+    snapshots = iter_snapshot_records(conn)
+else:
+    snapshots = iter_json_snapshots(args.input)
+
+# == Un snapshot à la fois : comparaison à l'historique de chaque SQL Id, puis mise à jour
+start = time.perf_counter()
+count = drift_count = 0
+columns = ['awr_file', 'query_id', 'metric', 'value', 'mean', 'std', 'quantile', 'zscore', 'history']
+with open(args.output, 'w', newline='', encoding='utf-8') as f:
+    writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for snapshot, records in snapshots:
+        drifts = engine.observe_records(records, snapshot['awr_file'])
+        for drift in drifts:
+            drift['awr_file'] = drift.pop('snapshot')
+            writer.writerow(drift)
+            print(f"🚨 {drift['awr_file']} {drift['query_id']} : {drift['metric']} = {drift['value']:.4g} "
+                  f"(moyenne {drift['mean']:.4g}, z = {drift['zscore']:.1f})")
+        if args.max_age:
+            engine.evict_stale(args.max_age)
+        count += 1
+        drift_count += len(drifts)
+
+engine.save(args.state)
+elapsed = time.perf_counter() - start
+print(f"📈 {count} snapshot(s) en {elapsed:.2f}s, {len(engine)} SQL Id suivis, {engine.evicted} évincé(s)")
+print(f"✅ {drift_count} dérive(s) enregistrée(s) dans {args.output}")
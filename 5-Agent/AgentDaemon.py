@@ -0,0 +1,49 @@
+import os
+import sys
+import signal
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.daemon import DetectionDaemon
+from awrtools.detection import MODELS, model_source_path
+
+# === Dossier de dépôt des rapports AWR et base de résultats
+watch_folder = '/Users/paki/Desktop/Data/AWR/'
+db_file = '/Users/paki/Desktop/PFE/Base de donnees/awr_data_corrected.db'
+
+parser = argparse.ArgumentParser(description="Démon de détection : analyse chaque rapport AWR déposé")
+parser.add_argument('--watch', default=watch_folder, help="Dossier surveillé")
+parser.add_argument('--db', default=db_file, help="Base SQLite (métriques, incidents, rapports traités)")
+parser.add_argument('--model', default='xgb', help=f"Modèle : {', '.join(MODELS)} ou chemin d'un .pkl")
+parser.add_argument('--workers', type=int, default=2, help="Threads d'analyse")
+parser.add_argument('--queue-size', type=int, default=16,
+                    help="Rapports en attente au maximum (au-delà, la surveillance attend)")
+parser.add_argument('--interval', type=float, default=1.0, help="Secondes entre deux scrutations")
+parser.add_argument('--settle', type=float, default=1.0,
+                    help="Secondes sans modification avant de traiter un fichier")
+parser.add_argument('--retry', type=float, default=60.0,
+                    help="Secondes avant de réessayer un rapport en erreur")
+args = parser.parse_args()
+
+
+def afficher(result):
+    if result.error:
+        print(f"⚠️ Erreur sur {result.filename} : {result.error}", flush=True)
+    else:
+        print(f"🔍 {result.filename} : {result.queries} requête(s), "
+              f"🚨 {result.incidents} incident(s) en {result.elapsed:.2f}s", flush=True)
+
+
+daemon = DetectionDaemon(
+    args.watch, args.db, model_source_path(args.model),
+    workers=args.workers, queue_size=args.queue_size,
+    interval=args.interval, settle=args.settle, retry=args.retry, on_result=afficher
+)
+
+# === Arrêt propre (Ctrl+C, SIGTERM) : les rapports en cours sont terminés
+signal.signal(signal.SIGINT, lambda *_: daemon.stop())
+signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+
+print(f"👀 Surveillance de {args.watch} ({args.workers} thread(s), file de {args.queue_size})", flush=True)
+daemon.run()
+print(f"✅ Arrêt : {daemon.processed} rapport(s) traité(s), {daemon.failed} erreur(s)")
@@ -1,38 +1,57 @@
-import pandas as pd
-import joblib
-
-# === Charger le modèle
-model_path = "/Users/paki/Desktop/PFE/2-Models/XGext.pkl"
-model = joblib.load(model_path)
-
-# === Charger les données JSON
-data_path = "/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json"
-df = pd.read_json(data_path)
+import os
+import sys
+import time
+import argparse
 
-# == Supprimer 'incident' si déjà présente
-if 'incident' in df.columns:
-    df = df.drop(columns=['incident'])
-
-# == Colonnes exactes attendues par le modèle
-model_features = model.feature_names_in_.tolist()
-
-# === Ajouter les colonnes manquantes avec valeur par défaut
-for col in model_features:
-    if col not in df.columns:
-        print(f"⚠️ Colonne manquante ajoutée automatiquement : {col}")
-        df[col] = 0
+import pandas as pd
 
-# == Créer X sans jamais inclure accidentellement 'incident'
-X = df[model_features]
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.detection import BATCH_SIZE, MODELS, CsvAppender, iter_batches, load_model, score_batches
 
-# == Prédictions
-df['incident'] = model.predict(X)
+# === Modèle XGBoost (ou --model rf / chemin d'un .pkl)
+model_name = "xgb"
 
-# == Affichage des incidents
-incidents = df[df['incident'] == 1]
+# === Données : lues par lots, jamais chargées en entier
+data_path = "/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json"
+output_path = "/Users/paki/Desktop/PFE/incidents_detectedXGext.csv"
+
+parser = argparse.ArgumentParser(description="Détection des incidents par lots (XGBoost)")
+parser.add_argument('--model', default=model_name,
+                    help=f"Modèle : {', '.join(MODELS)} ou chemin d'un .pkl")
+parser.add_argument('--input', default=data_path,
+                    help="Data.json, dossier du magasin colonne, base SQLite ou CSV")
+parser.add_argument('--output', default=output_path, help="CSV de sortie")
+parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Lignes par lot")
+parser.add_argument('--incidents-only', action='store_true',
+                    help="N'écrire que les lignes en incident")
+args = parser.parse_args()
+
+model = load_model(args.model)
+print(f"🧠 Modèle : {model.path}")
+
+# == Prédictions lot par lot, lignes ajoutées au CSV au fur et à mesure
+start = time.perf_counter()
+total = incidents_count = 0
+apercu = []
+with CsvAppender(args.output, incidents_only=args.incidents_only) as writer:
+    for i, df in enumerate(score_batches(model, iter_batches(args.input, args.batch_size))):
+        if i == 0:
+            for col in model.missing_features(df.columns):
+                print(f"⚠️ Colonne manquante ajoutée automatiquement : {col}")
+        incidents = df[df['incident'] == 1]
+        total += len(df)
+        incidents_count += len(incidents)
+        # On ne garde en mémoire qu'un aperçu des premiers incidents
+        if len(apercu) < 20:
+            apercu.extend(incidents[['query_id', 'elapsed_time', 'rows_processed', 'incident']].head(20 - len(apercu)).to_dict('records'))
+        writer.write(df)
+        print(f"   lot {i + 1} : {len(df)} ligne(s), {len(incidents)} incident(s)")
+
+# == Affichage des incidents (aperçu) et bilan
 print("🔍 Incidents détectés :")
-print(incidents[['query_id', 'elapsed_time', 'rows_processed', 'incident']])
+print(pd.DataFrame(apercu, columns=['query_id', 'elapsed_time', 'rows_processed', 'incident']))
+elapsed = max(time.perf_counter() - start, 1e-9)
+print(f"📈 {total} ligne(s), {incidents_count} incident(s) en {elapsed:.2f}s ({total / elapsed:,.0f} lignes/s)")
 
 # == Export CSV
-df.to_csv("/Users/paki/Desktop/PFE/incidents_detectedXGext.csv", index=False)
-print("✅ Résultat enregistré dans 'incidents_detectedXGext.csv'")
+print(f"✅ Résultat enregistré dans '{args.output}'")
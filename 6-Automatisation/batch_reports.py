@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.batch_report import run_batch
+from awrtools.cache import DEFAULT_CACHE_PATH
+from awrtools.pipeline import list_reports
+
+# === Rapports PDF en lot : un PDF par rapport AWR + un PDF de flotte
+awr_folder = '/Users/paki/Desktop/Data/AWR/'
+output_dir = '/Users/paki/Desktop/PFE/6-Automatisation/rapports'
+logo_path = '/Users/paki/Desktop/PFE/7-assests/Logo_hps_0 (1).png'  # Logo
+
+parser = argparse.ArgumentParser(description="Génère les rapports PDF de tout un dossier AWR en parallèle")
+parser.add_argument('--awr-folder', default=awr_folder, help="Dossier des rapports AWR")
+parser.add_argument('--output-dir', default=output_dir, help="Dossier des PDF générés")
+parser.add_argument('--logo', default=logo_path, help="Logo en tête de page (décodé une seule fois)")
+parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                    help="Nombre de processus (1 = séquentiel)")
+parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                    help="Base du cache d'extraction partagé avec Dataext.py et Sessions.py")
+parser.add_argument('--force', action='store_true', help="Régénérer aussi les PDF déjà à jour")
+parser.add_argument('--no-fleet', action='store_true', help="Ne pas générer le PDF de flotte")
+args = parser.parse_args()
+
+paths = list_reports(args.awr_folder)
+if not paths:
+    print(f"❌ Aucun rapport AWR dans {args.awr_folder}")
+    exit()
+
+print(f"🔍 {len(paths)} rapport(s) AWR, {args.workers} processus")
+start = time.perf_counter()
+counts = {}
+for filename, status, error in run_batch(paths, args.output_dir, args.workers, args.logo, args.cache,
+                                         force=args.force, fleet=not args.no_fleet):
+    counts[status] = counts.get(status, 0) + 1
+    if error:
+        print(f"⚠️ Erreur sur {filename} : {error}")
+    elif status == 'généré':
+        print(f"📄 {filename}")
+
+elapsed = time.perf_counter() - start
+print(f"⏱️ {elapsed:.1f}s : " + ", ".join(f"{n} {status}" for status, n in counts.items()))
+print(f"✅ Rapports PDF dans : {args.output_dir}")
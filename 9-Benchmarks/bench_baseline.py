@@ -0,0 +1,82 @@
+"""Benchmark : lignes de base par SQL Id (awrtools.baseline).
+
+1. Corpus réel : la série temporelle est construite depuis les rapports de
+   AWR/ dans une base temporaire, puis rejouée snapshot par snapshot; les
+   dérives détectées (temps par ligne et par exécution) sont affichées, et
+   le script échoue s'il n'y en a aucune.
+2. Montée en charge : snapshots synthétiques de --ids SQL Id, temps moyen
+   d'intégration d'un snapshot et mémoire des tableaux d'état.
+
+    python 9-Benchmarks/bench_baseline.py [--awr-folder DIR] [--min-history N] [--ids N] [--snapshots N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools import timeseries  # noqa: E402
+from awrtools.baseline import BaselineEngine  # noqa: E402
+from awrtools.pipeline import list_reports  # noqa: E402
+
+
+def real_corpus(folder, min_history):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = timeseries.connect(os.path.join(tmp, 'awr_timeseries.db'))
+        for path in list_reports(folder):
+            filename = os.path.basename(path)
+            snapshot = timeseries.read_snapshot(path, filename)
+            timeseries.ingest_snapshot(conn, snapshot['header'], snapshot['records'], filename)
+        engine = BaselineEngine(min_history=min_history)
+        drifts = []
+        for snapshot, records in timeseries.iter_snapshot_records(conn):
+            drifts.extend(engine.observe_records(records, snapshot['awr_file']))
+        conn.close()
+
+    print(f"📂 {folder} : {engine.snapshots} snapshot(s), {len(engine)} SQL Id")
+    for drift in drifts:
+        print(f"   🚨 {drift['snapshot']} {drift['query_id']} : {drift['metric']} = {drift['value']:.4g} "
+              f"(moyenne {drift['mean']:.4g}, z = {drift['zscore']:.1f}, {drift['history']} snapshot(s))")
+    return drifts
+
+
+def scaling(ids, snapshots, seed=0):
+    rng = np.random.default_rng(seed)
+    query_ids = [f'sql{i:08d}' for i in range(ids)]
+    engine = BaselineEngine(max_ids=ids)
+    elapsed = 0.0
+    for _ in range(snapshots):
+        rows = rng.integers(1, 100_000, ids)
+        execs = rng.integers(1, 1_000, ids)
+        times = rows * rng.gamma(4.0, 2.5e-5, ids)
+        start = time.perf_counter()
+        engine.observe_snapshot(query_ids, times, rows, execs)
+        elapsed += time.perf_counter() - start
+    state = sum(a.nbytes for a in (engine.count, engine.mean, engine.m2, engine.last_seen))
+    state += sum(s.heights.nbytes + s.positions.nbytes for s in engine.sketches)
+    print(f"⏱️ {ids} SQL Id × {snapshots} snapshots : {elapsed / snapshots * 1000:.1f} ms par snapshot, "
+          f"état {state / ids:.0f} octets par SQL Id")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--awr-folder', default=os.path.join(ROOT, 'AWR'))
+    parser.add_argument('--min-history', type=int, default=3,
+                        help="Historique minimal (le corpus AWR/ ne compte que 6 snapshots)")
+    parser.add_argument('--ids', type=int, default=100_000)
+    parser.add_argument('--snapshots', type=int, default=20)
+    args = parser.parse_args()
+
+    drifts = real_corpus(args.awr_folder, args.min_history)
+    if not drifts:
+        sys.exit("❌ Aucune dérive détectée sur le corpus réel")
+    scaling(args.ids, args.snapshots)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark : génération en lot des rapports PDF (awrtools.batch_report).
+
+Copie les rapports de --awr-folder --copies fois dans un dossier temporaire
+puis mesure (cache d'extraction déjà rempli) : génération séquentielle,
+génération avec le pool de processus, et seconde passe (PDF déjà à jour,
+rien n'est régénéré).
+
+    python 9-Benchmarks/bench_batch_reports.py [--awr-folder DOSSIER] [--copies N] [--workers N]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools.batch_report import report_records, run_batch  # noqa: E402
+from awrtools.pipeline import list_reports  # noqa: E402
+
+LOGO = os.path.join(ROOT, '7-assests', 'Logo_hps_0 (1).png')
+
+
+def timed_batch(paths, output_dir, workers, cache_path):
+    start = time.perf_counter()
+    statuses = [status for _, status, _ in run_batch(paths, output_dir, workers, LOGO, cache_path)]
+    return time.perf_counter() - start, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--awr-folder', default=os.path.join(ROOT, 'AWR'))
+    parser.add_argument('--copies', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, 'awr')
+        os.makedirs(folder)
+        for copy in range(args.copies):
+            for path in list_reports(args.awr_folder):
+                name, ext = os.path.splitext(os.path.basename(path))
+                shutil.copy(path, os.path.join(folder, f"{name}_{copy:03d}{ext}"))
+        paths = list_reports(folder)
+        cache_path = os.path.join(tmp, 'cache.sqlite')
+        print(f"📊 {len(paths)} rapports AWR, {os.cpu_count()} CPU")
+        # Cache d'extraction rempli avant les mesures : seule la génération des PDF est comparée
+        for path in paths:
+            report_records(path, cache_path)
+
+        serial, _ = timed_batch(paths, os.path.join(tmp, 'serie'), 1, cache_path)
+        pooled, _ = timed_batch(paths, os.path.join(tmp, 'pool'), args.workers, cache_path)
+        rerun, statuses = timed_batch(paths, os.path.join(tmp, 'pool'), args.workers, cache_path)
+
+    print(f"{'séquentiel':<28}{serial:>8.2f}s  ({1000 * serial / len(paths):.0f} ms/rapport)")
+    print(f"{f'pool de {args.workers} processus':<28}{pooled:>8.2f}s  (x{serial / pooled:.1f})")
+    print(f"{'seconde passe (à jour)':<28}{rerun:>8.2f}s  ({statuses.count('à jour')} PDF conservés)")
+    print("\n✅ Logo décodé une fois par lot; PDF à jour non régénérés")
+
+
+if __name__ == '__main__':
+    main()
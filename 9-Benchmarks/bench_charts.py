@@ -0,0 +1,76 @@
+"""Benchmark : volume envoyé au navigateur par app.py, complet vs réduit (awrtools.charts).
+
+Pour un rapport de N incidents, mesure la taille JSON et le temps de
+construction du graphique plotly et du tableau : ancienne version (tous
+les incidents) contre top-N + « Autres » et page de tableau. Même mesure
+pour la série des incidents par snapshot (vue combinée) réduite par LTTB.
+
+    python 9-Benchmarks/bench_charts.py [--max-rows N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools.charts import MAX_POINTS, PAGE_SIZE, TOP_N, lttb, page_slice, top_n_with_other  # noqa: E402
+
+COLUMNS = ['query_id', 'query_text', 'elapsed_time', 'rows_processed', 'cpu_percent', 'incident', 'cause_probable']
+
+
+def make_incidents(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'query_id': [f"{i:013x}" for i in rng.integers(0, 2 ** 52, rows)],
+        'query_text': ["SELECT " + ", ".join(f"col_{j}" for j in range(60)) + " FROM t"] * rows,
+        'elapsed_time': rng.gamma(1.5, 300.0, rows).round(2),
+        'rows_processed': rng.integers(0, 2_000_000, rows),
+        'cpu_percent': rng.uniform(0, 100, rows).round(1),
+        'incident': 1,
+        'cause_probable': rng.choice(["Lignes traitées élevées", "Surcharge CPU"], rows),
+    })
+
+
+def payload(df_table, chart_df, hover):
+    # Taille JSON de ce que Streamlit envoie : le tableau + la figure plotly
+    start = time.perf_counter()
+    fig = px.bar(chart_df, x='query_id', y='elapsed_time', hover_data=hover, color='rows_processed')
+    size = len(df_table.to_json(orient='split')) + len(fig.to_json())
+    return size, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    sizes = [n for n in (100, 1_000, 10_000, 100_000) if n <= args.max_rows]
+    print(f"{'Incidents':>10}{'complet (Ko)':>15}{'(s)':>8}{'réduit (Ko)':>14}{'(s)':>8}")
+    for n in sizes:
+        incidents = make_incidents(n).sort_values('elapsed_time', ascending=False)
+        full, t_full = payload(incidents[COLUMNS], incidents, ['rows_processed', 'cpu_percent', 'cause_probable'])
+        reduced, t_red = payload(page_slice(incidents[COLUMNS], 1, PAGE_SIZE),
+                                 top_n_with_other(incidents, 'query_id', 'elapsed_time', TOP_N),
+                                 ['rows_processed', 'cpu_percent', 'cause_probable', 'requetes'])
+        print(f"{n:>10,}{full / 1024:>15,.0f}{t_full:>8.2f}{reduced / 1024:>14,.0f}{t_red:>8.2f}")
+
+    # Série temporelle de la vue combinée : un point par snapshot
+    snaps = 200_000
+    rng = np.random.default_rng(1)
+    x = np.arange(snaps)
+    y = np.abs(np.sin(x / 500) * 40 + rng.normal(0, 5, snaps)).round()
+    start = time.perf_counter()
+    keep = lttb(x, y, MAX_POINTS)
+    print(f"\n📈 LTTB : {snaps:,} snapshots -> {len(keep)} points en {time.perf_counter() - start:.3f}s "
+          f"(maximum conservé : {y[keep].max() == y.max()})")
+    print(f"✅ Volume borné : {TOP_N} barres + « Autres », {PAGE_SIZE} lignes par page, {MAX_POINTS} points par série")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark : prédiction XGBoost / scikit-learn vs forêt compilée en NumPy.
+
+Vérifie que les forêts compilées (awrtools.forest) donnent exactement les
+mêmes prédictions que XGext.pkl et RandomForest_model.pkl, puis mesure la
+latence médiane par appel pour des lots de 1, 100 et 100 000 lignes.
+
+    python 9-Benchmarks/bench_forest.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools.forest import compile_model  # noqa: E402
+
+MODELS = ['XGext.pkl', 'RandomForest_model.pkl']
+BATCH_SIZES = [1, 100, 100_000]
+
+
+def make_data(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'elapsed_time': rng.gamma(1.2, 200.0, rows).round(2),
+        'rows_processed': rng.integers(0, 20_000_000, rows),
+        'cpu_percent': rng.uniform(0, 100, rows).round(1),
+    })
+
+
+def median_latency(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def fmt(seconds):
+    return f"{seconds * 1e3:.3f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50, help="Appels mesurés par taille de lot")
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    for name in MODELS:
+        model = joblib.load(os.path.join(ROOT, '2-Models', name))
+        compiled = compile_model(model)
+        print(f"\n=== {name} ({compiled.n_trees} arbres, profondeur {compiled.max_depth})")
+        print(f"{'Lot':>10}{'modèle (df)':>16}{'compilé (df)':>16}{'compilé (ndarray)':>20}{'gain':>8}")
+        for size in BATCH_SIZES:
+            df = make_data(size)[compiled.features]
+            X = df.to_numpy(dtype=np.float32)
+            if not np.array_equal(model.predict(df), compiled.predict(df)):
+                print(f"❌ Prédictions différentes pour un lot de {size} lignes")
+                sys.exit(1)
+            repeat = max(3, args.repeat // 10) if size >= 100_000 else args.repeat
+            t_ref = median_latency(lambda: model.predict(df), repeat)
+            t_df = median_latency(lambda: compiled.predict(df), repeat)
+            t_np = median_latency(lambda: compiled.predict(X), repeat)
+            print(f"{size:>10,}{fmt(t_ref):>16}{fmt(t_df):>16}{fmt(t_np):>20}{t_ref / t_np:>7.1f}x")
+
+    print("\n✅ Prédictions identiques aux modèles d'origine")
+
+
+if __name__ == '__main__':
+    main()
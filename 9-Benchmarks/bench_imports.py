@@ -0,0 +1,87 @@
+"""Mesure du démarrage à froid : temps total et coût d'import par module.
+
+Lance chaque point d'entrée dans un nouveau processus avec ``python -X importtime``
+(plusieurs fois, temps médian), puis agrège le temps d'import propre de chaque
+module par paquet de premier niveau. app.py est exécuté en mode « nu »
+(sans serveur Streamlit) : c'est le coût payé par chaque nouveau réplica
+avant de pouvoir servir la première page.
+
+    python 9-Benchmarks/bench_imports.py [--repeat N] [--top N] [--module nom ...]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_JSON = os.path.join(ROOT, '1-ExtractionDonnees', 'Data.json')
+
+
+def entry_points(tmp_dir):
+    output = os.path.join(tmp_dir, 'incidents.csv')
+    return {
+        'app.py': ['app.py'],
+        'AgentDetection.py': ['5-Agent/AgentDetection.py', '--input', DATA_JSON, '--output', output],
+        'AgentDetectionRF.py': ['5-Agent/AgentDetectionRF.py', '--input', DATA_JSON, '--output', output],
+    }
+
+
+def run(args):
+    """(durée en s, temps d'import propre par module en µs) d'un processus."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args], cwd=ROOT,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        env={**os.environ, 'PYTHONWARNINGS': 'ignore'},
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(f"{' '.join(args)} a échoué :\n{proc.stderr[-2000:]}")
+    self_us = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|', 2)
+        self_us[name.strip()] = int(self_time)
+    return elapsed, self_us
+
+
+def by_package(self_us):
+    totals = defaultdict(int)
+    for name, us in self_us.items():
+        totals[name.split('.')[0]] += us
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="Lancements par point d'entrée")
+    parser.add_argument('--top', type=int, default=12, help="Paquets affichés par point d'entrée")
+    parser.add_argument('--module', nargs='*', default=[],
+                        help="Modules à mesurer seuls (ex. awrtools.analysis)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        targets = entry_points(tmp_dir)
+        for module in args.module:
+            targets[f'import {module}'] = ['-c', f'import {module}']
+        # Processus vide : coût fixe de l'interpréteur, retranché nulle part mais affiché
+        targets = {'python (vide)': ['-c', 'pass'], **targets}
+
+        for label, command in targets.items():
+            runs = [run(command) for _ in range(args.repeat)]
+            wall = statistics.median(r[0] for r in runs)
+            packages = by_package(runs[-1][1])
+            imports = sum(packages.values()) / 1e6
+            print(f"\n=== {label} : {wall:.2f}s au total, {imports:.2f}s d'imports "
+                  f"({len(runs[-1][1])} modules)")
+            for package, us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+                print(f"   {package:<28}{us / 1e3:>10.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark : étiquetage ligne à ligne (df.apply) vs calcul vectorisé.
+
+Vérifie que awrtools.labels donne exactement les mêmes étiquettes et causes
+que les anciennes fonctions de XGext.py, RandomForestLearn.py et app.py,
+puis mesure la montée en charge jusqu'à 10 millions de lignes. Le
+df.apply n'est mesuré que jusqu'à --max-apply lignes (extrapolé au-delà).
+
+    python 9-Benchmarks/bench_labels.py [--max-rows N] [--max-apply N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools import labels  # noqa: E402
+
+
+# === Implémentations de référence (anciennes versions)
+def is_bad_performance_xgext(row):
+    threshold_rows = (2.78e-04 * row['rows_processed'] + 106.40) * 1.5
+    threshold_cpu = (-3.06 * row['cpu_percent'] + 250.51) * 1.5
+    return 1 if (row['elapsed_time'] > threshold_rows) or (row['elapsed_time'] > threshold_cpu) else 0
+
+
+def is_bad_performance_rf(rows_processed, elapsed_time):
+    return 1 if elapsed_time > (2.57e-04 * rows_processed + 136.40) * 1.5 else 0
+
+
+def identifier_cause_ai(row):
+    if row['incident'] != 1:
+        return "Aucun"
+    causes = []
+    if row['elapsed_time'] > (2.78e-04 * row['rows_processed'] + 106.40) * 1.5:
+        causes.append("Lignes traitées élevées")
+    if row['elapsed_time'] > (-3.06 * row['cpu_percent'] + 250.51) * 1.5:
+        causes.append("Surcharge CPU")
+    return ", ".join(causes) if causes else "Incident probable"
+
+
+def reference(df):
+    return (
+        df.apply(is_bad_performance_xgext, axis=1).to_numpy(),
+        df.apply(lambda r: is_bad_performance_rf(r['rows_processed'], r['elapsed_time']), axis=1).to_numpy(),
+        df.apply(identifier_cause_ai, axis=1).to_numpy(),
+    )
+
+
+def vectorized(df):
+    return (
+        labels.bad_performance(df['elapsed_time'], df['rows_processed'], df['cpu_percent']),
+        labels.bad_performance(df['elapsed_time'], df['rows_processed'], rows_params=(2.57e-04, 136.40)),
+        labels.cause_probable(df['incident'], df['elapsed_time'], df['rows_processed'], df['cpu_percent']),
+    )
+
+
+def make_data(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'rows_processed': rng.integers(0, 2_000_000, rows),
+        'elapsed_time': rng.gamma(1.5, 150.0, rows).round(2),
+        'cpu_percent': rng.uniform(0, 100, rows).round(1),
+        'incident': rng.integers(0, 2, rows),
+    })
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    result = fn(df)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-rows', type=int, default=10_000_000)
+    parser.add_argument('--max-apply', type=int, default=100_000)
+    args = parser.parse_args()
+
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000, 10_000_000) if n <= args.max_rows]
+    apply_rate = None
+    print(f"{'Lignes':>12}{'df.apply (s)':>16}{'vectorisé (s)':>16}{'gain':>10}")
+    for n in sizes:
+        df = make_data(n)
+        got, t_vec = timed(vectorized, df)
+        if n <= args.max_apply:
+            expected, t_ref = timed(reference, df)
+            for a, b in zip(expected, got):
+                if not np.array_equal(a, b):
+                    print(f"❌ Résultats différents à {n} lignes")
+                    sys.exit(1)
+            apply_rate = t_ref / n
+            ref = f"{t_ref:.3f}"
+        else:
+            t_ref = apply_rate * n
+            ref = f"~{t_ref:.0f}"
+        print(f"{n:>12,}{ref:>16}{t_vec:>16.3f}{t_ref / t_vec:>9.0f}x")
+
+    print("\n✅ Étiquettes et causes identiques aux fonctions ligne à ligne")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark : nuage seaborn + plt.text par point vs rendu en densité (awrtools.plotting).
+
+L'ancienne version de 3-Courbes (scatterplot + une étiquette par query_id)
+n'est mesurée que jusqu'à --max-scatter points. Le rendu en densité et en
+hexagones est mesuré de 1 000 à 10 millions de points : agrégation
+vectorielle puis dessin de la seule grille, image écrite sans affichage.
+
+    python 9-Benchmarks/bench_plots.py [--max-rows N] [--max-scatter N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools.plotting import regression_plot  # noqa: E402
+
+
+def make_data(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.integers(1, 5_000_000, rows).astype(np.float64)
+    y = 2.78e-04 * x + rng.gamma(1.5, 70.0, rows)
+    labels = np.char.add('q', np.arange(rows).astype(str))
+    return x, y, labels
+
+
+def old_plot(x, y, labels, coef, output):
+    # Ancienne version de CourbeExt.py (sans plt.show)
+    plt.figure(figsize=(14, 7))
+    sns.scatterplot(x=x, y=y, alpha=0.6, label="Données")
+    for i in range(len(x)):
+        plt.text(x[i], y[i], labels[i], fontsize=8, alpha=0.7)
+    x_vals = np.linspace(x.min(), x.max(), 100)
+    plt.plot(x_vals, np.poly1d(coef)(x_vals), color='red')
+    plt.tight_layout()
+    plt.savefig(output)
+    plt.close('all')
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-rows', type=int, default=10_000_000)
+    parser.add_argument('--max-scatter', type=int, default=5_000)
+    args = parser.parse_args()
+
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000, 10_000_000) if n <= args.max_rows]
+    print(f"{'Points':>12}{'scatter+text (s)':>18}{'densité (s)':>14}{'hexbin (s)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'courbe.png')
+        for n in sizes:
+            x, y, labels = make_data(n)
+            coef = np.polyfit(x, y, 1)
+            old = f"{timed(old_plot, x, y, labels, coef, output):.2f}" if n <= args.max_scatter else "-"
+            t_density = timed(regression_plot, x, y, labels, coef, output, "t", "x", "y", mode='density')
+            t_hexbin = timed(regression_plot, x, y, labels, coef, output, "t", "x", "y", mode='hexbin')
+            print(f"{n:>12,}{old:>18}{t_density:>14.2f}{t_hexbin:>13.2f}")
+
+    print("\n✅ Images écrites sans affichage; seuls les 20 plus grands écarts sont étiquetés")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark : rapport PDF en un seul grand tableau vs construction page par page (awrtools.report).
+
+La référence reproduit l'ancien ``generate_professional_pdf`` d'app.py : un
+seul ``Table`` pour toutes les requêtes, des commandes de style ajoutées
+ligne par ligne et un ``ParagraphStyle`` créé par requête. Chaque mesure
+tourne dans un processus séparé, la référence seulement jusqu'à --max-old
+lignes. La mémoire affichée est le pic moins la mémoire après chargement
+des modules et des données : elle croît avec le nombre de pages (pages
+gardées par ReportLab, fichier assemblé en mémoire à l'écriture).
+
+    python 9-Benchmarks/bench_report.py [--max-rows N] [--max-old N]
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools.report import build_incident_pdf  # noqa: E402
+
+
+def make_incidents(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    words = rng.integers(5, 300, rows)
+    return pd.DataFrame({
+        'query_id': [f"{i:013x}" for i in rng.integers(0, 2 ** 52, rows)],
+        'query_text': ["SELECT a, b FROM t WHERE " + "col = :1 AND " * (int(k) // 4) for k in words],
+        'elapsed_time': rng.gamma(1.5, 200.0, rows),
+        'rows_processed': rng.integers(0, 1_000_000, rows),
+        'cpu_percent': rng.uniform(0, 100, rows),
+        'cause_probable': rng.choice(["Incident probable", "Lignes traitées élevées, Surcharge CPU", "Surcharge CPU"],
+                                     rows),
+    })
+
+
+def single_table_pdf(df, output):
+    # Ancienne version : un seul tableau, style grandissant ligne par ligne
+    from reportlab.lib import colors
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    doc = SimpleDocTemplate(output, pagesize=landscape(A4), rightMargin=30, leftMargin=30, topMargin=30,
+                            bottomMargin=30)
+    data = [['ID Requête', 'Requête', 'Temps', 'Lignes', 'CPU (%)', 'Cause probable']]
+    for _, row in df.iterrows():
+        style = ParagraphStyle('QueryText', parent=styles['Normal'], fontSize=8, wordWrap='CJK',
+                               leftIndent=3, rightIndent=3, spaceAfter=3)
+        data.append([str(row['query_id']), Paragraph(str(row['query_text']), style), f"{row['elapsed_time']:.2f}",
+                     f"{row['rows_processed']:,}", f"{row['cpu_percent']:.1f}",
+                     str(row['cause_probable']).replace(', ', '\n')])
+    table = Table(data, colWidths=[1 * inch, 3.8 * inch, 0.8 * inch, 0.9 * inch, 0.7 * inch, 1.3 * inch],
+                  repeatRows=1)
+    commands = [('BACKGROUND', (0, 0), (-1, 0), HexColor('#34495e')), ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'), ('FONTSIZE', (0, 1), (-1, -1), 8)]
+    for i in range(1, len(data)):
+        commands.append(('BACKGROUND', (0, i), (-1, i), HexColor('#f8f9fa') if i % 2 == 0 else colors.white))
+        elapsed = float(data[i][2])
+        if elapsed > 100:
+            commands.append(('TEXTCOLOR', (2, i), (2, i), HexColor('#e74c3c' if elapsed > 400 else '#f39c12')))
+            commands.append(('FONTNAME', (2, i), (2, i), 'Helvetica-Bold'))
+        if float(data[i][4]) > 25:
+            commands.append(('BACKGROUND', (4, i), (4, i), HexColor('#ffe6e6')))
+            commands.append(('TEXTCOLOR', (4, i), (4, i), HexColor('#c0392b')))
+            commands.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
+        commands.append(('BACKGROUND', (5, i), (5, i), HexColor('#fff3cd')))
+        commands.append(('TEXTCOLOR', (5, i), (5, i), HexColor('#856404')))
+    table.setStyle(TableStyle(commands))
+    doc.build([table])
+
+
+def current_mb():
+    # Mémoire résidente actuelle (Linux)
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def child(mode, rows):
+    import reportlab.platypus  # noqa: F401  (modules chargés avant la mesure de départ)
+
+    df = make_incidents(rows)
+    base_mb = current_mb()
+    output = io.BytesIO()
+    start = time.perf_counter()
+    if mode == 'old':
+        single_table_pdf(df, output)
+    else:
+        build_incident_pdf(df, "bench.html", None, output)
+    seconds = time.perf_counter() - start
+    pages = output.getvalue().count(b'/Type /Page\n')
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'seconds': seconds, 'pages': pages, 'peak_mb': peak_mb, 'growth_mb': peak_mb - base_mb,
+                      'pdf_mb': len(output.getvalue()) / 2 ** 20}))
+
+
+def measure(mode, rows):
+    result = subprocess.run([sys.executable, __file__, '--child', mode, str(rows)],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-rows', type=int, default=50_000)
+    parser.add_argument('--max-old', type=int, default=3_000)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child[0], int(args.child[1]))
+
+    sizes = [n for n in (1_000, 3_000, 10_000, 50_000) if n <= args.max_rows]
+    print(f"{'Lignes':>8}{'Mode':>12}{'pages':>8}{'durée (s)':>12}{'ms/page':>10}{'PDF (Mo)':>10}"
+          f"{'mémoire ajoutée (Mo)':>23}{'Ko/page':>9}")
+    for n in sizes:
+        for mode in ('old', 'new'):
+            if mode == 'old' and n > args.max_old:
+                continue
+            r = measure(mode, n)
+            label = "1 tableau" if mode == 'old' else "par pages"
+            print(f"{n:>8,}{label:>12}{r['pages']:>8}{r['seconds']:>12.2f}"
+                  f"{1000 * r['seconds'] / max(r['pages'], 1):>10.1f}{r['pdf_mb']:>10.1f}"
+                  f"{r['growth_mb']:>23.0f}{1024 * r['growth_mb'] / max(r['pages'], 1):>9.1f}")
+    print("\n✅ Coût par page constant : blocs de tableau créés à la demande, style commun partagé")
+    print("⚠️ Mémoire non bornée : ReportLab garde les pages (compressées) et assemble le PDF en mémoire")
+
+
+if __name__ == '__main__':
+    main()
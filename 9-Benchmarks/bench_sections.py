@@ -0,0 +1,64 @@
+"""Benchmark : lecture d'une section en flux vs lecture via l'index de sections.
+
+Pour chaque rapport du dossier AWR/, construit l'index (un passage), vérifie
+que la lecture indexée rend les mêmes lignes que ``stream.read_sections``
+puis compare le temps de lecture de sections isolées.
+
+    python 9-Benchmarks/bench_sections.py [dossier_awr] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools import stream  # noqa: E402
+from awrtools.section_index import SectionIndex  # noqa: E402
+
+TITLES = ["Time Model Statistics", stream.COMPLETE_SQL_TEXT]
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('awr_folder', nargs='?', default=os.path.join(ROOT, 'AWR'))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    files = sorted(f for f in os.listdir(args.awr_folder) if f.endswith('.html'))
+    totals = {title: [0.0, 0.0] for title in TITLES}
+    build_total = 0.0
+
+    print(f"{'Rapport':<28}{'Section':<28}{'flux (ms)':>11}{'index (ms)':>12}")
+    for filename in files:
+        path = os.path.join(args.awr_folder, filename)
+        index, t_build = best_of(lambda: SectionIndex.build(path), args.repeat)
+        build_total += t_build
+        for title in TITLES:
+            expected, t_stream = best_of(lambda: stream.read_sections(path, [title]), args.repeat)
+            got, t_index = best_of(lambda: index.read_sections([title]), args.repeat)
+            if got != expected:
+                print(f"❌ Résultats différents pour {filename} ({title})")
+                sys.exit(1)
+            totals[title][0] += t_stream
+            totals[title][1] += t_index
+            print(f"{filename:<28}{title[:26]:<28}{t_stream * 1000:>11.2f}{t_index * 1000:>12.2f}")
+
+    print()
+    print(f"🔧 Construction des index : {build_total * 1000 / len(files):.2f} ms par rapport")
+    for title, (t_stream, t_index) in totals.items():
+        print(f"✅ {title} : lignes identiques, x{t_stream / t_index:.1f} plus rapide")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark : sessions par regex sur le document entier vs en-tête lu par mmap.
+
+Vérifie que ``header.read_header`` donne les mêmes sessions Begin/End Snap
+que l'ancienne regex de Sessions.py sur les rapports du dossier AWR/, puis
+compare le temps par rapport et le temps total séquentiel/parallèle.
+
+    python 9-Benchmarks/bench_sessions.py [dossier_awr] [--repeat N] [--workers N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools.header import read_header  # noqa: E402
+from awrtools.pipeline import iter_extractions, list_reports  # noqa: E402
+
+# === Implémentation de référence (ancienne version de Sessions.py)
+snap_pattern = re.compile(
+    r'<tr><td[^>]*>(Begin Snap:|End Snap:)</td>(?:<td[^>]*>.*?</td>){2}<td[^>]*>(\d+)</td>',
+    re.IGNORECASE
+)
+
+
+def reference_sessions(file_path, filename=None):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    begin_sessions = end_sessions = None
+    for snap_type, sessions in snap_pattern.findall(content):
+        if snap_type.strip().lower() == 'begin snap:':
+            begin_sessions = int(sessions)
+        elif snap_type.strip().lower() == 'end snap:':
+            end_sessions = int(sessions)
+    return [begin_sessions, end_sessions]
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def run_all(paths, workers, extract):
+    return {f: r for f, _, r, _ in iter_extractions(paths, workers, extract)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('awr_folder', nargs='?', default=os.path.join(ROOT, 'AWR'))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    paths = list_reports(args.awr_folder)
+    t_ref_total = t_new_total = 0.0
+    print(f"{'Rapport':<28}{'regex (ms)':>12}{'mmap (ms)':>12}")
+    for path in paths:
+        expected, t_ref = best_of(lambda: reference_sessions(path), args.repeat)
+        header, t_new = best_of(lambda: read_header(path), args.repeat)
+        if [header.get('begin_sessions'), header.get('end_sessions')] != expected:
+            print(f"❌ Sessions différentes pour {os.path.basename(path)}")
+            sys.exit(1)
+        t_ref_total += t_ref
+        t_new_total += t_new
+        print(f"{os.path.basename(path):<28}{t_ref * 1000:>12.2f}{t_new * 1000:>12.3f}")
+
+    print()
+    print(f"✅ Sessions identiques, x{t_ref_total / t_new_total:.0f} plus rapide par rapport")
+    for workers in sorted({1, args.workers}):
+        _, t_ref = best_of(lambda: run_all(paths, workers, reference_sessions), args.repeat)
+        _, t_new = best_of(lambda: run_all(paths, workers, read_header), args.repeat)
+        print(f"⏱️ {len(paths)} rapports, {workers} processus : regex {t_ref * 1000:.1f} ms, "
+              f"mmap {t_new * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark : chargement de Data.json (pd.read_json) vs magasin colonne.
+
+Génère un jeu synthétique au format de Data.json (1,2 million de lignes par
+défaut), le convertit en magasin Parquet, puis compare :
+  - lecture complète du JSON puis filtrage en mémoire (méthode actuelle) ;
+  - lecture du magasin avec projection de colonnes et filtres poussés.
+
+    python 9-Benchmarks/bench_store.py [--rows N] [--reports N]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools.store import convert_json, read_metrics  # noqa: E402
+
+
+def make_data(rows, reports, seed=42):
+    rng = np.random.default_rng(seed)
+    begin = 40000 + rng.integers(0, reports, rows)
+    return pd.DataFrame({
+        'query_id': [f'{i:013x}' for i in rng.integers(0, 50_000, rows)],
+        'awr_file': [f'awrrpt_1_{b}_{b + 1}.html' for b in begin],
+        'rows_processed': rng.integers(0, 20_000_000, rows),
+        'elapsed_time': rng.gamma(1.5, 80.0, rows).round(2),
+        'cpu_percent': rng.uniform(0, 100, rows).round(1),
+        'query_text': 'SELECT * FROM DUAL',
+    })
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<55}{elapsed:>8.2f}s  {len(result):>9} lignes")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_200_000)
+    parser.add_argument('--reports', type=int, default=5000, help="Nombre de snapshots simulés")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_store_')
+    try:
+        json_path = os.path.join(workdir, 'Data.json')
+        store_dir = os.path.join(workdir, 'store')
+
+        print(f"⏳ Génération de {args.rows} lignes...")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(make_data(args.rows, args.reports).to_dict('records'), f, indent=4)
+        start = time.perf_counter()
+        convert_json(json_path, store_dir)
+        print(f"📦 Conversion : {time.perf_counter() - start:.1f}s — JSON {os.path.getsize(json_path) / 2**20:.0f} Mo, "
+              f"magasin {sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(store_dir) for f in fs) / 2**20:.0f} Mo\n")
+
+        low, high = 40000 + args.reports // 2, 40000 + args.reports // 2 + 99
+        columns = ['elapsed_time', 'rows_processed']
+
+        def json_full():
+            df = pd.read_json(json_path)
+            begin = df['awr_file'].str.extract(r'awrrpt_\d+_(\d+)_')[0].astype(int)
+            return df.loc[begin.between(low, high), columns]
+
+        t_json = timed("JSON : lecture complète + filtre 100 snapshots", json_full)
+        timed("Magasin : tout (toutes colonnes)", lambda: read_metrics(store_dir))
+        timed("Magasin : 2 colonnes, toutes les lignes", lambda: read_metrics(store_dir, columns=columns))
+        t_store = timed("Magasin : 2 colonnes, 100 snapshots",
+                        lambda: read_metrics(store_dir, columns=columns, snap_range=(low, high)))
+        print(f"\n✅ Plage de snapshots : x{t_json / t_store:.0f} plus rapide que pd.read_json")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Benchmark : extraction BeautifulSoup (arbre complet) vs extraction en flux.
+
+Vérifie que les deux méthodes donnent les mêmes enregistrements sur les
+rapports du dossier AWR/, puis compare le temps et le pic mémoire Python
+(tracemalloc) par rapport.
+
+    python 9-Benchmarks/bench_stream.py [dossier_awr] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools import stream  # noqa: E402
+
+
+# === Implémentations de référence (anciennes versions de Dataext.py et app.py)
+def extract_complete_sql_texts(soup):
+    sql_texts = {}
+    for section in soup.find_all("h3", class_="awr"):
+        if "Complete List of SQL Text" in section.text:
+            table = section.find_next("table")
+            if not table:
+                continue
+            rows = table.find_all("tr")
+            headers = [th.text.strip() for th in rows[0].find_all("th")]
+            header_map = {h: i for i, h in enumerate(headers)}
+            sql_id_idx = header_map.get("SQL Id")
+            sql_text_idx = header_map.get("SQL Text")
+            if sql_id_idx is None or sql_text_idx is None:
+                continue
+            for row in rows[1:]:
+                cells = row.find_all("td")
+                if len(cells) <= max(sql_id_idx, sql_text_idx):
+                    continue
+                sql_texts[cells[sql_id_idx].text.strip()] = cells[sql_text_idx].text.strip()
+    return sql_texts
+
+
+def extract_metrics_from_executions(soup, filename):
+    local_data = {}
+    for section in soup.find_all("h3", class_="awr"):
+        if section.text.strip() == "SQL ordered by Executions":
+            table = section.find_next("table")
+            if not table:
+                return {}
+            rows = table.find_all("tr")
+            headers = [th.text.strip() for th in rows[0].find_all("th")]
+            header_map = {header: idx for idx, header in enumerate(headers)}
+            sql_id_idx = header_map.get("SQL Id")
+            rows_proc_idx = header_map.get("Rows Processed")
+            elapsed_idx = header_map.get("Elapsed Time (s)")
+            cpu_idx = header_map.get("%CPU")
+            if sql_id_idx is None:
+                return {}
+            for row in rows[1:]:
+                cells = [td.text.strip() for td in row.find_all("td")]
+                if len(cells) < len(header_map):
+                    continue
+                try:
+                    sql_id = cells[sql_id_idx]
+                    rows_processed = int(cells[rows_proc_idx].replace(',', '')) if rows_proc_idx is not None and cells[rows_proc_idx] else 0
+                    elapsed_time = float(cells[elapsed_idx].replace(',', '')) if elapsed_idx is not None and cells[elapsed_idx] else 0
+                    cpu_percent = float(cells[cpu_idx].replace('%', '').replace(',', '.')) if cpu_idx is not None and cells[cpu_idx] else 0
+                    local_data[sql_id] = {
+                        "query_id": sql_id,
+                        "awr_file": filename,
+                        "rows_processed": rows_processed,
+                        "elapsed_time": elapsed_time,
+                        "cpu_percent": cpu_percent
+                    }
+                except Exception:
+                    pass
+    return local_data
+
+
+def reference_dataext(path, filename):
+    with open(path, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f, 'lxml')
+    sql_texts = extract_complete_sql_texts(soup)
+    records = []
+    for sql_id, entry in extract_metrics_from_executions(soup, filename).items():
+        entry['query_text'] = sql_texts.get(sql_id, "")
+        records.append(entry)
+    return records
+
+
+def reference_app(path, filename):
+    with open(path, 'rb') as f:
+        soup = BeautifulSoup(f.read().decode("utf-8", errors='ignore'), 'lxml')
+    all_data = []
+    sql_texts = {}
+    for section in soup.find_all("h3", class_="awr"):
+        if "Complete List of SQL Text" in section.text:
+            table = section.find_next("table")
+            if table:
+                for row in table.find_all('tr')[1:]:
+                    cols = row.find_all("td")
+                    if len(cols) >= 2:
+                        sql_texts[cols[0].text.strip()] = cols[1].text.strip()
+    for table in soup.find_all('table', class_='tdiff'):
+        headers = [th.text.strip() for th in table.find_all('th')]
+        required_headers = ['Executions', 'Rows Processed', 'Elapsed  Time (s)', 'SQL Id']
+        if not all(header in headers for header in required_headers):
+            continue
+        header_map = {header: idx for idx, header in enumerate(headers)}
+        cpu_idx = next((i for i, h in enumerate(headers) if '%' in h and 'CPU' in h.upper()), None)
+        for row in table.find_all('tr')[1:]:
+            cells = row.find_all('td')
+            if len(cells) < len(header_map):
+                continue
+            try:
+                int(cells[header_map['Executions']].text.strip().replace(',', ''))
+                rows_processed = int(cells[header_map['Rows Processed']].text.strip().replace(',', ''))
+                elapsed_time = float(cells[header_map['Elapsed  Time (s)']].text.strip().replace(',', ''))
+                sql_id = cells[header_map['SQL Id']].text.strip()
+                cpu_percent = 0.0
+                if cpu_idx is not None:
+                    cpu_text = cells[cpu_idx].text.strip().replace('%', '').replace(',', '.')
+                    cpu_percent = float(cpu_text) if cpu_text else 0.0
+                all_data.append({
+                    'query_id': sql_id,
+                    'awr_file': filename,
+                    'elapsed_time': elapsed_time,
+                    'rows_processed': rows_processed,
+                    'cpu_percent': cpu_percent,
+                    'query_text': sql_texts.get(sql_id, "")
+                })
+            except Exception:
+                pass
+    return all_data
+
+
+def streaming_app(path, filename):
+    with open(path, 'rb') as f:
+        return stream.extract_awr_records(f.read(), filename, errors='ignore')
+
+
+def measure(fn, path, filename, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path, filename)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(path, filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('awr_folder', nargs='?', default=os.path.join(ROOT, 'AWR'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cases = [
+        ("Dataext", reference_dataext, stream.extract_report),
+        ("app", reference_app, streaming_app),
+    ]
+    files = sorted(f for f in os.listdir(args.awr_folder) if f.endswith('.html'))
+    totals = {name: [0.0, 0.0, 0, 0] for name, _, _ in cases}
+
+    print(f"{'Rapport':<28}{'Cas':<10}{'bs4 (ms)':>10}{'flux (ms)':>11}{'bs4 pic':>10}{'flux pic':>10}")
+    for filename in files:
+        path = os.path.join(args.awr_folder, filename)
+        for name, reference, streaming in cases:
+            expected, t_ref, m_ref = measure(reference, path, filename, args.repeat)
+            got, t_new, m_new = measure(streaming, path, filename, args.repeat)
+            if got != expected:
+                print(f"❌ Résultats différents pour {filename} ({name})")
+                sys.exit(1)
+            total = totals[name]
+            total[0] += t_ref
+            total[1] += t_new
+            total[2] = max(total[2], m_ref)
+            total[3] = max(total[3], m_new)
+            print(f"{filename:<28}{name:<10}{t_ref * 1000:>10.1f}{t_new * 1000:>11.1f}"
+                  f"{m_ref / 2**20:>8.1f}Mo{m_new / 2**20:>8.1f}Mo")
+
+    print()
+    for name, (t_ref, t_new, m_ref, m_new) in totals.items():
+        print(f"✅ {name} : enregistrements identiques, x{t_ref / t_new:.1f} plus rapide, "
+              f"pic mémoire {m_ref / 2**20:.1f} Mo -> {m_new / 2**20:.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
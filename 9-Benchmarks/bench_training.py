@@ -0,0 +1,93 @@
+"""Benchmark : réentraînement complet vs entraînement incrémental (XGBoost, Random Forest).
+
+Un historique de snapshots synthétiques (étiquetés avec awrtools.labels) sert
+à entraîner un modèle initial; de nouveaux snapshots arrivent ensuite. On
+compare le réentraînement sur tout l'historique à la mise à jour sur les
+seuls nouveaux snapshots : durée et précision sur des snapshots ultérieurs.
+
+    python 9-Benchmarks/bench_training.py [--snapshots N] [--rows N] [--new N]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from xgboost import XGBClassifier
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from awrtools.labels import bad_performance  # noqa: E402
+from awrtools.training import RF_TREES, XGB_ROUNDS, continue_xgboost, warm_start_forest  # noqa: E402
+
+XGB_FEATURES = ['elapsed_time', 'rows_processed', 'cpu_percent']
+RF_FEATURES = ['elapsed_time', 'rows_processed']
+
+
+def make_snapshots(snapshots, rows, seed=0):
+    """Snapshots synthétiques : charge qui augmente lentement d'un snapshot à l'autre."""
+    rng = np.random.default_rng(seed)
+    n = snapshots * rows
+    drift = np.repeat(np.linspace(1.0, 1.3, snapshots), rows)
+    df = pd.DataFrame({
+        'snapshot': np.repeat(np.arange(snapshots), rows),
+        'elapsed_time': (rng.gamma(1.2, 200.0, n) * drift).round(2),
+        'rows_processed': rng.integers(0, 2_000_000, n),
+        'cpu_percent': rng.uniform(0, 100, n).round(1),
+    })
+    df['xgb_label'] = bad_performance(df['elapsed_time'], df['rows_processed'], df['cpu_percent'])
+    df['rf_label'] = bad_performance(df['elapsed_time'], df['rows_processed'])
+    return df
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--snapshots', type=int, default=400, help="Snapshots déjà vus par le modèle initial")
+    parser.add_argument('--rows', type=int, default=1000, help="Requêtes par snapshot")
+    parser.add_argument('--new', type=int, default=20, help="Nouveaux snapshots à intégrer")
+    args = parser.parse_args()
+
+    total = args.snapshots + args.new
+    df = make_snapshots(total + 20, args.rows)
+    history = df[df['snapshot'] < args.snapshots]
+    new = df[(df['snapshot'] >= args.snapshots) & (df['snapshot'] < total)]
+    everything = df[df['snapshot'] < total]
+    # Évaluation sur des snapshots postérieurs à tout entraînement
+    future = df[df['snapshot'] >= total]
+    print(f"📊 {len(history)} lignes d'historique, {len(new)} nouvelles, {len(future)} d'évaluation")
+
+    cases = [
+        ("XGBoost", XGB_FEATURES, 'xgb_label',
+         lambda: XGBClassifier(eval_metric='logloss', random_state=42, n_jobs=-1),
+         lambda model, X, y: continue_xgboost(model, X, y, rounds=XGB_ROUNDS)),
+        ("Random Forest", RF_FEATURES, 'rf_label',
+         lambda: RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1),
+         lambda model, X, y: warm_start_forest(copy.deepcopy(model), X, y, trees=RF_TREES)),
+    ]
+    print(f"\n{'Modèle':<16}{'Mode':<14}{'durée':>10}{'précision':>12}")
+    for name, features, label, make, update in cases:
+        initial = make().fit(history[features], history[label])
+
+        full, t_full = timed(lambda: make().fit(everything[features], everything[label]))
+        updated, t_inc = timed(lambda: update(initial, new[features], new[label]))
+
+        X_eval, y_eval = future[features], future[label]
+        for mode, model, seconds in (("initial", initial, None), ("complet", full, t_full),
+                                     ("incrémental", updated, t_inc)):
+            duration = f"{seconds:.2f}s" if seconds is not None else "-"
+            print(f"{name:<16}{mode:<14}{duration:>10}{model.score(X_eval, y_eval):>12.4f}")
+        print(f"✅ {name} : mise à jour x{t_full / t_inc:.0f} plus rapide que le réentraînement complet")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
-import sqlite3
 import json
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from awrtools.db import connect, ingest_records
 
 # Nom du fichier JSON corrigé
 json_file = '/Users/paki/Desktop/PFE/1- ExtractionDonnees/Data.json'
@@ -16,35 +19,16 @@ if not os.path.exists(json_file):
 with open(json_file, 'r', encoding='utf-8') as f:
     corrected_data = json.load(f)
 
-# Connexion ou création de la base de données SQLite
-conn = sqlite3.connect(db_file)
-cursor = conn.cursor()
-
-# Créer la table awr_data si elle n'existe pas
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS awr_data (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        query_id TEXT,
-        awr_file TEXT,
-        elapsed_time REAL,
-        rows_processed INTEGER
-    )
-''')
-
-# Insérer les données du JSON corrigé dans la table
-for entry in corrected_data:
-    cursor.execute('''
-        INSERT INTO awr_data (query_id, awr_file, elapsed_time, rows_processed)
-        VALUES (?, ?, ?, ?)
-    ''', (
-        entry.get('query_id'),
-        entry.get('awr_file'),
-        entry.get('elapsed_time'),
-        entry.get('rows_processed')
-    ))
-
-# Sauvegarder les changements et fermer la connexion
-conn.commit()
+# Connexion ou création de la base (mode WAL, schéma et index créés ou migrés)
+conn = connect(db_file)
+
+# Insertion par lots dans une seule transaction; une ligne (awr_file, query_id)
+# déjà présente est mise à jour au lieu d'être dupliquée
+count = ingest_records(conn, corrected_data)
+
+total = conn.execute('SELECT COUNT(*) FROM awr_data').fetchone()[0]
+texts = conn.execute('SELECT COUNT(*) FROM sql_text').fetchone()[0]
 conn.close()
 
-print(f"✅ Base de données '{db_file}' créée et données insérées avec succès depuis '{json_file}'.")
\ No newline at end of file
+print(f"✅ Base de données '{db_file}' : {count} lignes insérées ou mises à jour depuis '{json_file}' "
+      f"({total} lignes au total, {texts} textes SQL distincts).")
@@ -1,22 +1,17 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import plotly.express as px
-from bs4 import BeautifulSoup
-from matplotlib.backends.backend_pdf import PdfPages
-from matplotlib import pyplot as plt
-from matplotlib import image as mpimg
-from io import BytesIO
-import matplotlib.pyplot as plt
-import textwrap
+from io import BytesIO, StringIO
 import os
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib import colors
-from reportlab.lib.colors import HexColor
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Démarrage rapide : pandas, plotly, ReportLab et le modèle ne sont importés
+# qu'au premier rapport analysé (ou au premier PDF demandé), pas au lancement
+from awrtools.archives import UPLOAD_TYPES, is_report_name, iter_uploads
+from awrtools.memo import LRUCache, content_key
+from awrtools.models import compiled_path, get_model
+from awrtools.pipeline import iter_bounded
+from awrtools.stream import parse_awr_name
 
 # === Config de la page (DOIT être appelée en premier)
 st.set_page_config(page_title="Détection des perfs", layout="wide")
@@ -49,401 +44,287 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# === Charger le modèle
+# === Modèle chargé au premier rapport (une seule fois par processus, rechargé si le .pkl change)
+# La forêt compilée XGext.npz est utilisée si elle correspond au .pkl : ni
+# xgboost ni scikit-learn à importer
 model_path = "2-Models/XGext.pkl"
-model = joblib.load(model_path)
+
+def get_app_model():
+    return get_model(compiled_path(model_path))
 
 # === Fonction d'extraction des données AWR avec query_text
-def extract_data_from_awr(html_content, filename="uploaded_file"):
-    soup = BeautifulSoup(html_content, 'lxml')
-    all_data = []
-    sql_texts = {}
-
-    # Extraire les SQL Texts depuis une section spécifique (Complete List of SQL Text)
-    for section in soup.find_all("h3", class_="awr"):
-        if "Complete List of SQL Text" in section.text:
-            table = section.find_next("table")
-            if table:
-                for row in table.find_all('tr')[1:]:
-                    cols = row.find_all("td")
-                    if len(cols) >= 2:
-                        sql_id = cols[0].text.strip()
-                        query_text = cols[1].text.strip()
-                        sql_texts[sql_id] = query_text
-
-    # Extraire les métriques des tables de classe 'tdiff'
-    for table in soup.find_all('table', class_='tdiff'):
-        headers = [th.text.strip() for th in table.find_all('th')]
-
-        required_headers = ['Executions', 'Rows Processed', 'Elapsed  Time (s)', 'SQL Id']
-        if all(header in headers for header in required_headers):
-            header_map = {header: idx for idx, header in enumerate(headers)}
-
-            executions_idx = header_map['Executions']
-            rows_proc_idx = header_map['Rows Processed']
-            elapsed_time_idx = header_map['Elapsed  Time (s)']
-            sql_id_idx = header_map['SQL Id']
-
-            cpu_idx = None
-            for i, h in enumerate(headers):
-                if '%' in h and 'CPU' in h.upper():
-                    cpu_idx = i
-                    break
-
-            rows = table.find_all('tr')[1:]
-            for row in rows:
-                cells = row.find_all('td')
-                if len(cells) >= len(header_map):
-                    try:
-                        executions = int(cells[executions_idx].text.strip().replace(',', ''))
-                        rows_processed = int(cells[rows_proc_idx].text.strip().replace(',', ''))
-                        elapsed_time = float(cells[elapsed_time_idx].text.strip().replace(',', ''))
-                        sql_id = cells[sql_id_idx].text.strip()
-
-                        cpu_percent = 0.0
-                        if cpu_idx is not None:
-                            cpu_text = cells[cpu_idx].text.strip().replace('%', '').replace(',', '.')
-                            cpu_percent = float(cpu_text) if cpu_text else 0.0
-
-                        data = {
-                            'query_id': sql_id,
-                            'awr_file': filename,
-                            'elapsed_time': elapsed_time,
-                            'rows_processed': rows_processed,
-                            'cpu_percent': cpu_percent,
-                            'query_text': sql_texts.get(sql_id, "")
-                        }
-                        all_data.append(data)
-                    except Exception as e:
-                        st.warning(f"⚠️ Erreur ligne : {e}")
-
-    return pd.DataFrame(all_data)
-
-# === Fonctions d'analyse de performance
-def get_regression_threshold_rows(rows_processed):
-    return (2.78e-04 * rows_processed + 106.40) * 1.5
-
-def get_regression_threshold_cpu(cpu_percent):
-    return (-3.06 * cpu_percent + 250.51) * 1.5
-
-def identifier_cause_ai(row):
-    if row['incident'] != 1:
-        return "Aucun"
-    causes = []
-    if row['elapsed_time'] > get_regression_threshold_rows(row['rows_processed']):
-        causes.append("Lignes traitées élevées")
-    if row['elapsed_time'] > get_regression_threshold_cpu(row['cpu_percent']):
-        causes.append("Surcharge CPU")
-    return ", ".join(causes) if causes else "Incident probable"
+# Lecture en flux : seules les tables "SQL ordered by Executions" et
+# "Complete List of SQL Text" sont parsées, sans construire d'arbre complet
+def extract_data_from_awr(html_content, filename="uploaded_file", on_error=None):
+    from awrtools.analysis import extract_dataframe
+    if isinstance(html_content, str):
+        html_content = StringIO(html_content)
+    return extract_dataframe(
+        html_content,
+        filename,
+        on_error=on_error or (lambda e: st.warning(f"⚠️ Erreur ligne : {e}"))
+    )
+
+# === Analyse de performance : cause probable de chaque incident
+# Seuils de régression (lignes traitées, CPU) : dernière version ajustée (awrtools.thresholds)
+def identifier_cause_ai(df):
+    from awrtools.analysis import identify_causes
+    return identify_causes(df)
+
+# === Résultats mémorisés par empreinte du fichier téléversé
+# Cache LRU borné en mémoire, partagé par toutes les sessions du serveur
+@st.cache_resource
+def get_results_cache():
+    return LRUCache(max_bytes=256 * 2**20)
+
+def analyser_rapport(data, filename):
+    """Extraction + prédictions + causes pour un rapport (résultat mis en cache)."""
+    from awrtools.analysis import analyse_report
+    warnings = []
+    df = analyse_report(data, filename, get_app_model(), on_error=lambda e: warnings.append(f"⚠️ Erreur ligne : {e}"))
+    return {'df': df, 'warnings': warnings}
+
+# === Analyse concurrente de plusieurs rapports (fichiers multiples ou archives)
+# Threads : le parsing lxml et la prédiction XGBoost relâchent le GIL, et le
+# modèle chargé reste partagé
+ANALYSIS_WORKERS = min(4, os.cpu_count() or 1)
+
+@st.cache_resource
+def get_analysis_executor():
+    return ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='awr')
+
+def analyser_en_cache(rapport):
+    """Analyse d'un rapport ``(nom, octets)`` via le cache; retourne (clé, résultat)."""
+    nom, data = rapport
+    # Le modèle et la version des seuils font partie de la clé : un .pkl remplacé
+    # ou des seuils réajustés invalident les prédictions
+    from awrtools.thresholds import get_thresholds
+    cache_key = (content_key(data), nom, get_app_model().signature, get_thresholds().version)
+    return cache_key, get_results_cache().get_or_compute(cache_key, lambda: analyser_rapport(data, nom))
 
 # === Fonction pour générer le PDF avec le style moderne
-def generate_professional_pdf(df, awr_title, logo_path):
+def generate_professional_pdf(df, awr_title, logo_path, progress=None):
     """
-    Génère un PDF professionnel avec le style du rapport HTML
+    Génère un PDF professionnel avec le style du rapport HTML, page par page
+    progress : fonction optionnelle appelée avec l'avancement (0 à 1)
     """
-    pdf_buffer = BytesIO()
-    
-    # Utiliser le format paysage pour plus d'espace
-    doc = SimpleDocTemplate(pdf_buffer, pagesize=landscape(A4), 
-                          rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    
-    # Style pour le titre principal
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=HexColor('#2c3e50'),
-        alignment=TA_CENTER,
-        spaceAfter=30,
-        fontName='Helvetica-Bold'
-    )
-    
-    # Style pour les méta-informations
-    meta_style = ParagraphStyle(
-        'MetaInfo',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=HexColor('#555555'),
-        leftIndent=20,
-        rightIndent=20,
-        spaceAfter=10
-    )
-    
-    # Éléments du document
-    story = []
-    
-    # Logo (si existe)
-    if os.path.exists(logo_path):
-        try:
-            logo = Image(logo_path, width=80, height=30)
-            logo.hAlign = 'LEFT'
-            story.append(logo)
-            story.append(Spacer(1, 20))
-        except:
-            pass
-    
-    # Titre principal
-    title = Paragraph(f"Rapport d'Analyse des Requêtes Lentes", title_style)
-    story.append(title)
-    story.append(Spacer(1, 20))
-    
-    # Informations métadonnées
-    from datetime import datetime
-    current_date = datetime.now().strftime("%d %B %Y")
-    
-    meta_info = f"""
-    <b>Fichier AWR :</b> {awr_title}<br/>
-    <b>Date de génération :</b> {current_date}<br/>
-    <b>Nombre de requêtes analysées :</b> {len(df)}
-    """
-    
-    meta_paragraph = Paragraph(meta_info, meta_style)
-    story.append(meta_paragraph)
-    story.append(Spacer(1, 20))
-    
-    # Statistiques résumées
-    max_time = df['elapsed_time'].max()
-    avg_time = df['elapsed_time'].mean()
-    max_cpu = df['cpu_percent'].max()
-    incidents_count = len(df[df['cause_probable'] == 'Incident probable'])
-    
-    stats_data = [
-        ['Métrique', 'Valeur'],
-        ['Temps maximum', f'{max_time:.2f}s'],
-        ['Temps moyen', f'{avg_time:.2f}s'],
-        ['CPU maximum', f'{max_cpu:.1f}%'],
-        ['Incidents probables', str(incidents_count)]
-    ]
-    
-    stats_table = Table(stats_data, colWidths=[2*inch, 2*inch])
-    stats_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), HexColor('#34495e')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, HexColor('#f8f9fa')])
-    ]))
-    
-    story.append(stats_table)
-    story.append(Spacer(1, 30))
-    
-    # Tableau principal des requêtes
-    table_data = [['ID Requête', 'Requête', 'Temps', 'Lignes', 'CPU (%)', 'Cause probable']]
-    
-    for _, row in df.iterrows():
-        # Utiliser Paragraph pour le texte des requêtes pour permettre le wrap
-        query_text = str(row['query_text'])
-        query_paragraph = Paragraph(query_text, ParagraphStyle(
-            'QueryText',
-            parent=styles['Normal'],
-            fontSize=8,
-            wordWrap='CJK',
-            leftIndent=3,
-            rightIndent=3,
-            spaceAfter=3
-        ))
-        
-        # Format des causes avec retour à la ligne
-        cause = str(row['cause_probable'])
-        if ',' in cause:
-            cause = cause.replace(', ', '\n')
-        
-        table_data.append([
-            str(row['query_id']),
-            query_paragraph,
-            f"{row['elapsed_time']:.2f}",
-            f"{row['rows_processed']:,}",
-            f"{row['cpu_percent']:.1f}",
-            cause
-        ])
-    
-    # Définir les largeurs des colonnes - ajuster pour inclure la nouvelle colonne
-    col_widths = [1*inch, 3.8*inch, 0.8*inch, 0.9*inch, 0.7*inch, 1.3*inch]
-    
-    main_table = Table(table_data, colWidths=col_widths, repeatRows=1)
-    
-    # Style du tableau principal
-    table_style = [
-        # En-tête
-        ('BACKGROUND', (0, 0), (-1, 0), HexColor('#34495e')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 0), (-1, 0), 12),
-        
-        # Corps du tableau
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-    ]
-    
-    # Alternance des couleurs et styles conditionnels
-    for i in range(1, len(table_data)):
-        # Alternance des couleurs
-        if i % 2 == 0:
-            table_style.append(('BACKGROUND', (0, i), (-1, i), HexColor('#f8f9fa')))
-        else:
-            table_style.append(('BACKGROUND', (0, i), (-1, i), colors.white))
-        
-        # Coloration selon le temps d'exécution
-        elapsed_time = float(table_data[i][2])
-        if elapsed_time > 400:
-            table_style.append(('TEXTCOLOR', (2, i), (2, i), HexColor('#e74c3c')))
-            table_style.append(('FONTNAME', (2, i), (2, i), 'Helvetica-Bold'))
-        elif elapsed_time > 100:
-            table_style.append(('TEXTCOLOR', (2, i), (2, i), HexColor('#f39c12')))
-            table_style.append(('FONTNAME', (2, i), (2, i), 'Helvetica-Bold'))
-        
-        # Coloration selon le CPU
-        cpu_percent = float(table_data[i][4])
-        if cpu_percent > 25:
-            table_style.append(('BACKGROUND', (4, i), (4, i), HexColor('#ffe6e6')))
-            table_style.append(('TEXTCOLOR', (4, i), (4, i), HexColor('#c0392b')))
-            table_style.append(('FONTNAME', (4, i), (4, i), 'Helvetica-Bold'))
-        
-        # Style des causes
-        cause = table_data[i][5]
-        if 'Incident probable' in cause:
-            table_style.append(('BACKGROUND', (5, i), (5, i), HexColor('#fff3cd')))
-            table_style.append(('TEXTCOLOR', (5, i), (5, i), HexColor('#856404')))
-        elif 'Lignes traitées' in cause or 'Surcharge CPU' in cause:
-            table_style.append(('BACKGROUND', (5, i), (5, i), HexColor('#f8d7da')))
-            table_style.append(('TEXTCOLOR', (5, i), (5, i), HexColor('#721c24')))
-    
-    main_table.setStyle(TableStyle(table_style))
-    story.append(main_table)
-    story.append(Spacer(1, 30))
-    
-    # Recommandations
-    recommendations_style = ParagraphStyle(
-        'Recommendations',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=HexColor('#721c24'),
-        leftIndent=20,
-        rightIndent=20,
-        spaceAfter=10
-    )
-    
-    recommendations_title = Paragraph("<b>Recommandations</b>", 
-                                    ParagraphStyle('RecommendationsTitle', 
-                                                 parent=recommendations_style,
-                                                 fontSize=12,
-                                                 textColor=HexColor('#c0392b')))
-    
-    story.append(recommendations_title)
-    
-    # Trouver la requête la plus lente
-    slowest_query = df.loc[df['elapsed_time'].idxmax()]
-    
-    # Liste complète des recommandations
-    import random
-    
-    all_recommendations = [
-        f"Analyser en priorité la requête <b>{slowest_query['query_id']}</b> avec un temps d'exécution de {slowest_query['elapsed_time']:.2f}s",
-        "Optimiser les procédures stockées identifiées dans l'analyse",
-        "Vérifier l'indexation des tables impliquées dans les requêtes problématiques",
-        "Surveiller la charge CPU lors de l'exécution des requêtes critiques",
-        "Créer des index composites sur les colonnes fréquemment utilisées dans les clauses WHERE, JOIN et ORDER BY",
-        "Examiner les plans d'exécution pour identifier les opérations coûteuses et les goulots d'étranglement",
-        "Privilégier les jointures INNER aux jointures OUTER et s'assurer que les conditions utilisent des colonnes indexées",
-        "Utiliser LIMIT/TOP pour restreindre le nombre de lignes retournées et éviter les transferts inutiles",
-        "Transformer les sous-requêtes corrélées en jointures ou utiliser des CTE pour améliorer les performances",
-        "Maintenir des statistiques à jour sur les tables pour optimiser les plans d'exécution",
-        "Éviter l'utilisation de fonctions sur les colonnes dans les clauses WHERE",
-        "Implémenter le partitionnement horizontal pour les tables volumineuses",
-        "Traiter les opérations en lot plutôt qu'en boucles pour réduire les allers-retours réseau",
-        "Identifier et résoudre les conflits de verrous qui peuvent causer des blocages"
-    ]
-    
-    # Sélectionner 4 recommandations aléatoires
-    selected_recommendations = random.sample(all_recommendations, 4)
-    
-    recommendations_text = ""
-    for i, rec in enumerate(selected_recommendations, 1):
-        recommendations_text += f"• {rec}<br/>"
-    
-    recommendations_paragraph = Paragraph(recommendations_text, recommendations_style)
-    story.append(recommendations_paragraph)
-    
-    # Construire le PDF
-    doc.build(story)
+    from awrtools.report import build_incident_pdf
+    pdf_buffer = build_incident_pdf(df, awr_title, logo_path, BytesIO(), progress=progress)
     pdf_buffer.seek(0)
     return pdf_buffer
 
-st.markdown("<h6 style='color:#000000;'>📤 Upload un fichier AWR (.html)</h6>", unsafe_allow_html=True)
-uploaded_file = st.file_uploader("", type="html")  # label vide
+# === Génération du PDF à la demande, hors du fil d'affichage
+# Un seul job par rapport : les sessions (et reruns) qui demandent le même PDF
+# attendent le même futur au lieu de relancer la génération
+@st.cache_resource
+def get_pdf_jobs():
+    return {
+        'executor': ThreadPoolExecutor(max_workers=2, thread_name_prefix='pdf'),
+        'jobs': {},
+        'lock': threading.Lock(),
+    }
+
+def demander_pdf(key, pdf_df, awr_title, logo_path):
+    """Lance (ou retrouve) la génération du PDF; retourne (futur, avancement)."""
+    pdf_jobs = get_pdf_jobs()
+    with pdf_jobs['lock']:
+        job = pdf_jobs['jobs'].get(key)
+        if job is None:
+            avancement = {'value': 0.0}
+            def set_avancement(value):
+                avancement['value'] = value
+            future = pdf_jobs['executor'].submit(
+                lambda: generate_professional_pdf(pdf_df, awr_title, logo_path, progress=set_avancement).getvalue()
+            )
+            job = pdf_jobs['jobs'][key] = (future, avancement)
+    return job
+
+def attendre_pdf(key, future, avancement, results_cache):
+    """Affiche la progression jusqu'à la fin du job, puis met le PDF en cache."""
+    barre = st.progress(0.0, text="⏳ Génération du rapport PDF...")
+    while not future.done():
+        barre.progress(min(avancement['value'], 1.0), text="⏳ Génération du rapport PDF...")
+        time.sleep(0.1)
+    barre.empty()
+    pdf_jobs = get_pdf_jobs()
+    with pdf_jobs['lock']:
+        pdf_jobs['jobs'].pop(key, None)
+    # Une erreur de génération remonte ici; le job est retiré pour pouvoir réessayer
+    return results_cache.put(key, future.result())
+
+# === Tableau paginé : seule la page visible est envoyée au navigateur
+def afficher_table(df, key):
+    from awrtools.charts import PAGE_SIZE, page_count, page_slice
+    pages = page_count(len(df), PAGE_SIZE)
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (sur {pages})", min_value=1, max_value=pages, value=1, step=1,
+                               key=f"page_{key}")
+    st.dataframe(page_slice(df, page, PAGE_SIZE))
+    if pages > 1:
+        debut = (page - 1) * PAGE_SIZE
+        st.caption(f"Lignes {debut + 1} à {min(debut + PAGE_SIZE, len(df))} sur {len(df)}")
 
-if uploaded_file is not None:
+# === Affichage d'un rapport analysé
+def afficher_rapport(nom, df, cache_key, results_cache):
+    import plotly.express as px
+    from awrtools.charts import TOP_N, top_n_with_other
+    widget_id = f"{cache_key[0]}_{nom}"
+    if df.empty:
+        st.error("❌ Aucune donnée extraite.")
+        return
+
+    st.markdown(f"<p style='color:black; font-size:18px;'>✅ {len(df)} requêtes extraites. Détection en cours...</p>", unsafe_allow_html=True)
+
+    incidents = df[df['incident'] == 1]
+    st.markdown(f"<p style='color:black; font-size:18px;'>🚨 {len(incidents)} incident(s) détecté(s).</p>", unsafe_allow_html=True)
+
+    if incidents.empty:
+        return
+
+    st.markdown("<h3 style='color:black;'>📊 Requêtes lentes détectées</h3>", unsafe_allow_html=True)
+    # Les plus lentes d'abord : la première page montre les incidents les plus graves
+    incidents = incidents.sort_values('elapsed_time', ascending=False)
+    afficher_table(incidents[['query_id', 'query_text', 'elapsed_time', 'rows_processed', 'cpu_percent', 'incident', 'cause_probable']],
+                   key=widget_id)
+
+    # Graphique borné : les TOP_N requêtes les plus lentes + une barre « Autres »
+    fig = px.bar(
+        top_n_with_other(incidents[['query_id', 'elapsed_time', 'rows_processed', 'cpu_percent', 'cause_probable']],
+                         'query_id', 'elapsed_time', TOP_N),
+        x='query_id',
+        y='elapsed_time',
+        hover_data=['rows_processed', 'cpu_percent', 'cause_probable', 'requetes'],
+        title=f"Temps d'exécution par requête (incidents, {TOP_N} plus lentes)",
+        labels={'elapsed_time': 'Temps (s)', 'query_id': 'SQL ID'},
+        color='rows_processed',
+        color_continuous_scale='reds'
+    )
+    fig.update_layout(xaxis_tickangle=-45)
+    st.plotly_chart(fig, use_container_width=True, key=f"chart_{widget_id}")
+
+    # === Rapport PDF : généré seulement si l'utilisateur le demande ===
+    logo_path = "7-assests/Logo_hps_0 (1).png"
+    pdf_key = cache_key + ('pdf',)
+    pdf_bytes = results_cache.get(pdf_key)
+
+    if pdf_bytes is None:
+        # Un job déjà lancé (autre session, rerun pendant la génération) est repris
+        en_cours = pdf_key in get_pdf_jobs()['jobs']
+        if en_cours or st.button("🛠️ Préparer le rapport PDF", key=f"pdf_{widget_id}"):
+            pdf_df = incidents[["query_id", "query_text", "elapsed_time", "rows_processed", "cpu_percent", "cause_probable"]].copy()
+            future, avancement = demander_pdf(pdf_key, pdf_df, nom, logo_path)
+            pdf_bytes = attendre_pdf(pdf_key, future, avancement, results_cache)
+
+    # === Bouton de téléchargement ===
+    if pdf_bytes is not None:
+        st.download_button(
+            label="📄 Télécharger le rapport PDF (requêtes lentes)",
+            data=pdf_bytes,
+            file_name=f"rapport_requetes_lentes_{os.path.splitext(nom)[0]}.pdf",
+            mime="application/pdf",
+            key=f"download_{widget_id}"
+        )
+
+# === Vue combinée : incidents de tous les rapports, dans l'ordre des snapshots
+def afficher_vue_combinee(rapports):
+    import pandas as pd
+    import plotly.express as px
+    from awrtools.charts import MAX_POINTS, lttb
+    frames = [df for _, _, df in rapports if not df.empty]
+    if not frames:
+        return
+    combined = pd.concat(frames, ignore_index=True)
+    combined['begin_snap'] = [
+        (parse_awr_name(f) or (None, None, None))[1] for f in combined['awr_file']
+    ]
+    combined = combined.sort_values(['begin_snap', 'awr_file'], na_position='last')
+
+    st.markdown("<h3 style='color:black;'>📈 Vue combinée des snapshots</h3>", unsafe_allow_html=True)
+    par_rapport = combined.groupby('awr_file', sort=False).agg(
+        begin_snap=('begin_snap', 'first'),
+        requetes=('query_id', 'size'),
+        incidents=('incident', 'sum'),
+        temps_max=('elapsed_time', 'max'),
+    ).reset_index()
+    afficher_table(par_rapport, key="combined")
+
+    serie = par_rapport.dropna(subset=['begin_snap'])
+    if len(serie) > MAX_POINTS:
+        # Beaucoup de snapshots : série réduite à MAX_POINTS points (LTTB), forme conservée
+        serie = serie.iloc[lttb(serie['begin_snap'], serie['incidents'], MAX_POINTS)]
+        fig = px.line(
+            serie,
+            x='begin_snap',
+            y='incidents',
+            hover_data=['awr_file', 'requetes', 'temps_max'],
+            title=f"Incidents par snapshot ({len(serie)} points sur {len(par_rapport)})",
+            labels={'begin_snap': 'Snapshot', 'incidents': 'Incidents'},
+            markers=True,
+        )
+    else:
+        fig = px.bar(
+            par_rapport,
+            x='awr_file',
+            y='incidents',
+            hover_data=['begin_snap', 'requetes', 'temps_max'],
+            title="Incidents par rapport AWR",
+            labels={'awr_file': 'Rapport AWR', 'incidents': 'Incidents'},
+        )
+        fig.update_layout(xaxis_tickangle=-45)
+    st.plotly_chart(fig, use_container_width=True, key="chart_combined")
+
+    # Requêtes en incident dans plusieurs snapshots : les plus suspectes
+    incidents = combined[combined['incident'] == 1]
+    if not incidents.empty:
+        recurrentes = incidents.groupby('query_id').agg(
+            snapshots=('awr_file', 'nunique'),
+            temps_max=('elapsed_time', 'max'),
+            temps_moyen=('elapsed_time', 'mean'),
+            cause_probable=('cause_probable', 'first'),
+        ).sort_values(['snapshots', 'temps_max'], ascending=False).reset_index()
+        st.markdown("<h3 style='color:black;'>🔁 Requêtes lentes récurrentes</h3>", unsafe_allow_html=True)
+        afficher_table(recurrentes, key="recurrentes")
+
+st.markdown("<h6 style='color:#000000;'>📤 Upload un ou plusieurs fichiers AWR (.html, .zip, .tar.gz)</h6>", unsafe_allow_html=True)
+uploaded_files = st.file_uploader("", type=UPLOAD_TYPES, accept_multiple_files=True)  # label vide
+
+if uploaded_files:
     try:
-        html_string = uploaded_file.read().decode("utf-8", errors='ignore')
-        df = extract_data_from_awr(html_string, filename=uploaded_file.name)
-
-        if df.empty:
-            st.error("❌ Aucune donnée extraite.")
-        else:
-            st.markdown(f"<p style='color:black; font-size:18px;'>✅ {len(df)} requêtes extraites. Détection en cours...</p>", unsafe_allow_html=True)
-
-            for col in model.feature_names_in_:
-                if col not in df.columns:
-                    df[col] = 0
-
-            X = df[model.feature_names_in_]
-            df['incident'] = model.predict(X)
-            df['cause_probable'] = df.apply(identifier_cause_ai, axis=1)
-
-            incidents = df[df['incident'] == 1]
-            st.markdown(f"<p style='color:black; font-size:18px;'>🚨 {len(incidents)} incident(s) détecté(s).</p>", unsafe_allow_html=True)
-
-            if not incidents.empty:
-                st.markdown("<h3 style='color:black;'>📊 Requêtes lentes détectées</h3>", unsafe_allow_html=True)
-                st.dataframe(incidents[['query_id', 'query_text', 'elapsed_time', 'rows_processed', 'cpu_percent', 'incident', 'cause_probable']])
-
-                fig = px.bar(
-                    incidents,
-                    x='query_id',
-                    y='elapsed_time',
-                    hover_data=['rows_processed', 'cpu_percent', 'cause_probable'],
-                    title="Temps d'exécution par requête (incidents)",
-                    labels={'elapsed_time': 'Temps (s)', 'query_id': 'SQL ID'},
-                    color='rows_processed',
-                    color_continuous_scale='reds'
-                )
-                fig.update_layout(xaxis_tickangle=-45)
-                st.plotly_chart(fig, use_container_width=True)
-
-                # === Génération du PDF avec le nouveau style ===
-                awr_title = uploaded_file.name if uploaded_file else "AWR inconnu"
-                logo_path = "7-assests/Logo_hps_0 (1).png"
-                
-                # Préparer les données pour le PDF
-                pdf_df = incidents[["query_id", "query_text", "elapsed_time", "rows_processed", "cpu_percent", "cause_probable"]].copy()
-                
-                # Générer le PDF professionnel
-                pdf_buffer = generate_professional_pdf(pdf_df, awr_title, logo_path)
-
-                # === Bouton de téléchargement ===
-                st.download_button(
-                    label="📄 Télécharger le rapport PDF (requêtes lentes)",
-                    data=pdf_buffer,
-                    file_name="rapport_requetes_lentes.pdf",
-                    mime="application/pdf"
-                )
-                
+        results_cache = get_results_cache()
+        # Un seul .html : affichage direct, comme avant; sinon un bloc par rapport
+        plusieurs = len(uploaded_files) > 1 or not is_report_name(uploaded_files[0].name)
+        rapports, vus = [], set()
+        # Les archives sont lues en flux : au plus 2 rapports par thread en mémoire
+        taches = iter_bounded(get_analysis_executor(), analyser_en_cache,
+                              iter_uploads(uploaded_files), max_pending=2 * ANALYSIS_WORKERS)
+        for (nom, _), future in taches:
+            try:
+                cache_key, result = future.result()
+            except Exception as e:
+                st.error(f"❌ {nom} : {e}")
+                continue
+            if cache_key[:2] in vus:
+                continue
+            vus.add(cache_key[:2])
+            df = result['df']
+            rapports.append((nom, cache_key, df))
+
+            # Chaque rapport s'affiche dès que son analyse est terminée
+            bloc = st.expander(f"📄 {nom}", expanded=False) if plusieurs else st.container()
+            with bloc:
+                for warning in result['warnings']:
+                    st.warning(warning)
+                # Une erreur d'affichage ou de PDF ne concerne que ce rapport : on passe au suivant
+                try:
+                    afficher_rapport(nom, df, cache_key, results_cache)
+                except Exception as e:
+                    st.error(f"❌ {nom} : {e}")
+
+        if not rapports:
+            st.error("❌ Aucun rapport AWR trouvé dans les fichiers envoyés.")
+        elif plusieurs:
+            afficher_vue_combinee(rapports)
+
     except Exception as e:
         st.error(f"❌ Erreur : {e}")
@@ -0,0 +1 @@
+"""Outils partagés d'analyse des rapports AWR (extraction, stockage, détection)."""
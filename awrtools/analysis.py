@@ -0,0 +1,40 @@
+"""Analyse d'un rapport AWR : extraction, prédiction et cause probable.
+
+Partagé par l'application Streamlit (app.py) et le démon de détection, pour
+que les deux appliquent exactement la même chaîne au même rapport.
+"""
+import pandas as pd
+
+from awrtools.labels import cause_probable
+from awrtools.stream import extract_awr_records
+from awrtools.thresholds import get_thresholds
+
+
+def extract_dataframe(source, filename, on_error=None):
+    """Métriques de "SQL ordered by Executions" + texte SQL, en DataFrame."""
+    return pd.DataFrame(extract_awr_records(source, filename, on_error=on_error, errors='ignore'))
+
+
+def identify_causes(df, thresholds=None):
+    """Cause probable de chaque incident, avec la dernière version des seuils ajustés.
+
+    Droites par groupe (``awr_file``, ``sql_module``...) si elles existent, la droite globale sinon.
+    """
+    thresholds = thresholds or get_thresholds()
+    return cause_probable(
+        df['incident'], df['elapsed_time'], df['rows_processed'], df['cpu_percent'],
+        rows_params=thresholds.params_for('rows', df), cpu_params=thresholds.params_for('cpu', df),
+        multiplier=thresholds.multiplier,
+    )
+
+
+def analyse_report(source, filename, model, on_error=None):
+    """DataFrame du rapport avec les colonnes ``incident`` et ``cause_probable``.
+
+    ``model`` est un ``LoadedModel`` (awrtools.models).
+    """
+    df = extract_dataframe(source, filename, on_error)
+    if not df.empty:
+        df['incident'] = model.predict(df)
+        df['cause_probable'] = identify_causes(df)
+    return df
@@ -0,0 +1,60 @@
+"""Lecture des rapports AWR téléversés : fichiers HTML seuls ou archives.
+
+Les archives zip et tar (compressées ou non) sont lues en flux, membre par
+membre, sans rien extraire sur disque; un rapport compressé seul
+(``.html.gz``, ``.html.bz2``, ``.html.xz``) est décompressé en mémoire.
+"""
+import bz2
+import gzip
+import lzma
+import os
+import tarfile
+import zipfile
+
+REPORT_SUFFIXES = ('.html', '.htm')
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+UPLOAD_TYPES = ['html', 'htm', 'zip', 'tar', 'gz', 'tgz', 'bz2', 'tbz2', 'xz', 'txz']
+# Rapport compressé seul : extension → ouverture en flux
+COMPRESSED_SUFFIXES = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+
+def is_report_name(name):
+    base = os.path.basename(name)
+    # Métadonnées ajoutées par macOS dans les zip
+    if not base or base.startswith('._') or '__MACOSX/' in name:
+        return False
+    return base.lower().endswith(REPORT_SUFFIXES)
+
+
+def iter_reports(name, fileobj):
+    """Génère ``(nom_du_rapport, contenu_en_octets)`` pour chaque rapport de ``fileobj``.
+
+    ``name`` (nom du fichier téléversé) détermine le format. Les membres qui ne
+    sont pas des rapports HTML sont ignorés.
+    """
+    lower = name.lower()
+    if lower.endswith('.zip'):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and is_report_name(info.filename):
+                    yield os.path.basename(info.filename), archive.read(info)
+    elif lower.endswith(TAR_SUFFIXES):
+        # Mode flux 'r|*' : lecture séquentielle, compression détectée automatiquement
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for member in archive:
+                if member.isfile() and is_report_name(member.name):
+                    yield os.path.basename(member.name), archive.extractfile(member).read()
+    elif os.path.splitext(lower)[1] in COMPRESSED_SUFFIXES:
+        report_name, suffix = os.path.splitext(name)
+        if is_report_name(report_name):
+            with COMPRESSED_SUFFIXES[suffix.lower()](fileobj) as f:
+                yield os.path.basename(report_name), f.read()
+    elif is_report_name(name):
+        yield os.path.basename(name), fileobj.read()
+
+
+def iter_uploads(uploaded_files):
+    """Enchaîne les rapports de plusieurs fichiers téléversés (objets avec ``name``)."""
+    for uploaded in uploaded_files:
+        uploaded.seek(0)
+        yield from iter_reports(uploaded.name, uploaded)
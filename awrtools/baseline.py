@@ -0,0 +1,357 @@
+"""Ligne de base par SQL Id et détection de dérive d'un snapshot à l'autre.
+
+Les seuils de awrtools.labels sont globaux; ici chaque ``query_id`` est
+comparé à son propre historique. Pour chaque SQL Id et chaque mesure (temps
+par ligne traitée, temps par exécution) on tient à jour :
+
+- moyenne et variance (algorithme de Welford) ;
+- un quantile (95 % par défaut) estimé par l'algorithme P² de Jain et
+  Chlamtac : 5 marqueurs, sans garder les valeurs.
+
+L'état de tous les SQL Id tient dans des tableaux NumPy de taille fixe (une
+case par SQL Id, environ 200 octets); un snapshot est intégré en une passe
+vectorisée, O(1) par SQL Id. La mémoire est bornée par ``max_ids`` : quand
+les cases manquent, les SQL Id les moins récemment vus sont évincés, et
+``evict_stale`` retire ceux absents des ``max_age`` derniers snapshots.
+"""
+import json
+
+import numpy as np
+
+from awrtools.labels import SEUIL_MULTIPLICATEUR
+
+BASELINE_VERSION = 1
+
+# Le temps par exécution n'est défini que si la source donne les exécutions
+# (série temporelle, rapports analysés directement; pas Data.json)
+METRICS = ('elapsed_per_row', 'elapsed_per_exec')
+
+QUANTILE = 0.95
+MIN_HISTORY = 10
+Z_THRESHOLD = 3.0
+# Rapport minimal à la moyenne du SQL Id (même multiplicateur que les seuils globaux)
+MIN_RATIO = SEUIL_MULTIPLICATEUR
+# Part des cases libérées d'un coup quand la capacité est atteinte
+EVICT_FRACTION = 1 / 16
+
+_MARKERS = np.arange(5)
+
+
+def metric_values(elapsed_time, rows_processed=None, executions=None):
+    """Tableau ``(n, len(METRICS))`` des mesures; NaN quand une mesure n'est pas calculable."""
+    elapsed = np.asarray(elapsed_time, dtype=np.float64)
+    values = np.full((elapsed.shape[0], len(METRICS)), np.nan)
+    if rows_processed is not None:
+        rows = np.asarray(rows_processed, dtype=np.float64)
+        values[:, 0] = elapsed / np.maximum(rows, 1)
+    if executions is not None:
+        execs = np.asarray(executions, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values[:, 1] = np.where(execs > 0, elapsed / execs, np.nan)
+    return values
+
+
+class P2State:
+    """Marqueurs P² de plusieurs séries à la fois (une ligne par série)."""
+
+    def __init__(self, p, size):
+        self.p = p
+        self.heights = np.zeros((size, 5))
+        self.positions = np.tile(np.arange(1.0, 6.0), (size, 1))
+        self.initial = np.array([1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5])
+        self.increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def value(self, rows, counts):
+        """Quantile courant des séries ``rows`` (``counts`` valeurs vues, au moins 1)."""
+        heights = self.heights[rows]
+        full = counts >= 5
+        result = heights[:, 2].copy()
+        if not full.all():
+            # Moins de 5 valeurs : quantile exact des valeurs gardées
+            partial = np.where(_MARKERS < counts[~full, None], heights[~full], np.inf)
+            partial.sort(axis=1)
+            k = np.rint(self.p * (counts[~full] - 1)).astype(np.int64)
+            result[~full] = partial[np.arange(len(k)), k]
+        return result
+
+    def add(self, rows, counts, x):
+        """Ajoute ``x`` aux séries ``rows`` qui avaient ``counts`` valeurs."""
+        start = counts < 5
+        if start.any():
+            r = rows[start]
+            self.heights[r, counts[start]] = x[start]
+            done = r[counts[start] == 4]
+            self.heights[done] = np.sort(self.heights[done], axis=1)
+        if start.all():
+            return
+
+        r, x, n_seen = rows[~start], x[~start], counts[~start] + 1
+        q = self.heights[r]
+        n = self.positions[r]
+        q[:, 0] = np.minimum(q[:, 0], x)
+        q[:, 4] = np.maximum(q[:, 4], x)
+        k = (x[:, None] >= q[:, 1:4]).sum(axis=1)
+        n += _MARKERS > k[:, None]
+        desired = self.initial + (n_seen - 5)[:, None] * self.increments
+
+        # Ajustement des marqueurs intermédiaires (interpolation parabolique, sinon linéaire)
+        for i in (1, 2, 3):
+            d = desired[:, i] - n[:, i]
+            move = ((d >= 1) & (n[:, i + 1] - n[:, i] > 1)) | ((d <= -1) & (n[:, i - 1] - n[:, i] < -1))
+            if not move.any():
+                continue
+            d = np.where(d > 0, 1.0, -1.0)
+            qm, qi, qp = q[:, i - 1], q[:, i], q[:, i + 1]
+            nm, ni, np_ = n[:, i - 1], n[:, i], n[:, i + 1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                parabolic = qi + d / (np_ - nm) * (
+                    (ni - nm + d) * (qp - qi) / (np_ - ni) + (np_ - ni - d) * (qi - qm) / (ni - nm)
+                )
+                linear = np.where(d > 0, qi + (qp - qi) / (np_ - ni), qi - (qm - qi) / (nm - ni))
+            candidate = np.where((qm < parabolic) & (parabolic < qp), parabolic, linear)
+            q[:, i] = np.where(move, candidate, qi)
+            n[:, i] = np.where(move, ni + d, ni)
+
+        self.heights[r] = q
+        self.positions[r] = n
+
+
+class BaselineEngine:
+    """Lignes de base de tous les SQL Id vus, dans des tableaux de ``max_ids`` cases.
+
+    ``observe_snapshot`` compare chaque valeur à l'historique de son SQL Id
+    puis l'y ajoute. Une dérive est signalée quand, avec au moins
+    ``min_history`` valeurs, la valeur dépasse le quantile, ``min_ratio`` fois
+    la moyenne et la moyenne de ``z_threshold`` écarts-types.
+    """
+
+    def __init__(self, max_ids=1_000_000, quantile=QUANTILE, min_history=MIN_HISTORY,
+                 z_threshold=Z_THRESHOLD, min_ratio=MIN_RATIO, initial_size=1024):
+        self.max_ids = max_ids
+        self.quantile = quantile
+        self.min_history = min_history
+        self.z_threshold = z_threshold
+        self.min_ratio = min_ratio
+        self.evicted = 0
+        self.snapshots = 0
+        self._slots = {}
+        self._ids = []
+        self._free = []
+        m = len(METRICS)
+        self.count = np.zeros((0, m), np.int64)
+        self.mean = np.zeros((0, m))
+        self.m2 = np.zeros((0, m))
+        self.last_seen = np.zeros(0, np.int64)
+        self.sketches = [P2State(quantile, 0) for _ in METRICS]
+        self._allocate(min(initial_size, max_ids))
+
+    def _allocate(self, size):
+        old = len(self._ids)
+
+        def grow(array, fill=0):
+            new = np.full((size,) + array.shape[1:], fill, dtype=array.dtype)
+            new[:old] = array
+            return new
+
+        self.count = grow(self.count)
+        self.mean = grow(self.mean)
+        self.m2 = grow(self.m2)
+        self.last_seen = grow(self.last_seen, -1)
+        for sketch in self.sketches:
+            sketch.heights = grow(sketch.heights)
+            positions = np.tile(np.arange(1.0, 6.0), (size, 1))
+            positions[:old] = sketch.positions
+            sketch.positions = positions
+        self._ids.extend([None] * (size - old))
+        self._free.extend(range(size - 1, old - 1, -1))
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, query_id):
+        return query_id in self._slots
+
+    def _release(self, slots):
+        for slot in slots:
+            del self._slots[self._ids[slot]]
+            self._ids[slot] = None
+        self.count[slots] = 0
+        self.mean[slots] = 0.0
+        self.m2[slots] = 0.0
+        self.last_seen[slots] = -1
+        for sketch in self.sketches:
+            sketch.positions[slots] = np.arange(1.0, 6.0)
+        self._free.extend(int(s) for s in slots)
+        self.evicted += len(slots)
+
+    def _slots_for(self, query_ids):
+        slots = self._slots
+        missing = [q for q in query_ids if q not in slots]
+        if len(missing) > len(self._free):
+            size = len(self._ids)
+            if size < self.max_ids:
+                self._allocate(min(self.max_ids, max(2 * size, size + len(missing))))
+            if len(missing) > len(self._free):
+                # Éviction LRU par paquet : les SQL Id de ce snapshot ne sont jamais évincés
+                needed = len(missing) - len(self._free)
+                batch = max(needed, int(len(self._ids) * EVICT_FRACTION))
+                seen = self.last_seen.copy()
+                seen[[self._slots[q] for q in query_ids if q in self._slots]] = -1
+                candidates = np.flatnonzero(seen >= 0)
+                batch = min(batch, len(candidates))
+                if batch < needed:
+                    raise ValueError(f"Snapshot de {len(query_ids)} SQL Id : max_ids={self.max_ids} insuffisant")
+                order = np.argpartition(seen[candidates], batch - 1)[:batch]
+                self._release(candidates[order])
+        for query_id in missing:
+            slot = self._free.pop()
+            self._slots[query_id] = slot
+            self._ids[slot] = query_id
+        return np.fromiter(map(self._slots.__getitem__, query_ids), np.int64, len(query_ids))
+
+    def observe_snapshot(self, query_ids, elapsed_time, rows_processed=None, executions=None, snapshot=None):
+        """Intègre un snapshot (un SQL Id par ligne); retourne la liste des dérives (dicts).
+
+        Un SQL Id présent plusieurs fois dans le snapshot n'est pris qu'une fois.
+        """
+        query_ids = list(query_ids)
+        values = metric_values(elapsed_time, rows_processed, executions)
+        if len(set(query_ids)) < len(query_ids):
+            first = {}
+            for i, query_id in enumerate(query_ids):
+                first.setdefault(query_id, i)
+            keep = np.fromiter(first.values(), np.int64, len(first))
+            query_ids = list(first)
+            values = values[keep]
+
+        self.snapshots += 1
+        slots = self._slots_for(query_ids)
+        self.last_seen[slots] = self.snapshots
+
+        drifts = []
+        for m, metric in enumerate(METRICS):
+            valid = ~np.isnan(values[:, m])
+            rows, x = slots[valid], values[valid, m]
+            counts = self.count[rows, m]
+            mean = self.mean[rows, m]
+            std = np.sqrt(self.m2[rows, m] / np.maximum(counts - 1, 1))
+
+            checked = np.flatnonzero((counts >= max(self.min_history, 1)) & (x > mean * self.min_ratio))
+            if len(checked):
+                quantile = self.sketches[m].value(rows[checked], counts[checked])
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    zscore = np.where(std[checked] > 0, (x[checked] - mean[checked]) / std[checked], np.inf)
+                hit = (x[checked] > quantile) & (zscore >= self.z_threshold)
+                for j, q, z in zip(checked[hit], quantile[hit], zscore[hit]):
+                    drifts.append({
+                        'query_id': self._ids[rows[j]], 'snapshot': snapshot, 'metric': metric,
+                        'value': float(x[j]), 'mean': float(mean[j]), 'std': float(std[j]),
+                        'quantile': float(q), 'zscore': float(z), 'history': int(counts[j]),
+                    })
+
+            # Welford, puis marqueurs P²
+            self.sketches[m].add(rows, counts, x)
+            counts = counts + 1
+            delta = x - mean
+            mean = mean + delta / counts
+            self.m2[rows, m] += delta * (x - mean)
+            self.mean[rows, m] = mean
+            self.count[rows, m] = counts
+        return drifts
+
+    def observe_records(self, records, snapshot=None):
+        """``observe_snapshot`` sur les enregistrements d'un rapport (format Data.json ou
+        ``stream.sql_statistics_records``)."""
+        records = [r for r in records if r.get('query_id', r.get('sql_id'))]
+        if not records:
+            return []
+        nan = float('nan')
+
+        def column(*names):
+            return [next((r[n] for n in names if r.get(n) is not None), nan) for r in records]
+
+        return self.observe_snapshot(
+            [r.get('query_id', r.get('sql_id')) for r in records],
+            column('elapsed_time', 'elapsed_time_s'), column('rows_processed'), column('executions'),
+            snapshot,
+        )
+
+    def stats(self, query_id, metric):
+        """``{'count', 'mean', 'std', 'quantile'}`` d'une mesure d'un SQL Id, ``None`` si inconnu."""
+        slot = self._slots.get(query_id)
+        m = METRICS.index(metric)
+        if slot is None or not self.count[slot, m]:
+            return None
+        count = self.count[slot, m]
+        return {
+            'count': int(count),
+            'mean': float(self.mean[slot, m]),
+            'std': float(np.sqrt(self.m2[slot, m] / (count - 1))) if count > 1 else 0.0,
+            'quantile': float(self.sketches[m].value(np.array([slot]), np.array([count]))[0]),
+        }
+
+    def evict_stale(self, max_age):
+        """Retire les SQL Id absents des ``max_age`` derniers snapshots; retourne leur nombre."""
+        stale = np.flatnonzero((self.last_seen >= 0) & (self.snapshots - self.last_seen >= max_age))
+        self._release(stale)
+        return len(stale)
+
+    def save(self, path):
+        """Enregistre les cases occupées (``.npz``), compactées."""
+        used = np.fromiter(self._slots.values(), np.int64, len(self._slots))
+        arrays = {
+            'count': self.count[used], 'mean': self.mean[used], 'm2': self.m2[used],
+            'last_seen': self.last_seen[used],
+        }
+        for m, sketch in enumerate(self.sketches):
+            arrays[f'heights_{m}'] = sketch.heights[used]
+            arrays[f'positions_{m}'] = sketch.positions[used]
+        meta = {
+            'version': BASELINE_VERSION, 'metrics': list(METRICS), 'ids': [self._ids[s] for s in used],
+            'max_ids': self.max_ids, 'quantile': self.quantile, 'min_history': self.min_history,
+            'z_threshold': self.z_threshold, 'min_ratio': self.min_ratio,
+            'evicted': self.evicted, 'snapshots': self.snapshots,
+        }
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, path, max_ids=None):
+        """Lignes de base enregistrées par ``save``.
+
+        Avec ``max_ids`` (par défaut celui de l'enregistrement), seuls les
+        ``max_ids`` SQL Id les plus récemment vus sont repris. Les mesures
+        absentes de l'enregistrement partent d'un historique vide, celles qui
+        ne font plus partie de ``METRICS`` sont ignorées.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['version'] != BASELINE_VERSION:
+                raise ValueError(f"{path} : ligne de base d'une autre version ({meta['version']})")
+            # Mesure courante → colonne enregistrée
+            columns = {m: meta['metrics'].index(metric)
+                       for m, metric in enumerate(METRICS) if metric in meta['metrics']}
+            max_ids = max_ids or meta['max_ids']
+            ids = meta['ids']
+            keep = np.arange(len(ids))
+            if len(ids) > max_ids:
+                # Éviction LRU : les SQL Id vus le plus récemment sont gardés
+                keep = np.sort(np.argsort(data['last_seen'], kind='stable')[len(ids) - max_ids:])
+            engine = cls(max_ids, meta['quantile'], meta['min_history'], meta['z_threshold'],
+                         meta['min_ratio'], initial_size=max(len(keep), 1))
+            n = len(keep)
+            for name in ('count', 'mean', 'm2'):
+                saved = data[name][keep]
+                for m, column in columns.items():
+                    getattr(engine, name)[:n, m] = saved[:, column]
+            engine.last_seen[:n] = data['last_seen'][keep]
+            for m, column in columns.items():
+                engine.sketches[m].heights[:n] = data[f'heights_{column}'][keep]
+                engine.sketches[m].positions[:n] = data[f'positions_{column}'][keep]
+        ids = [ids[i] for i in keep]
+        engine._slots = {query_id: slot for slot, query_id in enumerate(ids)}
+        engine._ids[:n] = ids
+        engine._free = list(range(len(engine._ids) - 1, n - 1, -1))
+        engine.evicted = meta['evicted'] + len(meta['ids']) - n
+        engine.snapshots = meta['snapshots']
+        return engine
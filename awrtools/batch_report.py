@@ -0,0 +1,345 @@
+"""Rapports PDF en lot pour tout un dossier (ou une archive extraite) de rapports AWR.
+
+- un PDF par rapport AWR (tableau des requêtes par pages de taille fixe +
+  deux graphiques), produits en parallèle par un pool de processus, avec le
+  backend ``Agg`` (aucun affichage) ;
+- un PDF de flotte qui résume tous les rapports (une ligne par snapshot) ;
+- le logo est décodé une seule fois puis transmis à chaque processus au
+  démarrage du pool ;
+- un manifeste (``reports.manifest.json``) garde, pour chaque PDF, la taille
+  et la date du rapport source : un PDF à jour n'est pas régénéré.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from awrtools.cache import DEFAULT_CACHE_PATH, get_cache
+from awrtools.labels import bad_performance
+from awrtools.stream import SQL_BY_EXECUTIONS, parse_awr_name
+from awrtools.thresholds import get_thresholds
+
+# À incrémenter quand la mise en page change : tous les PDF sont régénérés
+REPORT_VERSION = 1
+MANIFEST_NAME = 'reports.manifest.json'
+FLEET_NAME = 'rapport_flotte.pdf'
+
+ROWS_PER_PAGE = 40    # Lignes du tableau par page : hauteur de figure fixe
+LABELS_PER_PLOT = 20  # SQL Id étiquetés par graphique (les plus lents)
+
+COLUMNS = {
+    'query_id': "SQL Id",
+    'rows_processed': "Rows Processed",
+    'elapsed_time': "Elapsed Time (s)",
+    'cpu_percent': "%CPU",
+}
+
+_logo = None
+
+
+def load_logo(path):
+    """Logo décodé (tableau RGBA), ou None s'il est absent."""
+    if not path or not os.path.exists(path):
+        return None
+    import matplotlib.image as mpimg
+    return mpimg.imread(path)
+
+
+def _init_worker(logo):
+    # Au démarrage de chaque processus : backend sans affichage, logo déjà décodé
+    global _logo
+    import matplotlib
+    matplotlib.use('Agg')
+    _logo = logo
+
+
+def add_logo(fig, logo):
+    if logo is None:
+        return
+    # Logo en haut à gauche de la page (sans axes visibles)
+    ax_logo = fig.add_axes([0, 0.9, 0.15, 0.1])  # [left, bottom, width, height] en fraction figure
+    ax_logo.imshow(logo)
+    ax_logo.axis('off')
+
+
+def table_pages(pdf, df, logo, title=None, rows_per_page=ROWS_PER_PAGE):
+    """Écrit ``df`` dans ``pdf`` (PdfPages) par pages de ``rows_per_page`` lignes."""
+    import matplotlib.pyplot as plt
+
+    pages = max(1, (len(df) + rows_per_page - 1) // rows_per_page)
+    for page, start in enumerate(range(0, max(len(df), 1), rows_per_page), 1):
+        page_df = df.iloc[start:start + rows_per_page]
+        # Logo en haut, tableau de rows_per_page lignes en dessous
+        fig = plt.figure(figsize=(12, rows_per_page * 0.25 + 2))
+        add_logo(fig, logo)
+
+        ax_table = fig.add_axes([0, 0, 1, 0.85])
+        ax_table.axis('off')
+        ax_table.set_title(f"Page {page}/{pages}", loc='right', fontsize=9)
+        if title:
+            ax_table.set_title(title, loc='left', fontsize=11)
+
+        if not page_df.empty:
+            table = ax_table.table(cellText=page_df.values, colLabels=page_df.columns, cellLoc='center',
+                                   loc='upper center')
+            table.auto_set_font_size(False)
+            table.set_fontsize(10)
+            table.auto_set_column_width(col=list(range(len(page_df.columns))))
+
+        pdf.savefig(fig, bbox_inches='tight')
+        plt.close(fig)
+
+
+def scatter_page(pdf, df, x, y, title, color, logo, label="SQL Id", rank="Elapsed Time (s)",
+                 labels_per_plot=LABELS_PER_PLOT):
+    """Une page : nuage ``y`` vs ``x``, seules les ``labels_per_plot`` lignes de plus grand ``rank`` étiquetées."""
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.scatter(df[x], df[y], color=color)
+    top = df.nlargest(labels_per_plot, rank)
+    for px, py, text in zip(top[x], top[y], top[label]):
+        ax.text(px, py, text, fontsize=8, alpha=0.7)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.set_title(title)
+    ax.grid(True)
+
+    if logo is not None:
+        # On crée un inset_axes (petite zone pour l'image)
+        axins = inset_axes(ax, width="15%", height="15%", loc='upper left', borderpad=1)
+        axins.imshow(logo)
+        axins.axis('off')
+
+    pdf.savefig(fig)
+    plt.close(fig)
+
+
+def _number(text, kind=float):
+    text = text.replace('%', '').replace(',', '').strip()
+    return kind(text) if text else kind(0)
+
+
+def report_records(path, cache_path=DEFAULT_CACHE_PATH):
+    """Métriques de "SQL ordered by Executions" (mêmes règles que pdf.py), sections lues via le cache."""
+    sections = get_cache(cache_path).read_sections(path, [SQL_BY_EXECUTIONS])
+    records = []
+    for rows in sections.get(SQL_BY_EXECUTIONS, []):
+        if not rows:
+            continue
+        headers = [th.strip() for th in rows[0][0]]
+        header_map = {header: idx for idx, header in enumerate(headers)}
+        sql_id_idx = header_map.get("SQL Id")
+        if sql_id_idx is None:
+            break
+        rows_proc_idx = header_map.get("Rows Processed")
+        # "Elapsed Time (s)" ou "Elapsed  Time (s)" selon la version d'Oracle
+        elapsed_idx = next((header_map[h] for h in headers if "Elapsed" in h and "Time" in h), None)
+        cpu_idx = header_map.get("%CPU")
+
+        for _, row in rows[1:]:
+            cells = [td.strip() for td in row]
+            if len(cells) < len(headers):
+                continue
+            try:
+                records.append({
+                    'query_id': cells[sql_id_idx],
+                    'rows_processed': _number(cells[rows_proc_idx], int) if rows_proc_idx is not None else 0,
+                    'elapsed_time': _number(cells[elapsed_idx]) if elapsed_idx is not None else 0.0,
+                    'cpu_percent': _number(cells[cpu_idx]) if cpu_idx is not None else 0.0,
+                })
+            except ValueError:
+                continue
+        break
+    return records
+
+
+def report_summary(filename, records, thresholds):
+    """Ligne du rapport de flotte : volumes, temps et requêtes au-dessus des seuils."""
+    elapsed = np.array([r['elapsed_time'] for r in records], dtype=np.float64)
+    rows = np.array([r['rows_processed'] for r in records], dtype=np.float64)
+    cpu = np.array([r['cpu_percent'] for r in records], dtype=np.float64)
+    parsed = parse_awr_name(filename) or (None, None, None)
+    empty = len(records) == 0
+    # Colonne de groupe des droites de seuil (awr_file, sql_module...), si les enregistrements l'ont
+    columns = {'awr_file': [filename] * len(records)}
+    if thresholds.group_by and not empty and thresholds.group_by in records[0]:
+        columns[thresholds.group_by] = [r[thresholds.group_by] for r in records]
+    return {
+        'awr_file': filename,
+        'begin_snap': parsed[1],
+        'requetes': len(records),
+        'temps_total': 0.0 if empty else round(float(elapsed.sum()), 2),
+        'temps_max': 0.0 if empty else round(float(elapsed.max()), 2),
+        'cpu_moyen': 0.0 if empty else round(float(cpu.mean()), 1),
+        'lentes': 0 if empty else int(bad_performance(
+            elapsed, rows, cpu, rows_params=thresholds.params_for('rows', columns),
+            cpu_params=thresholds.params_for('cpu', columns), multiplier=thresholds.multiplier).sum()),
+    }
+
+
+def build_report_pdf(path, output, cache_path=DEFAULT_CACHE_PATH, logo=None):
+    """PDF d'un rapport AWR (tableau + graphiques); retourne sa ligne de résumé."""
+    import pandas as pd
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    logo = _logo if logo is None else logo
+    filename = os.path.basename(path)
+    records = report_records(path, cache_path)
+    df = pd.DataFrame(records, columns=list(COLUMNS)).rename(columns=COLUMNS)
+    df = df.sort_values(by="Elapsed Time (s)", ascending=False).reset_index(drop=True)
+
+    tmp = output + '.tmp'
+    # Chaque page est écrite dans le PDF puis libérée : mémoire et coût par page constants
+    with PdfPages(tmp) as pdf:
+        table_pages(pdf, df, logo, title=filename)
+        if not df.empty:
+            scatter_page(pdf, df, "Elapsed Time (s)", "Rows Processed",
+                         f"Rows Processed vs Elapsed Time\nFichier : {filename}", 'blue', logo)
+            scatter_page(pdf, df, "%CPU", "Rows Processed",
+                         f"Rows Processed vs %CPU\nFichier : {filename}", 'green', logo)
+    os.replace(tmp, output)
+    return report_summary(filename, records, get_thresholds())
+
+
+def build_fleet_pdf(summaries, output, logo=None):
+    """PDF de flotte : tableau des rapports dans l'ordre des snapshots + temps total par snapshot."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    df = pd.DataFrame(summaries).sort_values(['begin_snap', 'awr_file'], na_position='last')
+    tmp = output + '.tmp'
+    with PdfPages(tmp) as pdf:
+        table_pages(pdf, df, logo, title=f"Flotte : {len(df)} rapports AWR")
+        serie = df.dropna(subset=['begin_snap'])
+        if not serie.empty:
+            fig, ax = plt.subplots(figsize=(12, 6))
+            ax.plot(serie['begin_snap'], serie['temps_total'], color='blue', label="Temps total (s)")
+            ax.set_xlabel("Snapshot")
+            ax.set_ylabel("Temps total (s)")
+            ax2 = ax.twinx()
+            ax2.bar(serie['begin_snap'], serie['lentes'], color='red', alpha=0.3, label="Requêtes lentes")
+            ax2.set_ylabel("Requêtes lentes")
+            ax.set_title("Temps total et requêtes lentes par snapshot")
+            ax.grid(True)
+            pdf.savefig(fig)
+            plt.close(fig)
+    os.replace(tmp, output)
+    return output
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class ReportManifest:
+    """PDF déjà produits : signature du rapport source, version et résumé."""
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = dict(entries or {})
+
+    @classmethod
+    def load(cls, output_dir):
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, encoding='utf-8') as f:
+            return cls(path, json.load(f).get('reports'))
+
+    def key(self, source, output):
+        return {'source': source_signature(source), 'version': REPORT_VERSION,
+                'thresholds': get_thresholds().version, 'output': os.path.basename(output)}
+
+    def is_current(self, source, output):
+        entry = self.entries.get(os.path.basename(source))
+        if entry is None or not os.path.exists(output):
+            return False
+        expected = self.key(source, output)
+        return all(entry.get(k) == v for k, v in expected.items())
+
+    def record(self, source, output, summary):
+        self.entries[os.path.basename(source)] = {**self.key(source, output), 'summary': summary}
+
+    def summaries(self, names):
+        return [self.entries[n]['summary'] for n in names if n in self.entries]
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'reports': self.entries}, f, indent=4)
+        os.replace(tmp, self.path)
+
+
+def report_output(output_dir, path):
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + '.pdf')
+
+
+def _build_one(path, output, cache_path):
+    try:
+        return build_report_pdf(path, output, cache_path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def run_batch(paths, output_dir, workers=None, logo_path=None, cache_path=DEFAULT_CACHE_PATH, force=False,
+              fleet=True):
+    """Génère ``(fichier, statut, erreur)`` pour chaque rapport, puis le PDF de flotte.
+
+    ``statut`` : ``'généré'``, ``'à jour'`` (PDF existant conservé) ou
+    ``'erreur'``. Le PDF de flotte n'est refait que si un rapport a changé
+    ou s'il n'existe pas encore.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = ReportManifest.load(output_dir)
+    logo = load_logo(logo_path)
+    workers = workers or os.cpu_count() or 1
+
+    todo = []
+    for path in paths:
+        output = report_output(output_dir, path)
+        if not force and manifest.is_current(path, output):
+            yield os.path.basename(path), 'à jour', None
+        else:
+            todo.append((path, output))
+
+    if todo:
+        if workers == 1:
+            _init_worker(logo)
+            results = ((path, output, _build_one(path, output, cache_path)) for path, output in todo)
+            for path, output, (summary, error) in results:
+                yield from _record(manifest, path, output, summary, error)
+        else:
+            # Le logo décodé est transmis une fois par processus, pas une fois par rapport
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(logo,)) as pool:
+                futures = {pool.submit(_build_one, path, output, cache_path): (path, output) for path, output in todo}
+                for future in as_completed(futures):
+                    path, output = futures[future]
+                    try:
+                        summary, error = future.result()
+                    except Exception as e:
+                        # Processus de travail tué (mémoire, signal...) : on isole le rapport
+                        summary, error = None, f"{type(e).__name__}: {e}"
+                    yield from _record(manifest, path, output, summary, error)
+        manifest.save()
+
+    fleet_output = os.path.join(output_dir, FLEET_NAME)
+    if fleet and (todo or force or not os.path.exists(fleet_output)):
+        summaries = manifest.summaries(os.path.basename(p) for p in paths)
+        if summaries:
+            build_fleet_pdf(summaries, fleet_output, logo)
+            yield FLEET_NAME, 'généré', None
+
+
+def _record(manifest, path, output, summary, error):
+    if error:
+        yield os.path.basename(path), 'erreur', error
+        return
+    manifest.record(path, output, summary)
+    yield os.path.basename(path), 'généré', None
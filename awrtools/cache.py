@@ -0,0 +1,195 @@
+"""Cache persistant des extractions AWR, indexé par empreinte du contenu.
+
+Chaque rapport est identifié par le hachage BLAKE2 de son contenu; les
+sections parsées (et les résultats dérivés comme les sessions) sont stockés
+par ``(empreinte, nom, version)`` dans une base SQLite partagée par
+Dataext.py, Sessions.py et pdf.py. Un rapport inchangé n'est jamais reparsé,
+même renommé ou déplacé. Le couple (taille, mtime) évite de relire les
+fichiers déjà hachés.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+
+from awrtools import header, section_index, stream
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'AWR_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.awr_cache.db')
+)
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        size INTEGER,
+        mtime_ns INTEGER,
+        digest TEXT
+    );
+    CREATE TABLE IF NOT EXISTS entries (
+        digest TEXT,
+        name TEXT,
+        version INTEGER,
+        payload BLOB,
+        PRIMARY KEY (digest, name, version)
+    );
+'''
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """Accès au cache; une connexion SQLite par processus."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self):
+        # Les connexions SQLite ne se partagent pas entre processus (fork)
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def digest(self, path):
+        real_path = os.path.realpath(path)
+        st = os.stat(real_path)
+        row = self.conn.execute(
+            'SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (real_path, st.st_size, st.st_mtime_ns)
+        ).fetchone()
+        if row:
+            return row[0]
+
+        digest = file_digest(real_path)
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)',
+                (real_path, st.st_size, st.st_mtime_ns, digest)
+            )
+        return digest
+
+    def get(self, digest, name, version):
+        row = self.conn.execute(
+            'SELECT payload FROM entries WHERE digest = ? AND name = ? AND version = ?',
+            (digest, name, version)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, digest, name, version, value):
+        payload = zlib.compress(json.dumps(value).encode('utf-8'))
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries (digest, name, version, payload) VALUES (?, ?, ?, ?)',
+                (digest, name, version, payload)
+            )
+
+    def read_sections(self, path, titles):
+        """Comme ``stream.read_sections`` : seules les sections absentes du cache sont parsées.
+
+        Si un index de sections à jour existe à côté du rapport, seules les
+        plages d'octets de ces sections sont lues.
+        """
+        digest = self.digest(path)
+        sections, missing = {}, []
+        for title in titles:
+            tables = self.get(digest, 'section:' + title, stream.PARSER_VERSION)
+            if tables is None:
+                missing.append(title)
+            elif tables:
+                sections[title] = tables
+
+        if missing:
+            self.misses += 1
+            parsed = section_index.read_sections(path, missing)
+            for title in missing:
+                # Une section absente du rapport est mémorisée comme liste vide
+                tables = parsed.get(title, [])
+                self.put(digest, 'section:' + title, stream.PARSER_VERSION, tables)
+                if tables:
+                    sections[title] = tables
+        else:
+            self.hits += 1
+        return sections
+
+    def read_matching_sections(self, path, name, predicate, until=None):
+        """Comme ``stream.read_sections(path, predicate, until=until)``, mis en cache sous ``name``.
+
+        Les titres retenus dépendent du rapport : toutes les sections qui
+        satisfont ``predicate`` sont stockées ensemble.
+        """
+        return self.cached(path, 'sections:' + name, stream.PARSER_VERSION,
+                           lambda p: section_index.read_sections(p, predicate, until=until))
+
+    def cached(self, path, name, version, compute):
+        """Résultat de ``compute(path)`` mis en cache sous ``name``/``version``."""
+        digest = self.digest(path)
+        entry = self.get(digest, name, version)
+        if entry is not None:
+            self.hits += 1
+            return entry['value']
+        self.misses += 1
+        value = compute(path)
+        self.put(digest, name, version, {'value': value})
+        return value
+
+
+_default_cache = None
+
+
+def get_cache(path=DEFAULT_CACHE_PATH):
+    global _default_cache
+    if _default_cache is None or _default_cache.path != path:
+        _default_cache = ExtractionCache(path)
+    return _default_cache
+
+
+def extract_report_cached(path, filename, cache_path=DEFAULT_CACHE_PATH):
+    """``stream.extract_report`` à travers le cache (utilisable dans un pool de processus)."""
+    sections = get_cache(cache_path).read_sections(path, stream.REPORT_SECTIONS)
+    return stream.records_from_sections(sections, filename)
+
+
+def extract_awr_records_cached(path, filename, cache_path=DEFAULT_CACHE_PATH):
+    """``stream.extract_awr_records`` à travers le cache (mêmes sections que ``extract_report_cached``)."""
+    sections = get_cache(cache_path).read_sections(path, stream.REPORT_SECTIONS)
+    return stream.awr_records_from_sections(sections, filename)
+
+
+def sql_statistics_records_cached(path, filename, cache_path=DEFAULT_CACHE_PATH):
+    """``stream.sql_statistics_records`` à travers le cache (mêmes sections "SQL ordered by ...")."""
+    sections = get_cache(cache_path).read_matching_sections(
+        path, 'sql_statistics', stream.is_sql_statistics_section, until=stream.COMPLETE_SQL_TEXT)
+    return list(stream.sql_statistics_from_sections(sections, filename).values())
+
+
+def read_header_cached(path, filename, cache_path=DEFAULT_CACHE_PATH):
+    """``header.read_header`` à travers le cache (utilisable dans un pool de processus)."""
+    return get_cache(cache_path).cached(path, 'header', header.HEADER_VERSION, header.read_header)
+
+
+def read_snapshot_cached(path, filename, cache_path=DEFAULT_CACHE_PATH):
+    """``timeseries.read_snapshot`` à travers le cache : en-tête et requêtes du rapport."""
+    return {
+        'header': read_header_cached(path, filename, cache_path),
+        'records': extract_awr_records_cached(path, filename, cache_path),
+    }
@@ -0,0 +1,84 @@
+"""Réduction des données envoyées au navigateur par l'application Streamlit.
+
+Les graphiques et tableaux ne reçoivent plus tous les incidents d'un
+rapport, mais un volume borné calculé côté serveur :
+
+- ``top_n_with_other`` : les N requêtes les plus lentes + une barre
+  « Autres » qui agrège le reste ;
+- ``lttb`` : réduction d'une série temporelle à un nombre fixe de points
+  (Largest-Triangle-Three-Buckets), la forme de la courbe est conservée ;
+- ``page_slice`` : la seule page visible d'un tableau, textes SQL tronqués.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+TOP_N = 30            # Barres détaillées, le reste va dans « Autres »
+OTHER_LABEL = "Autres"
+MAX_POINTS = 500      # Points au plus dans une série temporelle
+PAGE_SIZE = 50        # Lignes par page des tableaux
+TEXT_MAX = 300        # Caractères de texte SQL affichés par ligne
+
+
+def top_n_with_other(df, label, value, n=TOP_N, other_label=OTHER_LABEL):
+    """Les ``n`` lignes de plus grande ``value`` + une ligne ``other_label`` (somme du reste).
+
+    Une colonne ``requetes`` donne le nombre de lignes représentées par
+    chaque barre (1, ou la taille du reste pour « Autres »). Les autres
+    colonnes numériques de la ligne « Autres » sont des moyennes.
+    """
+    df = df.assign(requetes=1)
+    if len(df) <= n:
+        return df.sort_values(value, ascending=False)
+    top = df.nlargest(n, value)
+    rest = df.drop(top.index)
+    other = {label: f"{other_label} ({len(rest)})", value: rest[value].sum(), 'requetes': len(rest)}
+    for column in rest.columns:
+        if column not in other and pd.api.types.is_numeric_dtype(rest[column]):
+            other[column] = rest[column].mean()
+    return pd.concat([top, pd.DataFrame([other])], ignore_index=True)
+
+
+def lttb(x, y, threshold=MAX_POINTS):
+    """Indices des ``threshold`` points gardés par Largest-Triangle-Three-Buckets (``x`` croissant)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Premier et dernier points gardés; threshold - 2 groupes entre les deux
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for b in range(threshold - 2):
+        start, end = edges[b], edges[b + 1]
+        # Sommet suivant : moyenne du groupe suivant (ou dernier point)
+        if b + 2 < len(edges):
+            nx, ny = x[end:edges[b + 2]].mean(), y[end:edges[b + 2]].mean()
+        else:
+            nx, ny = x[-1], y[-1]
+        px, py = x[previous], y[previous]
+        area = np.abs((px - nx) * (y[start:end] - py) - (px - x[start:end]) * (ny - py))
+        previous = start + int(np.argmax(area))
+        selected[b + 1] = previous
+    return selected
+
+
+def page_count(rows, page_size=PAGE_SIZE):
+    return max(1, math.ceil(rows / page_size))
+
+
+def page_slice(df, page, page_size=PAGE_SIZE, text_columns=('query_text',), text_max=TEXT_MAX):
+    """Lignes de la page ``page`` (à partir de 1), textes longs tronqués à ``text_max`` caractères."""
+    page = min(max(1, page), page_count(len(df), page_size))
+    part = df.iloc[(page - 1) * page_size:page * page_size]
+    columns = [c for c in text_columns if c in part.columns]
+    if columns:
+        part = part.copy()
+        for column in columns:
+            text = part[column].astype(str)
+            part[column] = text.where(text.str.len() <= text_max, text.str.slice(0, text_max) + "…")
+    return part
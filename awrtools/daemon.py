@@ -0,0 +1,201 @@
+"""Démon de détection : surveille un dossier de dépôt de rapports AWR.
+
+Un thread de surveillance scrute le dossier (``os.scandir`` : une seule
+lecture du répertoire par passage, aucun fichier ouvert) et met les rapports
+stables dans une file bornée; un pool de threads les analyse avec la même
+chaîne que l'application (awrtools.analysis) et enregistre le résultat dans la
+base SQLite (awrtools.db).
+
+Contre-pression : quand la file est pleine, la surveillance attend au lieu
+d'accumuler; les fichiers restent sur disque et sont pris au passage suivant.
+La mémoire est donc bornée par ``workers`` rapports en cours d'analyse, même
+après une rafale de rapports à la reprise d'une panne.
+"""
+import os
+import queue
+import threading
+import time
+
+from awrtools.analysis import analyse_report
+from awrtools.db import connect, is_processed, record_analysis
+from awrtools.models import compiled_path, get_model
+
+REPORT_EXTENSIONS = ('.html', '.htm')
+
+_STOP = object()
+
+
+class ReportWatcher:
+    """Scrutation d'un dossier : rend les rapports nouveaux ou modifiés, une fois stables.
+
+    Un fichier est stable quand sa taille et sa date n'ont pas changé depuis
+    ``settle`` secondes (rapport en cours de copie). Un rapport rendu reste
+    en cours jusqu'à ``mark_done`` (analyse enregistrée) ou ``mark_failed``
+    (nouvel essai après ``retry`` secondes). Les fichiers disparus du dossier
+    sont oubliés.
+    """
+
+    def __init__(self, folder, extensions=REPORT_EXTENSIONS, settle=1.0, retry=60.0):
+        self.folder = folder
+        self.extensions = extensions
+        self.settle = settle
+        self.retry = retry
+        self._candidates = {}
+        self._pending = {}
+        self._done = {}
+        # poll (surveillance) et mark_* (threads d'analyse) partagent les dictionnaires
+        self._lock = threading.Lock()
+
+    def poll(self):
+        now = time.monotonic()
+        ready = []
+        present = set()
+        with self._lock, os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.extensions) or not entry.is_file():
+                    continue
+                present.add(entry.path)
+                st = entry.stat()
+                signature = (st.st_size, st.st_mtime_ns)
+                if signature in (self._done.get(entry.path), self._pending.get(entry.path)):
+                    continue
+                seen = self._candidates.get(entry.path)
+                if seen is None or seen[0] != signature:
+                    self._candidates[entry.path] = (signature, now)
+                elif now - seen[1] >= self.settle:
+                    ready.append((entry.path, signature))
+            for paths in (self._candidates, self._done):
+                for path in paths.keys() - present:
+                    del paths[path]
+        return sorted(ready)
+
+    def mark_pending(self, path, signature):
+        with self._lock:
+            self._candidates.pop(path, None)
+            self._pending[path] = signature
+
+    def mark_done(self, path, signature):
+        with self._lock:
+            self._candidates.pop(path, None)
+            self._pending.pop(path, None)
+            self._done[path] = signature
+
+    def mark_failed(self, path, signature):
+        with self._lock:
+            self._pending.pop(path, None)
+            self._done.pop(path, None)
+            # Vu « stable » seulement dans retry secondes : pas de nouvel essai à chaque passage
+            self._candidates[path] = (signature, time.monotonic() + self.retry - self.settle)
+
+
+class ReportResult:
+    def __init__(self, path, queries=0, incidents=0, elapsed=0.0, error=None):
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.queries = queries
+        self.incidents = incidents
+        self.elapsed = elapsed
+        self.error = error
+
+
+class DetectionDaemon:
+    """Surveillance + file bornée + pool de threads d'analyse.
+
+    ``model`` : chemin du ``.pkl``; la forêt compilée est préférée tant
+    qu'elle est à jour, le registre garde le modèle chaud et le recharge s'il
+    est remplacé ou recompilé sur disque. ``on_result(ReportResult)`` est
+    appelé par les threads d'analyse après chaque rapport; un rapport en
+    erreur est réessayé après ``retry`` secondes.
+    """
+
+    def __init__(self, folder, db_file, model, workers=2, queue_size=16,
+                 interval=1.0, settle=1.0, retry=60.0, on_result=None):
+        self.folder = folder
+        self.db_file = db_file
+        self.model_path = model
+        self.workers = workers
+        self.interval = interval
+        self.on_result = on_result
+        self.watcher = ReportWatcher(folder, settle=settle, retry=retry)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        # Modèle chargé avant le premier rapport, pas pendant
+        self._model()
+        threads = [
+            threading.Thread(target=self._work, name=f'awr-worker-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        conn = connect(self.db_file)
+        try:
+            while not self._stop.is_set():
+                for path, signature in self.watcher.poll():
+                    if is_processed(conn, os.path.basename(path), *signature):
+                        self.watcher.mark_done(path, signature)
+                    elif self._enqueue((path, signature)):
+                        self.watcher.mark_pending(path, signature)
+                    else:
+                        break
+                self._stop.wait(self.interval)
+        finally:
+            conn.close()
+            for _ in threads:
+                self.queue.put(_STOP)
+            for thread in threads:
+                thread.join()
+
+    def _model(self):
+        return get_model(compiled_path(self.model_path))
+
+    def _enqueue(self, item):
+        # File pleine : on attend un thread libre (contre-pression) sauf à l'arrêt
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _work(self):
+        conn = connect(self.db_file)
+        try:
+            while True:
+                item = self.queue.get()
+                if item is _STOP:
+                    return
+                result = self._process(conn, *item)
+                if result.error:
+                    self.watcher.mark_failed(*item)
+                else:
+                    self.watcher.mark_done(*item)
+                with self._lock:
+                    if result.error:
+                        self.failed += 1
+                    else:
+                        self.processed += 1
+                if self.on_result:
+                    self.on_result(result)
+        finally:
+            conn.close()
+
+    def _process(self, conn, path, signature):
+        start = time.perf_counter()
+        filename = os.path.basename(path)
+        try:
+            model = self._model()
+            df = analyse_report(path, filename, model)
+            queries, incidents = record_analysis(conn, filename, df, *signature, model=model.path)
+            return ReportResult(path, queries, incidents, time.perf_counter() - start)
+        except Exception as e:
+            return ReportResult(path, elapsed=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
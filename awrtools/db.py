@@ -0,0 +1,203 @@
+"""Ingestion en masse des métriques AWR dans la base SQLite ``awr_data``.
+
+- insertion par lots (``executemany``) dans une seule transaction, journal WAL ;
+- clé naturelle ``(awr_file, query_id)`` avec mise à jour (upsert) : relancer
+  l'ingestion ne crée plus de doublons ;
+- index sur ``query_id`` et sur le snapshot de début ;
+- texte SQL normalisé dans ``sql_text`` (une ligne par SQL Id, au lieu d'une
+  copie par snapshot) ;
+- ``incidents`` et ``processed_reports`` alimentées par le démon de détection
+  (un rapport déjà traité, même taille et même date, n'est pas rejoué).
+
+Une base créée par l'ancienne version de ``Bd.py`` est migrée en place
+(colonnes ajoutées, doublons supprimés en gardant la dernière insertion).
+"""
+import sqlite3
+from datetime import datetime
+
+from awrtools.stream import parse_awr_name
+
+BATCH_SIZE = 10_000
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS awr_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        query_id TEXT,
+        awr_file TEXT,
+        elapsed_time REAL,
+        rows_processed INTEGER,
+        cpu_percent REAL,
+        begin_snap INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS sql_text (
+        query_id TEXT PRIMARY KEY,
+        query_text TEXT
+    );
+    CREATE TABLE IF NOT EXISTS incidents (
+        awr_file TEXT,
+        query_id TEXT,
+        elapsed_time REAL,
+        rows_processed INTEGER,
+        cpu_percent REAL,
+        cause_probable TEXT,
+        model TEXT,
+        detected_at TEXT,
+        PRIMARY KEY (awr_file, query_id)
+    );
+    CREATE TABLE IF NOT EXISTS processed_reports (
+        awr_file TEXT PRIMARY KEY,
+        size INTEGER,
+        mtime_ns INTEGER,
+        queries INTEGER,
+        incidents INTEGER,
+        processed_at TEXT
+    );
+'''
+
+_INDEXES = '''
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_awr_data_file_query ON awr_data (awr_file, query_id);
+    CREATE INDEX IF NOT EXISTS idx_awr_data_query_id ON awr_data (query_id);
+    CREATE INDEX IF NOT EXISTS idx_awr_data_begin_snap ON awr_data (begin_snap);
+'''
+
+_UPSERT_METRICS = '''
+    INSERT INTO awr_data (query_id, awr_file, elapsed_time, rows_processed, cpu_percent, begin_snap)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (awr_file, query_id) DO UPDATE SET
+        elapsed_time = excluded.elapsed_time,
+        rows_processed = excluded.rows_processed,
+        cpu_percent = excluded.cpu_percent,
+        begin_snap = excluded.begin_snap
+'''
+
+# Un texte vide (requête absente de "Complete List of SQL Text") n'écrase pas un texte connu
+_UPSERT_SQL_TEXT = '''
+    INSERT INTO sql_text (query_id, query_text) VALUES (?, ?)
+    ON CONFLICT (query_id) DO UPDATE SET query_text = excluded.query_text
+    WHERE excluded.query_text != ''
+'''
+
+
+def connect(db_file, timeout=30.0):
+    # timeout : attente du verrou quand plusieurs threads écrivent dans la base
+    conn = sqlite3.connect(db_file, timeout=timeout)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    init_schema(conn)
+    return conn
+
+
+def init_schema(conn):
+    conn.executescript(_SCHEMA)
+
+    # Migration d'une table awr_data créée par l'ancien Bd.py
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(awr_data)')}
+    with conn:
+        for column, sql_type in (('cpu_percent', 'REAL'), ('begin_snap', 'INTEGER')):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE awr_data ADD COLUMN {column} {sql_type}')
+        if 'begin_snap' not in columns:
+            for awr_file, in conn.execute('SELECT DISTINCT awr_file FROM awr_data').fetchall():
+                parsed = parse_awr_name(awr_file or '')
+                if parsed:
+                    conn.execute('UPDATE awr_data SET begin_snap = ? WHERE awr_file = ?', (parsed[1], awr_file))
+        # Doublons de l'ancien Bd.py : dédoublonnés une fois, avant de créer l'index unique
+        has_unique_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_awr_data_file_query'"
+        ).fetchone()
+        if not has_unique_index:
+            conn.execute('''
+                DELETE FROM awr_data WHERE id NOT IN (
+                    SELECT MAX(id) FROM awr_data GROUP BY awr_file, query_id
+                )
+            ''')
+    conn.executescript(_INDEXES)
+
+
+def _rows(records):
+    for entry in records:
+        awr_file = entry.get('awr_file')
+        parsed = parse_awr_name(awr_file or '')
+        yield (
+            (
+                entry.get('query_id'),
+                awr_file,
+                entry.get('elapsed_time'),
+                entry.get('rows_processed'),
+                entry.get('cpu_percent'),
+                parsed[1] if parsed else None,
+            ),
+            (entry.get('query_id'), entry.get('query_text') or ''),
+        )
+
+
+def ingest_records(conn, records, batch_size=BATCH_SIZE):
+    """Insère ou met à jour les enregistrements (dicts au format de Data.json).
+
+    Tout est fait dans une seule transaction; retourne le nombre d'enregistrements.
+    """
+    count = 0
+    metrics, texts = [], []
+    with conn:
+        for metric_row, text_row in _rows(records):
+            metrics.append(metric_row)
+            texts.append(text_row)
+            if len(metrics) >= batch_size:
+                conn.executemany(_UPSERT_METRICS, metrics)
+                conn.executemany(_UPSERT_SQL_TEXT, texts)
+                count += len(metrics)
+                metrics, texts = [], []
+        if metrics:
+            conn.executemany(_UPSERT_METRICS, metrics)
+            conn.executemany(_UPSERT_SQL_TEXT, texts)
+            count += len(metrics)
+    return count
+
+
+_UPSERT_INCIDENT = '''
+    INSERT INTO incidents (awr_file, query_id, elapsed_time, rows_processed, cpu_percent,
+                           cause_probable, model, detected_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (awr_file, query_id) DO UPDATE SET
+        elapsed_time = excluded.elapsed_time,
+        rows_processed = excluded.rows_processed,
+        cpu_percent = excluded.cpu_percent,
+        cause_probable = excluded.cause_probable,
+        model = excluded.model,
+        detected_at = excluded.detected_at
+'''
+
+
+def is_processed(conn, awr_file, size, mtime_ns):
+    row = conn.execute(
+        'SELECT 1 FROM processed_reports WHERE awr_file = ? AND size = ? AND mtime_ns = ?',
+        (awr_file, size, mtime_ns)
+    ).fetchone()
+    return row is not None
+
+
+def record_analysis(conn, awr_file, df, size, mtime_ns, model):
+    """Enregistre l'analyse d'un rapport (métriques, incidents, rapport traité).
+
+    ``df`` est le DataFrame rendu par ``awrtools.analysis.analyse_report``.
+    Rejouer le même rapport met les lignes à jour sans les dupliquer.
+    """
+    now = datetime.now().isoformat(timespec='seconds')
+    count = ingest_records(conn, df.to_dict('records')) if not df.empty else 0
+    incidents = df[df['incident'] == 1] if not df.empty else df
+    with conn:
+        # Un rapport réanalysé ne garde que ses incidents actuels
+        conn.execute('DELETE FROM incidents WHERE awr_file = ?', (awr_file,))
+        conn.executemany(_UPSERT_INCIDENT, [
+            (awr_file, row.query_id, row.elapsed_time, row.rows_processed, row.cpu_percent,
+             row.cause_probable, model, now)
+            for row in incidents.itertuples(index=False)
+        ])
+        conn.execute('''
+            INSERT INTO processed_reports (awr_file, size, mtime_ns, queries, incidents, processed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (awr_file) DO UPDATE SET
+                size = excluded.size, mtime_ns = excluded.mtime_ns, queries = excluded.queries,
+                incidents = excluded.incidents, processed_at = excluded.processed_at
+        ''', (awr_file, size, mtime_ns, count, len(incidents), now))
+    return count, len(incidents)
@@ -0,0 +1,144 @@
+"""Détection d'incidents par lots, à mémoire bornée.
+
+Les métriques sont lues par lots de taille fixe depuis n'importe quelle
+source du projet (``Data.json``, magasin colonne, base SQLite ``awr_data``,
+CSV), le modèle choisi explicitement est appliqué lot par lot et les lignes
+scorées sont ajoutées au CSV de sortie au fur et à mesure. Un historique de
+plusieurs Go se traite donc sans jamais être chargé en entier.
+"""
+import os
+import sqlite3
+
+import pandas as pd
+
+from awrtools.models import compiled_path, get_model
+from awrtools.pipeline import iter_json_array
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '2-Models')
+
+# Modèles entraînés par 2-Models/XGext.py et 2-Models/RandomForestLearn.py,
+# et leurs versions compilées en NumPy (2-Models/CompileModels.py)
+MODELS = {
+    'xgb': 'XGext.pkl',
+    'rf': 'RandomForest_model.pkl',
+    'xgb-np': 'XGext.npz',
+    'rf-np': 'RandomForest_model.npz',
+}
+
+BATCH_SIZE = 50_000
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def model_source_path(model):
+    """Chemin du fichier désigné : nom court (``xgb``, ``rf``...) ou chemin d'un modèle."""
+    return os.path.join(MODELS_DIR, MODELS[model]) if model in MODELS else model
+
+
+def resolve_model_path(model):
+    """Chemin du modèle à charger : pour un ``.pkl``, la forêt compilée est préférée si elle est à jour."""
+    return compiled_path(model_source_path(model))
+
+
+def load_model(model):
+    return get_model(resolve_model_path(model))
+
+
+def _iter_json_batches(path, batch_size):
+    batch = []
+    for record in iter_json_array(path):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+
+def _iter_sqlite_batches(db_file, batch_size):
+    # Lecture seule : une base de l'ancien Bd.py n'est pas migrée au passage
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    try:
+        tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if 'sql_text' in tables:
+            query = '''
+                SELECT d.*, COALESCE(t.query_text, '') AS query_text
+                FROM awr_data d LEFT JOIN sql_text t ON t.query_id = d.query_id
+                ORDER BY d.id
+            '''
+        else:
+            query = 'SELECT * FROM awr_data ORDER BY id'
+        cursor = conn.execute(query)
+        columns = [c[0] for c in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns).drop(columns=['id'])
+    finally:
+        conn.close()
+
+
+def iter_batches(source, batch_size=BATCH_SIZE, columns=None):
+    """Génère les métriques de ``source`` par DataFrames d'au plus ``batch_size`` lignes.
+
+    ``source`` : dossier du magasin colonne, base SQLite, CSV ou liste JSON.
+    """
+    if os.path.isdir(source):
+        # pyarrow n'est importé que pour lire le magasin colonne
+        from awrtools.store import iter_metric_batches
+        yield from iter_metric_batches(source, columns=columns, batch_size=batch_size)
+        return
+
+    lower = source.lower()
+    if lower.endswith(SQLITE_SUFFIXES):
+        batches = _iter_sqlite_batches(source, batch_size)
+    elif lower.endswith('.csv'):
+        batches = pd.read_csv(source, chunksize=batch_size)
+    else:
+        batches = _iter_json_batches(source, batch_size)
+    for df in batches:
+        yield df[[c for c in columns if c in df.columns]] if columns else df
+
+
+def score_batches(model, batches):
+    """Ajoute la colonne ``incident`` (prédiction du modèle) à chaque lot."""
+    for df in batches:
+        # Une colonne 'incident' déjà présente ne doit jamais servir de feature
+        df = df.drop(columns=['incident'], errors='ignore')
+        df['incident'] = model.predict(df)
+        yield df
+
+
+class CsvAppender:
+    """Écrit des DataFrames successifs dans un même CSV (en-tête écrit une seule fois).
+
+    Les colonnes sont fixées par le premier lot : une clé qui n'apparaît que
+    dans un lot suivant (enregistrement JSON mal formé) est ignorée.
+    """
+
+    def __init__(self, path, incidents_only=False):
+        self.path = path
+        self.incidents_only = incidents_only
+        self.rows = 0
+        self.columns = None
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, 'w', encoding='utf-8', newline='')
+        return self
+
+    def write(self, df):
+        if self.incidents_only:
+            df = df[df['incident'] == 1]
+        header = self.columns is None
+        if header:
+            self.columns = list(df.columns)
+        else:
+            df = df.reindex(columns=self.columns)
+        df.to_csv(self._f, index=False, header=header)
+        self._f.flush()
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.close()
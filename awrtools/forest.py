@@ -0,0 +1,333 @@
+"""Forêts d'arbres compilées en tableaux NumPy (XGBoost et RandomForest).
+
+``compile_model`` aplatit un ``XGBClassifier`` (binary:logistic) ou un
+``RandomForestClassifier`` binaire en quelques tableaux : feature, seuil,
+enfants gauche/droit, direction des valeurs manquantes et valeur des
+feuilles, tous les arbres mis bout à bout. ``CompiledForest.predict`` parcourt
+ensuite tous les arbres pour toutes les lignes en même temps, niveau par
+niveau, avec NumPy seul : ni xgboost ni scikit-learn ne sont importés pour
+prédire, et il n'y a pas de conversion DataFrame → DMatrix à chaque appel.
+
+Deux parcours selon la taille du lot :
+
+- petits lots (latence) : tous les arbres avancent d'un niveau à la fois,
+  quelques indexations NumPy par niveau ;
+- gros lots (débit) : algorithme QuickScorer, un passage par nœud interne
+  sur la colonne contiguë de sa feature; chaque condition fausse efface, dans
+  un masque de 64 bits par ligne et par arbre, les feuilles du sous-arbre
+  gauche, et la feuille atteinte est le bit restant le plus à gauche.
+
+Les comparaisons reproduisent celles des bibliothèques d'origine (valeurs en
+float32, ``x < seuil`` pour XGBoost, ``x <= seuil`` pour scikit-learn), les
+prédictions sont donc identiques.
+"""
+import json
+
+import numpy as np
+
+KIND_XGBOOST = 'xgboost'
+KIND_RANDOM_FOREST = 'random_forest'
+
+# Lignes traitées à la fois : garde les tableaux intermédiaires en cache CPU
+CHUNK_ROWS = 8192
+
+# À partir de ce nombre de lignes, parcours QuickScorer (si chaque arbre a au plus 64 feuilles)
+QUICKSCORER_MIN_ROWS = 128
+QUICKSCORER_CHUNK_ROWS = 8192
+
+# Position du bit de poids faible de chaque valeur sur 16 bits (masques uint8/uint16)
+_LOWEST_BIT = np.zeros(1 << 16, dtype=np.uint8)
+for _bit in reversed(range(16)):
+    _LOWEST_BIT[(np.arange(1 << 16) >> _bit) & 1 == 1] = _bit
+
+
+class CompiledForest:
+    def __init__(self, kind, features, feature, threshold, left, right, default_left,
+                 value, roots, max_depth, base_margin=0.0, classes=(0, 1), source_digest=None):
+        self.kind = kind
+        # Empreinte du .pkl d'origine : permet de savoir si le .npz est encore à jour
+        self.source_digest = source_digest
+        self.features = [str(f) for f in features]
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.base_margin = float(base_margin)
+        self.classes = np.asarray(classes)
+        self._quickscorer = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # === Sauvegarde : un seul .npz, sans pickle
+    def save(self, path):
+        meta = {
+            'kind': self.kind, 'features': self.features,
+            'max_depth': self.max_depth, 'base_margin': self.base_margin,
+            'source_digest': self.source_digest,
+        }
+        np.savez_compressed(
+            path, meta=np.array(json.dumps(meta)), feature=self.feature, threshold=self.threshold,
+            left=self.left, right=self.right, default_left=self.default_left,
+            value=self.value, roots=self.roots, classes=self.classes,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(
+                meta['kind'], meta['features'], data['feature'], data['threshold'],
+                data['left'], data['right'], data['default_left'], data['value'],
+                data['roots'], meta['max_depth'], meta['base_margin'], data['classes'],
+                meta.get('source_digest'),
+            )
+
+    # === Évaluation
+    def _matrix(self, X):
+        if hasattr(X, 'reindex'):
+            X = X.reindex(columns=self.features, fill_value=0).to_numpy(dtype=np.float32)
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _leaves(self, X):
+        """Indice de la feuille atteinte, pour chaque ligne et chaque arbre (n, arbres)."""
+        n = len(X)
+        node = np.repeat(self.roots[None, :], n, axis=0)
+        offsets = (np.arange(n, dtype=np.intp) * X.shape[1])[:, None]
+        flat = X.ravel()
+        # scikit-learn compare le float32 promu en float64 au seuil float64
+        values = flat if self.threshold.dtype == np.float32 else flat.astype(self.threshold.dtype)
+        strict = self.kind == KIND_XGBOOST
+        # Les feuilles pointent sur elles-mêmes : max_depth pas suffisent pour tous les arbres
+        for _ in range(self.max_depth):
+            x = values[offsets + self.feature[node]]
+            threshold = self.threshold[node]
+            go_left = x < threshold if strict else x <= threshold
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _build_quickscorer(self):
+        """Nœuds internes, arbre de chacun et bits des feuilles de son sous-arbre gauche."""
+        nodes, trees, clear, leaf_index = [], [], [], []
+        for t, root in enumerate(self.roots):
+            leaves = []
+
+            # Parcours gauche d'abord : feuilles numérotées de gauche à droite
+            def visit(node):
+                if self.left[node] == node:
+                    leaves.append(node)
+                    return
+                first = len(leaves)
+                visit(int(self.left[node]))
+                nodes.append(node)
+                trees.append(t)
+                clear.append(((1 << (len(leaves) - first)) - 1) << first)
+                visit(int(self.right[node]))
+
+            visit(int(root))
+            leaf_index.append(leaves)
+
+        width = max(len(leaves) for leaves in leaf_index)
+        if width > 64:
+            self._quickscorer = False
+            return False
+        # Masques aussi étroits que possible : moins d'octets à parcourir par nœud
+        dtype = next(d for d in (np.uint8, np.uint16, np.uint32, np.uint64) if np.iinfo(d).bits >= width)
+        padded = [leaves + [leaves[-1]] * (width - len(leaves)) for leaves in leaf_index]
+        nodes = np.array(nodes, dtype=np.intp)
+        # Beaucoup de nœuds partagent la même condition : chacune n'est évaluée qu'une fois
+        conditions, node_condition = np.unique(
+            np.rec.fromarrays([self.feature[nodes], self.threshold[nodes], self.default_left[nodes]]),
+            return_inverse=True,
+        )
+        # Bits conservés quand la condition envoie à droite
+        keep = ~np.array(clear, dtype=dtype)
+        # Valeur de la k-ième feuille de chaque arbre : (arbres, width)
+        leaf_value = self.value[np.array(padded, dtype=np.intp)]
+        self._quickscorer = (
+            conditions['f0'], conditions['f1'], conditions['f2'],
+            node_condition.ravel(), np.array(trees, dtype=np.intp), keep, leaf_value,
+        )
+        return True
+
+    def _score_quickscorer(self, X):
+        feature, threshold, default_left, node_condition, trees, keep, leaf_value = self._quickscorer
+        go_left = np.less if self.kind == KIND_XGBOOST else np.less_equal
+        dtype = keep.dtype
+        all_bits = dtype.type(np.iinfo(dtype).max)
+        # Indices à plat dans leaf_value (arbres, width)
+        tree_offsets = (np.arange(self.n_trees) * leaf_value.shape[1])[:, None]
+        flat_values = leaf_value.ravel()
+        lowest_bit = _LOWEST_BIT[:1 << (8 * dtype.itemsize)] if dtype.itemsize <= 2 else None
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), QUICKSCORER_CHUNK_ROWS):
+            # Une ligne par feature : chaque condition lit une colonne contiguë
+            columns = np.ascontiguousarray(X[start:start + QUICKSCORER_CHUNK_ROWS].T, dtype=threshold.dtype)
+            missing = [np.isnan(c) if np.isnan(c).any() else None for c in columns]
+            m = columns.shape[1]
+
+            # Condition → masque ligne par ligne : tous les bits si la ligne part à gauche, 0 sinon
+            left = np.empty(m, dtype=bool)
+            left_masks = np.empty((len(feature), m), dtype=dtype)
+            for j in range(len(feature)):
+                f = feature[j]
+                go_left(columns[f], threshold[j], out=left)
+                # Valeur manquante : comparaison fausse (droite), sauf direction par défaut à gauche
+                if missing[f] is not None and default_left[j]:
+                    left |= missing[f]
+                np.multiply(left, all_bits, out=left_masks[j])
+
+            # Branche droite : les feuilles du sous-arbre gauche sont effacées
+            acc = np.full((self.n_trees, m), all_bits, dtype=dtype)
+            bits = np.empty(m, dtype=dtype)
+            for k in range(len(trees)):
+                np.bitwise_or(left_masks[node_condition[k]], keep[k], out=bits)
+                row = acc[trees[k]]
+                np.bitwise_and(row, bits, out=row)
+
+            # Bit de poids faible restant (feuille la plus à gauche) = feuille atteinte
+            if lowest_bit is not None:
+                position = np.take(lowest_bit, acc).astype(np.intp)
+            else:
+                lowest = acc & (~acc + dtype.type(1))
+                position = np.frexp(lowest.astype(np.float64))[1] - 1
+            position += tree_offsets
+            out[start:start + m] = flat_values.take(position).sum(axis=0)
+        return out
+
+    def _score(self, X):
+        if len(X) >= QUICKSCORER_MIN_ROWS and (
+                self._quickscorer or (self._quickscorer is None and self._build_quickscorer())):
+            return self._score_quickscorer(X)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            leaves = self._leaves(X[start:start + CHUNK_ROWS])
+            out[start:start + CHUNK_ROWS] = self.value[leaves].sum(axis=1)
+        return out
+
+    def predict_proba(self, X):
+        """Probabilité de la classe 1 pour chaque ligne."""
+        X = self._matrix(X)
+        if self.kind == KIND_XGBOOST:
+            return 1.0 / (1.0 + np.exp(-(self._score(X) + self.base_margin)))
+        return self._score(X) / self.n_trees
+
+    def predict(self, X):
+        X = self._matrix(X)
+        if self.kind == KIND_XGBOOST:
+            positive = self._score(X) + self.base_margin > 0
+        else:
+            # argmax de scikit-learn : égalité → première classe
+            positive = self._score(X) / self.n_trees > 0.5
+        return self.classes[positive.astype(np.intp)]
+
+
+def read_source_digest(path):
+    """Empreinte du modèle d'origine enregistrée dans un ``.npz`` (sans charger les arbres)."""
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(str(data['meta'])).get('source_digest')
+
+
+def _flatten(trees):
+    """Concatène des arbres (dicts de tableaux locaux) en tableaux globaux."""
+    arrays = {k: [] for k in ('feature', 'threshold', 'left', 'right', 'default_left', 'value')}
+    roots, offset, max_depth = [], 0, 0
+    for tree in trees:
+        n = len(tree['left'])
+        index = np.arange(n)
+        leaf = tree['left'] < 0
+        roots.append(offset)
+        arrays['feature'].append(np.where(leaf, 0, tree['feature']))
+        arrays['threshold'].append(tree['threshold'])
+        arrays['left'].append(np.where(leaf, index, tree['left']) + offset)
+        arrays['right'].append(np.where(leaf, index, tree['right']) + offset)
+        arrays['default_left'].append(tree['default_left'])
+        arrays['value'].append(np.where(leaf, tree['value'], 0.0))
+        max_depth = max(max_depth, tree['depth'])
+        offset += n
+    flat = {k: np.concatenate(v) for k, v in arrays.items()}
+    return flat, np.array(roots), max_depth
+
+
+def _depth(left, right):
+    depth = np.zeros(len(left), dtype=np.int64)
+    for node in range(len(left)):
+        for child in (left[node], right[node]):
+            if child >= 0:
+                depth[child] = depth[node] + 1
+    return int(depth.max())
+
+
+def compile_xgboost(model):
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic' or int(learner['learner_model_param'].get('num_target', 1)) != 1:
+        raise ValueError(f"Objectif non pris en charge : {objective}")
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+
+    trees = []
+    for tree in learner['gradient_booster']['model']['trees']:
+        left = np.array(tree['left_children'], dtype=np.int64)
+        right = np.array(tree['right_children'], dtype=np.int64)
+        conditions = np.array(tree['split_conditions'], dtype=np.float32)
+        trees.append({
+            'feature': np.array(tree['split_indices'], dtype=np.int64),
+            'threshold': conditions,
+            'left': left,
+            'right': right,
+            'default_left': np.array(tree['default_left'], dtype=bool),
+            # Pour une feuille, split_conditions contient la valeur de la feuille
+            'value': conditions.astype(np.float64),
+            'depth': _depth(left, right),
+        })
+    flat, roots, max_depth = _flatten(trees)
+    features = learner.get('feature_names') or booster.feature_names
+    return CompiledForest(
+        KIND_XGBOOST, features, flat['feature'], flat['threshold'].astype(np.float32),
+        flat['left'], flat['right'], flat['default_left'], flat['value'], roots, max_depth,
+        base_margin=np.log(base_score / (1.0 - base_score)),
+    )
+
+
+def compile_random_forest(model):
+    if len(model.classes_) != 2 or getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("Seules les forêts de classification binaire sont prises en charge")
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        # Proportion de la classe 1 (les anciennes versions stockent des effectifs)
+        proba = value[:, 1] / value.sum(axis=1)
+        trees.append({
+            'feature': tree.feature.astype(np.int64),
+            'threshold': tree.threshold.astype(np.float64),
+            'left': tree.children_left.astype(np.int64),
+            'right': tree.children_right.astype(np.int64),
+            'default_left': np.asarray(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count)), dtype=bool),
+            'value': proba,
+            'depth': int(tree.max_depth),
+        })
+    flat, roots, max_depth = _flatten(trees)
+    return CompiledForest(
+        KIND_RANDOM_FOREST, model.feature_names_in_, flat['feature'], flat['threshold'],
+        flat['left'], flat['right'], flat['default_left'], flat['value'], roots, max_depth,
+        classes=model.classes_,
+    )
+
+
+def compile_model(model):
+    """Compile un XGBClassifier ou un RandomForestClassifier chargé."""
+    if hasattr(model, 'get_booster'):
+        return compile_xgboost(model)
+    if hasattr(model, 'estimators_'):
+        return compile_random_forest(model)
+    raise TypeError(f"Modèle non pris en charge : {type(model).__name__}")
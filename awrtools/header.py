@@ -0,0 +1,142 @@
+"""En-tête d'un rapport AWR : base, instance et snapshots, sans parser le document.
+
+Les premières tables du rapport (DB Name/DB Id, Instance/Inst Num, puis
+Begin Snap/End Snap/Elapsed/DB Time) tiennent dans quelques Ko au début du
+fichier. Le fichier est projeté en mémoire (mmap) et parcouru avec de simples
+``find`` sur les octets, sans expression régulière; la lecture s'arrête à la
+fin de la table des snapshots.
+"""
+import html
+import mmap
+import os
+
+# Version du résultat mis en cache (à incrémenter si l'extraction change)
+HEADER_VERSION = 2
+
+# Au-delà, le rapport n'a pas d'en-tête AWR reconnaissable
+HEADER_LIMIT = 256 * 1024
+
+
+def _strip_tags(raw):
+    parts = []
+    pos = 0
+    while True:
+        start = raw.find(b'<', pos)
+        if start < 0:
+            parts.append(raw[pos:])
+            break
+        parts.append(raw[pos:start])
+        end = raw.find(b'>', start)
+        if end < 0:
+            break
+        pos = end + 1
+    return html.unescape(b''.join(parts).decode('utf-8', errors='replace')).strip()
+
+
+def _cells(row, lower, tag):
+    """Textes des cellules ``<th>``/``<td>`` d'une ligne (``lower`` : la ligne en minuscules)."""
+    cells = []
+    open_tag, close_tag = b'<' + tag, b'</' + tag + b'>'
+    pos = 0
+    while True:
+        start = lower.find(open_tag, pos)
+        if start < 0:
+            return cells
+        content = lower.find(b'>', start) + 1
+        end = lower.find(close_tag, content)
+        if not content or end < 0:
+            return cells
+        cells.append(_strip_tags(row[content:end]))
+        pos = end + len(close_tag)
+
+
+def _iter_tables(buf, limit):
+    """Génère les tables ``(entêtes, lignes)`` du début du document.
+
+    Les balises HTML ne sont pas sensibles à la casse : la recherche se fait
+    sur une copie en minuscules de la zone lue, le texte est pris dans l'original.
+    """
+    region = bytes(buf[:limit])
+    lower = region.lower()
+    pos = 0
+    while True:
+        start = lower.find(b'<table', pos)
+        if start < 0:
+            return
+        end = lower.find(b'</table>', start)
+        if end < 0:
+            return
+        headers, rows = [], []
+        bounds = []
+        row_start = lower.find(b'<tr', start, end)
+        while row_start >= 0:
+            next_start = lower.find(b'<tr', row_start + 3, end)
+            bounds.append((row_start + 3, next_start if next_start >= 0 else end))
+            row_start = next_start
+        for row_start, row_end in bounds:
+            row, row_lower = region[row_start:row_end], lower[row_start:row_end]
+            if b'<th' in row_lower:
+                headers = _cells(row, row_lower, b'th')
+            else:
+                rows.append(_cells(row, row_lower, b'td'))
+        yield headers, rows
+        pos = end + len(b'</table>')
+
+
+def _int(text):
+    try:
+        return int(text.replace(',', ''))
+    except ValueError:
+        return None
+
+
+def _float(text):
+    try:
+        return float(text.split()[0].replace(',', ''))
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_header(buf, limit=HEADER_LIMIT):
+    """Champs de l'en-tête trouvés dans ``buf`` (bytes, mmap...); ``{}`` si absent."""
+    header = {}
+    limit = min(limit, len(buf))
+    for headers, rows in _iter_tables(buf, limit):
+        if not rows:
+            continue
+        first = dict(zip(headers, rows[0]))
+        if 'DB Id' in first:
+            header['db_name'] = first.get('DB Name')
+            header['dbid'] = _int(first['DB Id'])
+        elif 'Inst Num' in first:
+            header['instance'] = first.get('Instance')
+            header['instance_number'] = _int(first['Inst Num'])
+        elif rows[0] and rows[0][0] == 'Begin Snap:':
+            for cells in rows:
+                label = cells[0].rstrip(':').lower() if cells else ''
+                if label in ('begin snap', 'end snap') and len(cells) >= 4:
+                    prefix = label.split()[0]
+                    header[f'{prefix}_snap'] = _int(cells[1])
+                    header[f'{prefix}_time'] = cells[2]
+                    header[f'{prefix}_sessions'] = _int(cells[3])
+                    if len(cells) >= 5:
+                        header[f'{prefix}_cursors_per_session'] = _float(cells[4])
+                elif label == 'elapsed' and len(cells) >= 3:
+                    header['elapsed_min'] = _float(cells[2])
+                elif label == 'db time' and len(cells) >= 3:
+                    header['db_time_min'] = _float(cells[2])
+            # Table des snapshots : fin de l'en-tête
+            break
+    return header
+
+
+def read_header(path, filename=None):
+    """En-tête d'un rapport AWR sur disque (lu par mmap, seuls les premiers Ko sont touchés).
+
+    ``filename`` est ignoré : même signature que les fonctions d'extraction
+    passées à ``pipeline.iter_extractions``.
+    """
+    if not os.path.getsize(path):
+        return {}
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return parse_header(mm)
@@ -0,0 +1,73 @@
+"""Seuils de régression, étiquette ``Bad_performance`` et cause probable, vectorisés.
+
+Mêmes formules que les anciennes fonctions ligne à ligne de XGext.py,
+RandomForestLearn.py et app.py, mais calculées sur des colonnes entières
+(tableaux NumPy ou Series pandas) au lieu de ``df.apply(..., axis=1)``.
+"""
+import numpy as np
+
+# Paramètres historiques des régressions : valeurs par défaut quand aucune
+# version ajustée n'est enregistrée (voir awrtools.thresholds)
+SLOPE_ROWS = 2.78e-04
+INTERCEPT_ROWS = 106.40
+SLOPE_CPU = -3.06
+INTERCEPT_CPU = 250.51
+SEUIL_MULTIPLICATEUR = 1.5
+
+CAUSE_NONE = "Aucun"
+CAUSE_ROWS = "Lignes traitées élevées"
+CAUSE_CPU = "Surcharge CPU"
+CAUSE_UNKNOWN = "Incident probable"
+
+_CAUSES = np.array(
+    [CAUSE_NONE, f"{CAUSE_ROWS}, {CAUSE_CPU}", CAUSE_ROWS, CAUSE_CPU, CAUSE_UNKNOWN], dtype=object
+)
+
+
+def _values(column):
+    return np.asarray(column, dtype=np.float64)
+
+
+def regression_threshold(x, slope, intercept, multiplier=SEUIL_MULTIPLICATEUR):
+    """Temps seuil ``(slope * x + intercept) * multiplier`` pour chaque valeur de ``x``."""
+    return (slope * _values(x) + intercept) * multiplier
+
+
+def threshold_rows(rows_processed, slope=SLOPE_ROWS, intercept=INTERCEPT_ROWS,
+                   multiplier=SEUIL_MULTIPLICATEUR):
+    return regression_threshold(rows_processed, slope, intercept, multiplier)
+
+
+def threshold_cpu(cpu_percent, slope=SLOPE_CPU, intercept=INTERCEPT_CPU,
+                  multiplier=SEUIL_MULTIPLICATEUR):
+    return regression_threshold(cpu_percent, slope, intercept, multiplier)
+
+
+def bad_performance(elapsed_time, rows_processed, cpu_percent=None,
+                    rows_params=(SLOPE_ROWS, INTERCEPT_ROWS), cpu_params=(SLOPE_CPU, INTERCEPT_CPU),
+                    multiplier=SEUIL_MULTIPLICATEUR):
+    """1 si ``elapsed_time`` dépasse le seuil lignes (ou le seuil CPU si ``cpu_percent`` est donné).
+
+    Sans ``cpu_percent`` : règle de RandomForestLearn.py; avec : règle de XGext.py.
+    """
+    elapsed = _values(elapsed_time)
+    bad = elapsed > threshold_rows(rows_processed, *rows_params, multiplier)
+    if cpu_percent is not None:
+        bad |= elapsed > threshold_cpu(cpu_percent, *cpu_params, multiplier)
+    return bad.astype(np.int64)
+
+
+def cause_probable(incident, elapsed_time, rows_processed, cpu_percent,
+                   rows_params=(SLOPE_ROWS, INTERCEPT_ROWS), cpu_params=(SLOPE_CPU, INTERCEPT_CPU),
+                   multiplier=SEUIL_MULTIPLICATEUR):
+    """Cause probable de chaque incident (règles de ``identifier_cause_ai`` dans app.py)."""
+    elapsed = _values(elapsed_time)
+    rows_hit = elapsed > threshold_rows(rows_processed, *rows_params, multiplier)
+    cpu_hit = elapsed > threshold_cpu(cpu_percent, *cpu_params, multiplier)
+    # Code entier par ligne puis une seule indexation dans la table des libellés
+    code = np.full(elapsed.shape, 4, dtype=np.int8)
+    code[cpu_hit] = 3
+    code[rows_hit] = 2
+    code[rows_hit & cpu_hit] = 1
+    code[np.asarray(incident) != 1] = 0
+    return _CAUSES[code]
@@ -0,0 +1,84 @@
+"""Cache LRU en mémoire, borné en octets, partagé par les threads du processus.
+
+Utilisé par app.py pour mémoriser, par empreinte du fichier téléversé, le
+DataFrame extrait, les prédictions, les causes et le PDF généré. Les entrées
+les moins récemment utilisées sont évincées dès que la taille totale
+estimée dépasse la limite.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def content_key(data):
+    """Empreinte (BLAKE2) d'un contenu en octets."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def estimate_size(value):
+    """Taille approximative en octets (DataFrame, octets, conteneurs simples)."""
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if hasattr(value, 'getbuffer'):
+        return value.getbuffer().nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    def __init__(self, max_bytes=256 * 2**20, max_entries=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._data.pop(key)[1]
+            # Une valeur plus grosse que tout le cache n'est pas conservée
+            if size > self.max_bytes:
+                return value
+            self._data[key] = (value, size)
+            self.total_bytes += size
+            self._evict()
+        return value
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.put(key, compute())
+        return value
+
+    def _evict(self):
+        while self._data and (
+            self.total_bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._data) > self.max_entries)
+        ):
+            _, (_, size) = self._data.popitem(last=False)
+            self.total_bytes -= size
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
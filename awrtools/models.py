@@ -0,0 +1,120 @@
+"""Registre des modèles de détection, partagé par tout le processus.
+
+Chaque fichier ``.pkl`` est désérialisé une seule fois et gardé en mémoire;
+Streamlit réexécute ``app.py`` à chaque interaction mais les modules importés
+restent chargés, donc le registre survit aux reruns et aux sessions. Si le
+fichier change sur disque (taille ou date), le modèle est rechargé au
+prochain accès.
+
+Un ``.npz`` (forêt compilée par 2-Models/CompileModels.py) est chargé sans
+importer xgboost ni scikit-learn; un ``.pkl`` passe par joblib.
+"""
+import os
+import threading
+
+from awrtools.memo import content_key
+
+
+def load_model_file(path):
+    if path.endswith('.npz'):
+        from awrtools.forest import CompiledForest
+        return CompiledForest.load(path)
+    import joblib
+    return joblib.load(path)
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+# (.pkl, .npz) → (signatures des deux fichiers, chemin retenu)
+_compiled_paths = {}
+
+
+def compiled_path(path):
+    """Le ``.npz`` compilé depuis ``path`` (.pkl) s'il correspond à son contenu actuel, sinon ``path``.
+
+    Un .pkl réentraîné sans recompilation retombe donc sur le .pkl. Le .pkl
+    n'est relu et haché que si sa taille ou sa date (ou celles du .npz) ont
+    changé depuis le dernier appel.
+    """
+    npz_path = os.path.splitext(path)[0] + '.npz'
+    if not path.endswith('.pkl') or not os.path.exists(npz_path):
+        return path
+    try:
+        signatures = (_file_signature(path), _file_signature(npz_path))
+    except OSError:
+        return path
+    cached = _compiled_paths.get(path)
+    if cached is not None and cached[0] == signatures:
+        return cached[1]
+
+    from awrtools.forest import read_source_digest
+    with open(path, 'rb') as f:
+        digest = content_key(f.read())
+    resolved = npz_path if read_source_digest(npz_path) == digest else path
+    _compiled_paths[path] = (signatures, resolved)
+    return resolved
+
+
+class LoadedModel:
+    """Modèle chargé avec son schéma de features résolu une fois pour toutes."""
+
+    def __init__(self, model, path, signature):
+        self.model = model
+        self.path = path
+        self.signature = signature
+        features = getattr(model, 'feature_names_in_', None)
+        if features is None:
+            features = getattr(model, 'features', [])
+        self.features = [str(f) for f in features]
+
+    def missing_features(self, columns):
+        """Features du modèle absentes de ``columns`` (remplacées par 0 à la prédiction)."""
+        return [f for f in self.features if f not in columns]
+
+    def prepare(self, df):
+        """Matrice des features dans l'ordre du modèle (colonnes absentes à 0)."""
+        return df.reindex(columns=self.features, fill_value=0)
+
+    def predict(self, df):
+        return self.model.predict(self.prepare(df))
+
+
+class ModelRegistry:
+    def __init__(self, loader=load_model_file):
+        self._loader = loader
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    def get(self, path):
+        path = os.path.abspath(path)
+        signature = _file_signature(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry.signature == signature:
+            return entry
+
+        # Un verrou par fichier : deux sessions ne chargent pas le même modèle en parallèle
+        with self._lock:
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+        with path_lock:
+            entry = self._entries.get(path)
+            signature = _file_signature(path)
+            if entry is None or entry.signature != signature:
+                entry = LoadedModel(self._loader(path), path, signature)
+                self._entries[path] = entry
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+registry = ModelRegistry()
+
+
+def get_model(path):
+    """Modèle chaud pour ``path`` (rechargé seulement si le fichier a changé)."""
+    return registry.get(path)
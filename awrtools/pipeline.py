@@ -0,0 +1,170 @@
+"""Extraction parallèle d'un dossier de rapports AWR.
+
+Les rapports sont répartis sur un pool de processus; les enregistrements de
+chaque rapport sont rendus dès que ce rapport est terminé, et une erreur sur
+un fichier n'interrompt pas les autres.
+"""
+import json
+import os
+import textwrap
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+
+from awrtools.stream import extract_report
+
+
+def list_reports(awr_folder, extensions=('.html',)):
+    return sorted(
+        os.path.join(awr_folder, f) for f in os.listdir(awr_folder)
+        if f.endswith(extensions)
+    )
+
+
+def _extract_file(path, extract):
+    filename = os.path.basename(path)
+    size = os.path.getsize(path)
+    try:
+        return filename, size, extract(path, filename), None
+    except Exception as e:
+        return filename, size, [], f"{type(e).__name__}: {e}"
+
+
+def iter_extractions(paths, workers=None, extract=extract_report):
+    """Génère ``(fichier, taille, enregistrements, erreur)`` dans l'ordre de fin de traitement.
+
+    ``extract(chemin, nom_fichier)`` doit être une fonction de module (picklable).
+    Avec ``workers=1`` tout se fait dans le processus courant. Au plus
+    ``2 × workers`` fichiers sont en vol : ``paths`` peut être un générateur.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            yield _extract_file(path, extract)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, future in iter_bounded(pool, partial(_extract_file, extract=extract), paths, workers * 2):
+            try:
+                yield future.result()
+            except Exception as e:
+                # Processus de travail tué (mémoire, signal...) : on isole le fichier
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                yield os.path.basename(path), size, [], f"{type(e).__name__}: {e}"
+
+
+def iter_bounded(executor, fn, items, max_pending):
+    """Soumet ``fn(item)`` pour chaque élément et génère ``(item, futur)`` dans l'ordre de fin.
+
+    Au plus ``max_pending`` tâches sont en vol : ``items`` (un générateur, par
+    exemple les membres d'une archive) n'est consommé qu'au rythme du pool.
+    """
+    pending = {}
+    items = iter(items)
+    exhausted = False
+    while pending or not exhausted:
+        while not exhausted and len(pending) < max_pending:
+            try:
+                item = next(items)
+            except StopIteration:
+                exhausted = True
+                break
+            pending[executor.submit(fn, item)] = item
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future
+
+
+class JsonArrayWriter:
+    """Écrit une liste JSON au fil de l'eau, au même format que ``json.dump(..., indent=4)``.
+
+    L'écriture se fait dans un fichier temporaire renommé à la fin; s'il n'y a
+    aucun enregistrement (ou en cas d'erreur) le fichier de sortie n'est pas créé.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._tmp_path = path + '.tmp'
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self._tmp_path, 'w', encoding='utf-8')
+        self._f.write('[')
+        return self
+
+    def write(self, records):
+        for record in records:
+            self._f.write(',\n' if self.count else '\n')
+            self._f.write(textwrap.indent(json.dumps(record, indent=4), '    '))
+            self.count += 1
+        self._f.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.write('\n]' if self.count else ']')
+        self._f.close()
+        if exc_type is None and self.count:
+            os.replace(self._tmp_path, self.path)
+        else:
+            os.remove(self._tmp_path)
+
+
+def iter_json_array(path, chunk_size=1 << 20):
+    """Lit une liste JSON (comme ``Data.json``) élément par élément, sans la charger en entier."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buf = f.read(chunk_size).lstrip()
+        if not buf.startswith('['):
+            raise ValueError(f"{path} : une liste JSON est attendue")
+        pos, eof = 1, False
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # Un élément qui touche la fin du tampon peut être tronqué (nombre)
+                complete = end < len(buf) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if complete:
+                yield item
+                pos = end
+                continue
+            more = f.read(chunk_size)
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+            if eof and not buf.strip():
+                raise ValueError(f"{path} : liste JSON non terminée")
+
+
+class Throughput:
+    """Compteurs de débit d'une extraction (fichiers/s, Mo/s)."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.files = 0
+        self.bytes = 0
+        self.records = 0
+        self.errors = []
+
+    def add(self, filename, size, records, error):
+        self.files += 1
+        self.bytes += size
+        self.records += len(records)
+        if error:
+            self.errors.append((filename, error))
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return (
+            f"{self.files} fichier(s), {self.records} enregistrement(s), "
+            f"{len(self.errors)} erreur(s) en {elapsed:.2f}s — "
+            f"{self.files / elapsed:.1f} fichiers/s, {self.bytes / 2**20 / elapsed:.1f} Mo/s"
+        )
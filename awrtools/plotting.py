@@ -0,0 +1,149 @@
+"""Nuages de points temps écoulé / métrique rendus en densité, sans affichage.
+
+Remplace le ``sns.scatterplot`` + une boucle ``plt.text`` par point de
+3-Courbes :
+
+- les points sont agrégés en grille (rectangles ou hexagones) par calcul
+  vectoriel (``np.bincount``), puis seule la grille est dessinée : le temps
+  de rendu ne dépend plus du nombre de lignes ;
+- seuls les ``top_n`` points les plus éloignés de la droite de régression
+  sont étiquetés avec leur ``query_id`` ;
+- l'image est écrite directement dans un fichier (backend ``Agg``), sans
+  ``plt.show()``.
+"""
+import numpy as np
+
+BINS = 300          # Cellules par axe (densité) / hexagones en largeur (hexbin)
+TOP_N = 20          # Points étiquetés
+SCATTER_MAX = 5000  # En mode auto : nuage de points classique jusqu'à ce nombre de points
+MODES = ('auto', 'density', 'hexbin', 'scatter')
+CHUNK_SIZE = 1_000_000  # Points agrégés à la fois (tableaux intermédiaires gardés en cache)
+
+
+def _extent(values):
+    low, high = float(np.min(values)), float(np.max(values))
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return low, high
+
+
+def density_grid(x, y, bins=BINS, x_range=None, y_range=None, chunk_size=CHUNK_SIZE):
+    """Comptes ``(bins, bins)`` (lignes = y) et bornes ``(xmin, xmax, ymin, ymax)``."""
+    xmin, xmax = x_range or _extent(x)
+    ymin, ymax = y_range or _extent(y)
+    fx, fy = bins / (xmax - xmin), bins / (ymax - ymin)
+    counts = np.zeros(bins * bins, dtype=np.int64)
+    for start in range(0, len(x), chunk_size):
+        ix = ((x[start:start + chunk_size] - xmin) * fx).astype(np.int64)
+        iy = ((y[start:start + chunk_size] - ymin) * fy).astype(np.int64)
+        # La valeur maximale tombe dans la dernière cellule
+        np.clip(ix, 0, bins - 1, out=ix)
+        np.clip(iy, 0, bins - 1, out=iy)
+        counts += np.bincount(iy * bins + ix, minlength=bins * bins)
+    return counts.reshape(bins, bins), (xmin, xmax, ymin, ymax)
+
+
+def _hex_cells(px, py, nx, ny):
+    # Deux réseaux décalés d'une demi-cellule : chaque point va au centre le plus proche
+    ix1, iy1 = np.rint(px), np.rint(py)
+    ix2, iy2 = np.floor(px), np.floor(py)
+    first = (px - ix1) ** 2 + 3.0 * (py - iy1) ** 2 < (px - ix2 - 0.5) ** 2 + 3.0 * (py - iy2 - 0.5) ** 2
+    np.clip(ix2, 0, nx - 1, out=ix2)
+    np.clip(iy2, 0, ny - 1, out=iy2)
+    cell = np.where(first, ix1 * (ny + 1) + iy1, (nx + 1) * (ny + 1) + ix2 * ny + iy2)
+    return cell.astype(np.int64)
+
+
+def hexbin_counts(x, y, gridsize=BINS, x_range=None, y_range=None, chunk_size=CHUNK_SIZE):
+    """Centres des hexagones non vides et leurs comptes (même grille que ``Axes.hexbin``)."""
+    xmin, xmax = x_range or _extent(x)
+    ymin, ymax = y_range or _extent(y)
+    nx = gridsize
+    ny = int(nx / np.sqrt(3))
+    sx, sy = (xmax - xmin) / nx, (ymax - ymin) / ny
+    size1 = (nx + 1) * (ny + 1)
+    counts = np.zeros(size1 + nx * ny, dtype=np.int64)
+    for start in range(0, len(x), chunk_size):
+        px = (x[start:start + chunk_size] - xmin) / sx
+        py = (y[start:start + chunk_size] - ymin) / sy
+        counts += np.bincount(_hex_cells(px, py, nx, ny), minlength=len(counts))
+
+    cells = np.flatnonzero(counts)
+    second = cells >= size1
+    local = np.where(second, cells - size1, cells)
+    rows = np.where(second, ny, ny + 1)
+    cx = xmin + (local // rows + np.where(second, 0.5, 0.0)) * sx
+    cy = ymin + (local % rows + np.where(second, 0.5, 0.0)) * sy
+    return cx, cy, counts[cells], (xmin, xmax, ymin, ymax)
+
+
+def top_outliers(x, y, slope, intercept, n=TOP_N):
+    """Indices des ``n`` points les plus éloignés (verticalement) de la droite, du plus éloigné au moins éloigné."""
+    if n <= 0 or len(x) == 0:
+        return np.empty(0, dtype=np.int64)
+    distance = np.abs(y - (slope * x + intercept))
+    n = min(n, len(distance))
+    top = np.argpartition(distance, len(distance) - n)[-n:]
+    return top[np.argsort(distance[top])[::-1]]
+
+
+def regression_plot(x, y, labels, coef, output, title, xlabel, ylabel, mode='auto', bins=BINS,
+                    top_n=TOP_N, x_formatter=None, dpi=120):
+    """Écrit ``output`` (PNG, SVG, PDF...) : densité des points, droite ``coef`` et ``top_n`` points étiquetés.
+
+    ``mode`` : ``density`` (grille rectangulaire), ``hexbin``, ``scatter``
+    (nuage classique, petits volumes) ou ``auto`` (``scatter`` jusqu'à
+    ``SCATTER_MAX`` points, ``density`` au-delà). Retourne le mode utilisé.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if mode == 'auto':
+        mode = 'scatter' if len(x) <= SCATTER_MAX else 'density'
+    slope, intercept = coef
+
+    fig, ax = plt.subplots(figsize=(14, 7))
+    if mode == 'scatter':
+        ax.scatter(x, y, s=12, alpha=0.6, label="Données")
+    elif mode == 'density':
+        counts, extent = density_grid(x, y, bins)
+        image = ax.imshow(np.ma.masked_equal(counts, 0), origin='lower', extent=extent, aspect='auto',
+                          norm=LogNorm(), cmap='viridis', interpolation='nearest')
+        fig.colorbar(image, ax=ax, label="Nombre de requêtes (échelle log)")
+    elif mode == 'hexbin':
+        cx, cy, counts, extent = hexbin_counts(x, y, bins)
+        # Seuls les centres non vides sont transmis : les comptes sont sommés par hexagone
+        image = ax.hexbin(cx, cy, C=counts, gridsize=bins, extent=extent, reduce_C_function=np.sum,
+                          bins='log', cmap='viridis')
+        fig.colorbar(image, ax=ax, label="Nombre de requêtes (échelle log)")
+    else:
+        raise ValueError(f"Mode inconnu : {mode} (attendu : {', '.join(MODES)})")
+
+    # --- Points les plus éloignés de la droite : seuls étiquetés
+    top = top_outliers(x, y, slope, intercept, top_n)
+    if len(top):
+        ax.scatter(x[top], y[top], s=30, facecolors='none', edgecolors='red',
+                   label=f"{len(top)} plus grands écarts")
+        for i in top:
+            ax.annotate(str(labels[i]), (x[i], y[i]), xytext=(4, 4), textcoords='offset points',
+                        fontsize=8, alpha=0.8)
+
+    x_vals = np.linspace(x.min(), x.max(), 100)
+    ax.plot(x_vals, slope * x_vals + intercept, color='red', label=f"Régression : y = {slope:.2e}x + {intercept:.2f}")
+
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel(xlabel, fontsize=14)
+    ax.set_ylabel(ylabel, fontsize=14)
+    ax.grid(True)
+    ax.legend(fontsize=12)
+    if x_formatter is not None:
+        ax.xaxis.set_major_formatter(x_formatter)
+
+    fig.tight_layout()
+    fig.savefig(output, dpi=dpi)
+    plt.close(fig)
+    return mode
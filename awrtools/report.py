@@ -0,0 +1,325 @@
+"""Rapport PDF des requêtes lentes, construit page par page (ReportLab).
+
+Remplace le grand ``Table`` unique de ``generate_professional_pdf`` (app.py),
+dont la liste de ``TableStyle`` grandissait de plusieurs commandes par ligne :
+
+- le tableau est découpé en blocs de ``CHUNK_ROWS`` lignes, créés seulement
+  au moment où la mise en page les atteint (``_LazyFlowables``) : le coût
+  par page ne dépend pas du nombre total de requêtes ;
+- le style commun (en-tête, grille, alternance des couleurs) est calculé une
+  seule fois et partagé par tous les blocs; seules les quelques cellules
+  colorées (temps, CPU, cause) sont propres à un bloc ;
+- chaque texte SQL est tronqué et échappé une fois, dans un seul
+  ``Paragraph`` au style partagé ;
+- le contenu de chaque page est compressé dès sa fermeture.
+
+La mémoire n'est pas bornée pour autant : ReportLab garde chaque page
+terminée (environ 2,5 Ko compressés) et assemble tout le fichier en mémoire
+avant de l'écrire dans ``output`` (fichier ou flux). Pour 50 000 requêtes
+(12 000 pages), cela représente environ 30 Mo pendant la mise en page, plus
+trois fois la taille du PDF à l'écriture.
+"""
+import os
+import random
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+CHUNK_ROWS = 24      # Lignes par bloc de tableau (pair : alternance des couleurs continue)
+TEXT_MAX = 600       # Caractères de texte SQL gardés par requête
+LOGO_SIZE = (80, 30)
+
+COLUMNS = ["query_id", "query_text", "elapsed_time", "rows_processed", "cpu_percent", "cause_probable"]
+HEADER = ['ID Requête', 'Requête', 'Temps', 'Lignes', 'CPU (%)', 'Cause probable']
+
+RECOMMENDATIONS = [
+    "Optimiser les procédures stockées identifiées dans l'analyse",
+    "Vérifier l'indexation des tables impliquées dans les requêtes problématiques",
+    "Surveiller la charge CPU lors de l'exécution des requêtes critiques",
+    "Créer des index composites sur les colonnes fréquemment utilisées dans les clauses WHERE, JOIN et ORDER BY",
+    "Examiner les plans d'exécution pour identifier les opérations coûteuses et les goulots d'étranglement",
+    "Privilégier les jointures INNER aux jointures OUTER et s'assurer que les conditions utilisent des colonnes indexées",
+    "Utiliser LIMIT/TOP pour restreindre le nombre de lignes retournées et éviter les transferts inutiles",
+    "Transformer les sous-requêtes corrélées en jointures ou utiliser des CTE pour améliorer les performances",
+    "Maintenir des statistiques à jour sur les tables pour optimiser les plans d'exécution",
+    "Éviter l'utilisation de fonctions sur les colonnes dans les clauses WHERE",
+    "Implémenter le partitionnement horizontal pour les tables volumineuses",
+    "Traiter les opérations en lot plutôt qu'en boucles pour réduire les allers-retours réseau",
+    "Identifier et résoudre les conflits de verrous qui peuvent causer des blocages",
+]
+
+
+class _LazyFlowables(list):
+    """Liste de flowables remplie à la demande depuis un générateur.
+
+    ``doc.build`` consulte ``len()`` avant chaque flowable : la liste n'est
+    complétée qu'à ce moment, les blocs déjà mis en page sont libérés.
+    """
+
+    def __init__(self, flowables, ahead=2):
+        super().__init__()
+        self._source = iter(flowables)
+        self._ahead = ahead
+
+    def __len__(self):
+        while self._source is not None and super().__len__() < self._ahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return super().__len__()
+
+
+class _Styles:
+    """Styles ReportLab créés une fois par processus et partagés par tous les rapports."""
+
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.colors import HexColor
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.lib.units import inch
+        from reportlab.platypus import TableStyle
+
+        styles = getSampleStyleSheet()
+        # Style pour le titre principal
+        self.title = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=20,
+                                    textColor=HexColor('#2c3e50'), alignment=TA_CENTER, spaceAfter=30,
+                                    fontName='Helvetica-Bold')
+        # Style pour les méta-informations
+        self.meta = ParagraphStyle('MetaInfo', parent=styles['Normal'], fontSize=10,
+                                   textColor=HexColor('#555555'), leftIndent=20, rightIndent=20, spaceAfter=10)
+        # Texte des requêtes (un seul style pour tous les Paragraph)
+        self.query = ParagraphStyle('QueryText', parent=styles['Normal'], fontSize=8, wordWrap='CJK',
+                                    leftIndent=3, rightIndent=3, spaceAfter=3)
+        self.recommendations = ParagraphStyle('Recommendations', parent=styles['Normal'], fontSize=10,
+                                              textColor=HexColor('#721c24'), leftIndent=20, rightIndent=20,
+                                              spaceAfter=10)
+        self.recommendations_title = ParagraphStyle('RecommendationsTitle', parent=self.recommendations,
+                                                    fontSize=12, textColor=HexColor('#c0392b'))
+
+        self.stats_widths = [2 * inch, 2 * inch]
+        self.stats = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#34495e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, HexColor('#f8f9fa')]),
+        ])
+
+        self.col_widths = [1 * inch, 3.8 * inch, 0.8 * inch, 0.9 * inch, 0.7 * inch, 1.3 * inch]
+        # Style commun des blocs du tableau principal (alternance des couleurs comprise)
+        self.table = TableStyle([
+            # En-tête
+            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#34495e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('TOPPADDING', (0, 0), (-1, 0), 12),
+            # Corps du tableau
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 6),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 1), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, HexColor('#f8f9fa')]),
+        ])
+        # Commandes des cellules colorées, par catégorie (coordonnées ajoutées par bloc)
+        self.time_high = [('TEXTCOLOR', HexColor('#e74c3c')), ('FONTNAME', 'Helvetica-Bold')]
+        self.time_medium = [('TEXTCOLOR', HexColor('#f39c12')), ('FONTNAME', 'Helvetica-Bold')]
+        self.cpu_high = [('BACKGROUND', HexColor('#ffe6e6')), ('TEXTCOLOR', HexColor('#c0392b')),
+                         ('FONTNAME', 'Helvetica-Bold')]
+        self.cause_unknown = [('BACKGROUND', HexColor('#fff3cd')), ('TEXTCOLOR', HexColor('#856404'))]
+        self.cause_known = [('BACKGROUND', HexColor('#f8d7da')), ('TEXTCOLOR', HexColor('#721c24'))]
+        self.sql_paragraph = _sql_paragraph_class()
+
+
+def _sql_paragraph_class():
+    from reportlab.platypus import Paragraph
+
+    class SQLParagraph(Paragraph):
+        """Paragraph dont le découpage en lignes n'est calculé qu'une fois par largeur.
+
+        Chaque coupure de bloc entre deux pages recalcule la hauteur des
+        cellules restantes, et le dessin les remesure encore : le texte SQL,
+        coupé caractère par caractère (``wordWrap='CJK'``), ne l'est qu'une fois.
+        """
+
+        _wrapped = None
+
+        def wrap(self, availWidth, availHeight):
+            if self._wrapped is None or self._wrapped[0] != availWidth:
+                self._wrapped = (availWidth, super().wrap(availWidth, availHeight))
+            return self._wrapped[1]
+
+    return SQLParagraph
+
+
+def truncate_sql(text, limit=TEXT_MAX):
+    """Texte SQL tronqué à ``limit`` caractères et échappé pour un ``Paragraph``."""
+    text = str(text)
+    if len(text) > limit:
+        text = text[:limit] + "…"
+    return escape(text)
+
+
+def _cell_commands(commands, column, rows):
+    return [(name, (column, i), (column, i), value) for i in rows for name, value in commands]
+
+
+def _chunk_table(chunk, styles):
+    from reportlab.platypus import Table
+
+    elapsed = chunk['elapsed_time'].to_numpy(np.float64)
+    cpu = chunk['cpu_percent'].to_numpy(np.float64)
+    causes = chunk['cause_probable'].astype(str).tolist()
+
+    data = [HEADER]
+    for query_id, text, e, rows, c, cause in zip(chunk['query_id'], chunk['query_text'], elapsed,
+                                                 chunk['rows_processed'], cpu, causes):
+        data.append([str(query_id), styles.sql_paragraph(truncate_sql(text), styles.query), f"{e:.2f}", f"{rows:,}",
+                     f"{c:.1f}", cause.replace(', ', '\n')])
+
+    table = Table(data, colWidths=styles.col_widths, repeatRows=1, style=styles.table)
+    # Cellules colorées du bloc (ligne 0 = en-tête)
+    lines = np.arange(1, len(chunk) + 1)
+    unknown = np.array(['Incident probable' in c for c in causes], dtype=bool)
+    known = ~unknown & np.array([('Lignes traitées' in c or 'Surcharge CPU' in c) for c in causes], dtype=bool)
+    extra = (_cell_commands(styles.time_high, 2, lines[elapsed > 400])
+             + _cell_commands(styles.time_medium, 2, lines[(elapsed > 100) & (elapsed <= 400)])
+             + _cell_commands(styles.cpu_high, 4, lines[cpu > 25])
+             + _cell_commands(styles.cause_unknown, 5, lines[unknown])
+             + _cell_commands(styles.cause_known, 5, lines[known]))
+    if extra:
+        table.setStyle(extra)
+    return table
+
+
+def _compressing_canvas_class():
+    import zlib
+
+    from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFStream
+    from reportlab.pdfgen.canvas import Canvas
+
+    class CompressingCanvas(Canvas):
+        """Canvas qui compresse le contenu de chaque page dès sa fermeture.
+
+        ReportLab garde toutes les pages jusqu'à l'écriture finale et ne les
+        compresse qu'à ce moment; le texte des pages terminées occupe ici
+        quelques Ko au lieu de plusieurs dizaines. Un flux qui déclare déjà
+        son ``Filter`` n'est pas recompressé à l'écriture.
+        """
+
+        def showPage(self):
+            super().showPage()
+            page = self._doc.Pages.pages[-1]
+            if page.stream and not page.Contents:
+                dictionary = PDFDictionary()
+                dictionary['Filter'] = PDFArray([PDFName('FlateDecode')])
+                page.Contents = PDFStream(dictionary, zlib.compress(page.stream.encode('utf8')))
+                page.Contents.__Comment__ = "page stream"
+                page.stream = None
+
+    return CompressingCanvas
+
+
+def _logo_flowable(logo_path):
+    from reportlab.platypus import Image
+
+    if not logo_path or not os.path.exists(logo_path):
+        return None
+    return Image(logo_path, width=LOGO_SIZE[0], height=LOGO_SIZE[1])
+
+
+def _story(df, awr_title, logo_path, styles, chunk_rows, progress):
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    try:
+        image = _logo_flowable(logo_path)
+    except Exception:
+        image = None
+    if image is not None:
+        image.hAlign = 'LEFT'
+        yield image
+        yield Spacer(1, 20)
+
+    yield Paragraph("Rapport d'Analyse des Requêtes Lentes", styles.title)
+    yield Spacer(1, 20)
+
+    current_date = datetime.now().strftime("%d %B %Y")
+    yield Paragraph(f"""
+    <b>Fichier AWR :</b> {escape(str(awr_title))}<br/>
+    <b>Date de génération :</b> {current_date}<br/>
+    <b>Nombre de requêtes analysées :</b> {len(df)}
+    """, styles.meta)
+    yield Spacer(1, 20)
+
+    # Statistiques résumées (calculées sur les colonnes entières)
+    stats_data = [
+        ['Métrique', 'Valeur'],
+        ['Temps maximum', f"{df['elapsed_time'].max():.2f}s"],
+        ['Temps moyen', f"{df['elapsed_time'].mean():.2f}s"],
+        ['CPU maximum', f"{df['cpu_percent'].max():.1f}%"],
+        ['Incidents probables', str(int((df['cause_probable'] == 'Incident probable').sum()))],
+    ]
+    yield Table(stats_data, colWidths=styles.stats_widths, style=styles.stats)
+    yield Spacer(1, 30)
+
+    # Tableau principal, bloc par bloc
+    total = len(df)
+    for start in range(0, total, chunk_rows):
+        if progress:
+            progress(start / total)
+        yield _chunk_table(df.iloc[start:start + chunk_rows], styles)
+    yield Spacer(1, 30)
+
+    # Recommandations
+    yield Paragraph("<b>Recommandations</b>", styles.recommendations_title)
+    slowest_query = df.loc[df['elapsed_time'].idxmax()]
+    all_recommendations = [
+        f"Analyser en priorité la requête <b>{escape(str(slowest_query['query_id']))}</b> avec un temps "
+        f"d'exécution de {slowest_query['elapsed_time']:.2f}s"
+    ] + RECOMMENDATIONS
+    # Sélectionner 4 recommandations aléatoires
+    selected_recommendations = random.sample(all_recommendations, 4)
+    yield Paragraph("".join(f"• {rec}<br/>" for rec in selected_recommendations), styles.recommendations)
+
+
+def build_incident_pdf(df, awr_title, logo_path, output, progress=None, chunk_rows=CHUNK_ROWS):
+    """Écrit le rapport PDF des requêtes de ``df`` dans ``output`` (chemin ou flux binaire).
+
+    ``logo_path`` : logo en tête de rapport (ignoré s'il n'existe pas).
+    ``progress`` : fonction optionnelle appelée avec l'avancement (0 à 1).
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate
+
+    if df.empty:
+        raise ValueError("Aucune requête à inclure dans le rapport")
+    # Utiliser le format paysage pour plus d'espace
+    doc = SimpleDocTemplate(output, pagesize=landscape(A4), pageCompression=1,
+                            rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+    doc.build(_LazyFlowables(_story(df[COLUMNS], awr_title, logo_path, _Styles.get(), chunk_rows, progress)),
+              canvasmaker=_compressing_canvas_class())
+    if progress:
+        progress(1.0)
+    return output
@@ -0,0 +1,171 @@
+"""Index des sections d'un rapport AWR : titre → plages d'octets.
+
+Un seul passage linéaire sur le fichier (projeté en mémoire) repère chaque
+titre ``<h3 class="awr">`` et la table qui le suit, avec les mêmes règles que
+``stream.read_sections`` : la première table après le titre, tables
+imbriquées comprises. L'index est écrit à côté du rapport
+(``<rapport>.sections.json``); les lectures suivantes projettent le fichier
+avec mmap et ne parsent que les octets des sections demandées, au lieu de
+tout le document jusqu'à la dernière section voulue.
+
+Un index est valide tant que la taille et la date du rapport n'ont pas
+changé; sinon il est ignoré et reconstruit à la demande.
+"""
+import html
+import json
+import mmap
+import os
+import re
+
+from awrtools import stream
+
+# À incrémenter si les règles de découpage changent (les index existants sont ignorés)
+INDEX_VERSION = 1
+
+INDEX_SUFFIX = '.sections.json'
+
+_TAG = re.compile(rb'<(/?)(h3|table)\b([^>]*)>', re.IGNORECASE)
+_H3_END = re.compile(rb'</h3\s*>', re.IGNORECASE)
+_CLASS_AWR = re.compile(rb'''class\s*=\s*["']?[^"'>]*\bawr\b''', re.IGNORECASE)
+_INNER_TAG = re.compile(rb'<[^>]*>')
+
+
+def scan_sections(data, encoding='utf-8'):
+    """``{titre: [(début, longueur), ...]}`` pour chaque titre suivi d'une table.
+
+    La plage va du ``<h3>`` du titre à la fin de sa table.
+    """
+    sections = {}
+    pending = []
+    owners = None
+    depth = 0
+    pos = 0
+    while True:
+        match = _TAG.search(data, pos)
+        if match is None:
+            break
+        pos = match.end()
+        closing, tag = match.group(1), match.group(2).lower()
+        if tag == b'table':
+            if depth:
+                depth += -1 if closing else 1
+                if depth == 0:
+                    for title, start in owners:
+                        sections.setdefault(title, []).append((start, match.end() - start))
+                    owners = None
+            elif not closing and pending:
+                owners, pending, depth = pending, [], 1
+        elif not closing and not depth and _CLASS_AWR.search(match.group(3)):
+            end = _H3_END.search(data, pos)
+            if end is None:
+                break
+            raw = _INNER_TAG.sub(b'', data[pos:end.start()])
+            title = html.unescape(raw.decode(encoding, errors='replace')).strip()
+            pending.append((title, match.start()))
+            pos = end.end()
+    return sections
+
+
+def index_path(path, index_dir=None):
+    if index_dir is None:
+        return path + INDEX_SUFFIX
+    return os.path.join(index_dir, os.path.basename(path) + INDEX_SUFFIX)
+
+
+class SectionIndex:
+    """Plages d'octets des sections d'un rapport, valides pour une taille et une date données."""
+
+    def __init__(self, path, size, mtime_ns, sections):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sections = sections
+
+    @property
+    def titles(self):
+        return list(self.sections)
+
+    def is_current(self):
+        st = os.stat(self.path)
+        return (st.st_size, st.st_mtime_ns) == (self.size, self.mtime_ns)
+
+    @classmethod
+    def build(cls, path):
+        st = os.stat(path)
+        if not st.st_size:
+            return cls(path, 0, st.st_mtime_ns, {})
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            sections = scan_sections(mm)
+        return cls(path, st.st_size, st.st_mtime_ns, sections)
+
+    @classmethod
+    def load(cls, path, index_dir=None):
+        """Index enregistré s'il existe et correspond encore au rapport, sinon ``None``."""
+        try:
+            with open(index_path(path, index_dir), encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != INDEX_VERSION:
+            return None
+        index = cls(path, data['size'], data['mtime_ns'],
+                    {title: [tuple(r) for r in ranges] for title, ranges in data['sections'].items()})
+        return index if index.is_current() else None
+
+    def save(self, index_dir=None):
+        target = index_path(self.path, index_dir)
+        tmp = target + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': INDEX_VERSION, 'size': self.size, 'mtime_ns': self.mtime_ns,
+                'sections': self.sections,
+            }, f, ensure_ascii=False)
+        os.replace(tmp, target)
+        return target
+
+    def read_sections(self, titles, encoding='utf-8', errors='strict', until=None):
+        """Comme ``stream.read_sections(path, titles, until=until)``, en ne parsant que les plages indexées.
+
+        ``titles`` est une liste de titres exacts ou un prédicat ``titre -> bool``.
+        """
+        sections = {}
+        if callable(titles):
+            wanted = []
+            for title in self.sections:
+                if titles(title):
+                    wanted.append(title)
+                if title == until:
+                    break
+        else:
+            wanted = [t for t in dict.fromkeys(titles) if t in self.sections]
+        if not wanted:
+            return sections
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for title in wanted:
+                for start, length in self.sections[title]:
+                    parsed = stream.read_sections(mm[start:start + length], [title],
+                                                  encoding=encoding, errors=errors)
+                    sections.setdefault(title, []).extend(parsed.get(title, []))
+        return sections
+
+
+def get_index(path, index_dir=None, build=True, save=True):
+    """Index à jour du rapport : chargé s'il existe, sinon construit (et enregistré si possible)."""
+    index = SectionIndex.load(path, index_dir)
+    if index is None and build:
+        index = SectionIndex.build(path)
+        if save:
+            try:
+                index.save(index_dir)
+            except OSError:
+                # Dossier en lecture seule : l'index reste en mémoire
+                pass
+    return index
+
+
+def read_sections(path, titles, index_dir=None, build=False, until=None):
+    """Sections via l'index s'il existe (ou si ``build``), sinon lecture en flux classique."""
+    index = get_index(path, index_dir, build=build)
+    if index is None:
+        return stream.read_sections(path, titles, until=until)
+    return index.read_sections(titles, until=until)
@@ -0,0 +1,149 @@
+"""Magasin colonne (Parquet) des métriques SQL extraites des rapports AWR.
+
+Remplace le ``Data.json`` indenté : colonnes typées, compressées (zstd),
+partitionnées par plage de snapshots (ou par fichier AWR). La lecture ne
+charge que les colonnes demandées et les filtres sont poussés jusqu'aux
+partitions et aux statistiques des groupes de lignes.
+
+Les filtres suivent la convention pyarrow/pandas : liste de tuples
+``(colonne, opérateur, valeur)`` combinés par ET, par exemple
+``[('begin_snap', '>=', 45000), ('elapsed_time', '>', 0)]``.
+"""
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from awrtools.stream import parse_awr_name
+
+# Nombre de snapshots par partition "snap_range"
+SNAP_RANGE_SIZE = 1000
+
+SCHEMA = pa.schema([
+    ('query_id', pa.string()),
+    ('awr_file', pa.string()),
+    ('instance', pa.int32()),
+    ('begin_snap', pa.int64()),
+    ('end_snap', pa.int64()),
+    ('rows_processed', pa.int64()),
+    ('elapsed_time', pa.float64()),
+    ('cpu_percent', pa.float64()),
+    ('query_text', pa.large_string()),
+    ('snap_range', pa.int32()),
+])
+
+_OPERATORS = {
+    '=': lambda s, v: s == v, '==': lambda s, v: s == v, '!=': lambda s, v: s != v,
+    '<': lambda s, v: s < v, '<=': lambda s, v: s <= v,
+    '>': lambda s, v: s > v, '>=': lambda s, v: s >= v,
+    'in': lambda s, v: s.isin(v), 'not in': lambda s, v: ~s.isin(v),
+}
+
+
+def _with_snapshot_columns(df):
+    df = df.copy()
+    parsed = df['awr_file'].map(lambda f: parse_awr_name(str(f)) or (None, None, None))
+    df['instance'] = pd.array([p[0] for p in parsed], dtype='Int32')
+    df['begin_snap'] = pd.array([p[1] for p in parsed], dtype='Int64')
+    df['end_snap'] = pd.array([p[2] for p in parsed], dtype='Int64')
+    df['snap_range'] = df['begin_snap'] // SNAP_RANGE_SIZE
+    for column in SCHEMA.names:
+        if column not in df.columns:
+            df[column] = None
+    if 'query_text' in df.columns:
+        df['query_text'] = df['query_text'].fillna("")
+    return df[SCHEMA.names].sort_values(['begin_snap', 'query_id'], kind='stable')
+
+
+def write_metrics(data, root, partition_by='snap_range', compression='zstd'):
+    """Ajoute des enregistrements (liste de dicts ou DataFrame) au magasin ``root``.
+
+    ``partition_by`` vaut ``'snap_range'`` (plages de ``SNAP_RANGE_SIZE`` snapshots)
+    ou ``'awr_file'`` (une partition par rapport).
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+    if df.empty:
+        return 0
+    table = pa.Table.from_pandas(_with_snapshot_columns(df), schema=SCHEMA, preserve_index=False)
+    ds.write_dataset(
+        table,
+        root,
+        format='parquet',
+        partitioning=ds.partitioning(table.select([partition_by]).schema, flavor='hive'),
+        basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+        file_options=ds.ParquetFileFormat().make_write_options(compression=compression),
+        max_rows_per_group=128 * 1024,
+    )
+    return table.num_rows
+
+
+def _dataset(root):
+    return ds.dataset(root, format='parquet', partitioning='hive', schema=SCHEMA)
+
+
+def _expression(filters, snap_range):
+    filters = list(filters or [])
+    if snap_range is not None:
+        low, high = snap_range
+        # La colonne de partition permet d'écarter les répertoires sans les ouvrir
+        filters += [
+            ('begin_snap', '>=', low), ('begin_snap', '<=', high),
+            ('snap_range', '>=', low // SNAP_RANGE_SIZE), ('snap_range', '<=', high // SNAP_RANGE_SIZE),
+        ]
+    return pq.filters_to_expression(filters) if filters else None
+
+
+def read_metrics(root, columns=None, filters=None, snap_range=None):
+    """Lit le magasin en ne chargeant que ``columns`` et les lignes qui passent ``filters``.
+
+    ``snap_range=(début, fin)`` restreint aux rapports dont le snapshot de début
+    est dans l'intervalle (bornes incluses).
+    """
+    table = _dataset(root).to_table(columns=columns, filter=_expression(filters, snap_range))
+    return table.to_pandas()
+
+
+def iter_metric_batches(root, columns=None, filters=None, snap_range=None, batch_size=64 * 1024):
+    """Parcourt le magasin par lots de ``batch_size`` lignes (DataFrames)."""
+    scanner = _dataset(root).scanner(
+        columns=columns, filter=_expression(filters, snap_range), batch_size=batch_size
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _filter_frame(df, filters, snap_range):
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters or []:
+        mask &= _OPERATORS[op](df[column], value)
+    if snap_range is not None:
+        begin = df['awr_file'].map(lambda f: (parse_awr_name(str(f)) or (None, None, None))[1])
+        mask &= begin.between(*snap_range)
+    return df[mask]
+
+
+def load_metrics(path, columns=None, filters=None, snap_range=None):
+    """Charge les métriques depuis le magasin colonne (dossier) ou un ``Data.json`` historique.
+
+    Les filtres retiennent les mêmes lignes dans les deux cas; seul le magasin
+    évite de tout lire.
+    """
+    if os.path.isdir(path):
+        return read_metrics(path, columns, filters, snap_range)
+
+    df = _filter_frame(pd.read_json(path), filters, snap_range)
+    return df[columns].reset_index(drop=True) if columns else df.reset_index(drop=True)
+
+
+def convert_json(json_path, root, partition_by='snap_range', chunk_size=500_000):
+    """Convertit un ``Data.json`` (liste de dicts) en magasin colonne."""
+    df = pd.read_json(json_path)
+    total = 0
+    for start in range(0, len(df), chunk_size):
+        total += write_metrics(df.iloc[start:start + chunk_size], root, partition_by)
+    return total
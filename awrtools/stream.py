@@ -0,0 +1,416 @@
+"""Extraction en flux des sections d'un rapport AWR.
+
+Le document est lu par morceaux et passé au parseur HTML de lxml en mode
+événementiel (interface « target ») : aucun arbre n'est construit. Seules
+les tables qui suivent les titres ``<h3 class="awr">`` demandés sont
+conservées, tout le reste est ignoré au fil de la lecture.
+"""
+import codecs
+import os
+import re
+
+from lxml import etree
+
+CHUNK_SIZE = 64 * 1024
+
+# À incrémenter quand le découpage des tables change (invalide le cache d'extraction)
+PARSER_VERSION = 1
+
+# awrrpt_<instance>_<begin_snap>_<end_snap>.html
+_AWR_NAME = re.compile(r'awrrpt_(\d+)_(\d+)_(\d+)')
+
+COMPLETE_SQL_TEXT = "Complete List of SQL Text"
+SQL_BY_EXECUTIONS = "SQL ordered by Executions"
+
+
+def parse_awr_name(filename):
+    """``(instance, begin_snap, end_snap)`` depuis le nom du rapport, ou ``None``."""
+    match = _AWR_NAME.search(filename)
+    if not match:
+        return None
+    return tuple(int(g) for g in match.groups())
+
+
+class _SectionCollector:
+    """Cible lxml : mémorise les tables qui suivent les titres recherchés."""
+
+    def __init__(self, wanted, expected=None, until=None):
+        self.wanted = wanted
+        self.expected = set(expected) if expected is not None else None
+        self.until = until
+        self.sections = {}
+        self.done = False
+
+        self._h3_text = None
+        self._pending = []
+        self._titles = None
+        self._table_depth = 0
+        self._rows = None
+        self._row = None
+        self._cells = []
+
+    def start(self, tag, attrib):
+        if self._titles is not None:
+            if tag == "table":
+                self._table_depth += 1
+            elif tag == "tr":
+                self._row = ([], [])
+                self._rows.append(self._row)
+            elif tag in ("th", "td") and self._row is not None:
+                # La place de la cellule est réservée dès l'ouverture pour
+                # garder l'ordre du document, le texte est rempli à la fermeture
+                cells = self._row[0] if tag == "th" else self._row[1]
+                cells.append("")
+                self._cells.append((cells, len(cells) - 1, []))
+        elif tag == "h3" and "awr" in (attrib.get("class") or "").split():
+            self._h3_text = []
+        elif tag == "table" and self._pending:
+            self._titles = self._pending
+            self._pending = []
+            self._table_depth = 1
+            self._rows = []
+
+    def end(self, tag):
+        if self._titles is not None:
+            if tag in ("th", "td") and self._cells:
+                cells, idx, parts = self._cells.pop()
+                cells[idx] = "".join(parts)
+            elif tag == "table":
+                self._table_depth -= 1
+                if self._table_depth == 0:
+                    self._close_table()
+        elif tag == "h3" and self._h3_text is not None:
+            title = "".join(self._h3_text).strip()
+            self._h3_text = None
+            if self.wanted(title):
+                self._pending.append(title)
+
+    def data(self, text):
+        if self._cells:
+            for _, _, parts in self._cells:
+                parts.append(text)
+        elif self._h3_text is not None:
+            self._h3_text.append(text)
+
+    def close(self):
+        return self.sections
+
+    def _close_table(self):
+        for title in self._titles:
+            self.sections.setdefault(title, []).append(self._rows)
+            if self.expected is not None:
+                self.expected.discard(title)
+            if title == self.until:
+                self.done = True
+        self._titles = None
+        self._rows = None
+        self._row = None
+        self._cells = []
+        if self.expected is not None and not self.expected and not self._pending:
+            self.done = True
+
+
+def iter_text_chunks(source, encoding="utf-8", errors="strict", chunk_size=CHUNK_SIZE):
+    """Découpe une source (chemin, fichier ouvert ou octets) en morceaux de texte."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding=encoding, errors=errors) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield decoder.decode(view[start:start + chunk_size])
+        yield decoder.decode(b"", final=True)
+        return
+
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    yield decoder.decode(b"", final=True)
+
+
+def read_sections(source, titles, stop_early=True, until=None, encoding="utf-8",
+                  errors="strict", chunk_size=CHUNK_SIZE):
+    """Lit les tables qui suivent les titres de section demandés.
+
+    ``titles`` est une liste de titres exacts ou un prédicat ``titre -> bool``.
+    Retourne ``{titre: [table, ...]}`` où chaque table est une liste de lignes
+    ``(textes des th, textes des td)``. Avec une liste de titres et
+    ``stop_early``, la lecture s'arrête dès que chaque titre a été trouvé;
+    avec ``until``, dès que la table de ce titre a été lue.
+    """
+    if callable(titles):
+        wanted, expected = titles, None
+    else:
+        expected = set(titles)
+        wanted = expected.__contains__
+    collector = _SectionCollector(wanted, expected if stop_early else None, until)
+    parser = etree.HTMLParser(target=collector)
+
+    for chunk in iter_text_chunks(source, encoding, errors, chunk_size):
+        if chunk:
+            parser.feed(chunk)
+        if collector.done:
+            break
+    parser.close()
+    return collector.sections
+
+
+# === Interprétation des sections (mêmes règles que Dataext.py)
+def extract_complete_sql_texts(sections):
+    sql_texts = {}
+
+    for rows in sections.get(COMPLETE_SQL_TEXT, []):
+        if not rows:
+            continue
+        header_map = {h.strip(): i for i, h in enumerate(rows[0][0])}
+
+        sql_id_idx = header_map.get("SQL Id")
+        sql_text_idx = header_map.get("SQL Text")
+
+        if sql_id_idx is None or sql_text_idx is None:
+            continue
+
+        for _, cells in rows[1:]:
+            if len(cells) <= max(sql_id_idx, sql_text_idx):
+                continue
+            sql_texts[cells[sql_id_idx].strip()] = cells[sql_text_idx].strip()
+
+    return sql_texts
+
+
+def extract_metrics_from_executions(sections, filename):
+    local_data = {}
+    for rows in sections.get(SQL_BY_EXECUTIONS, []):
+        if not rows:
+            continue
+        header_map = {h.strip(): idx for idx, h in enumerate(rows[0][0])}
+
+        sql_id_idx = header_map.get("SQL Id")
+        rows_proc_idx = header_map.get("Rows Processed")
+        elapsed_idx = header_map.get("Elapsed Time (s)")
+        cpu_idx = header_map.get("%CPU")
+
+        if sql_id_idx is None:
+            print(f"⚠️ Colonne SQL Id manquante dans {filename}")
+            return {}
+
+        for _, raw_cells in rows[1:]:
+            cells = [c.strip() for c in raw_cells]
+            if len(cells) < len(header_map):
+                continue
+
+            sql_id = None
+            try:
+                sql_id = cells[sql_id_idx]
+                rows_processed = int(cells[rows_proc_idx].replace(',', '')) if rows_proc_idx is not None and cells[rows_proc_idx] else 0
+                elapsed_time = float(cells[elapsed_idx].replace(',', '')) if elapsed_idx is not None and cells[elapsed_idx] else 0
+                cpu_percent = float(cells[cpu_idx].replace('%', '').replace(',', '.')) if cpu_idx is not None and cells[cpu_idx] else 0
+
+                local_data[sql_id] = {
+                    "query_id": sql_id,
+                    "awr_file": filename,
+                    "rows_processed": rows_processed,
+                    "elapsed_time": elapsed_time,
+                    "cpu_percent": cpu_percent
+                }
+            except Exception as e:
+                print(f"⚠️ Erreur dans {filename} pour SQL Id={sql_id} : {e}")
+    return local_data
+
+
+REPORT_SECTIONS = (SQL_BY_EXECUTIONS, COMPLETE_SQL_TEXT)
+
+
+def extract_report(source, filename):
+    """Enregistrements de ``Data.json`` pour un rapport : métriques + texte SQL."""
+    return records_from_sections(read_sections(source, REPORT_SECTIONS), filename)
+
+
+def records_from_sections(sections, filename):
+    sql_texts = extract_complete_sql_texts(sections)
+    metrics = extract_metrics_from_executions(sections, filename)
+
+    records = []
+    for sql_id, entry in metrics.items():
+        entry['query_text'] = sql_texts.get(sql_id, "")
+        records.append(entry)
+    return records
+
+
+# === Variante utilisée par app.py (colonnes et conversions de l'application)
+def extract_awr_records(source, filename="uploaded_file", on_error=None, errors="strict"):
+    """Enregistrements au format de ``app.py``; ``on_error(exc)`` reçoit les lignes invalides."""
+    return awr_records_from_sections(read_sections(source, REPORT_SECTIONS, errors=errors), filename, on_error)
+
+
+def _elapsed_header(headers):
+    # "Elapsed Time (s)" ou "Elapsed  Time (s)" (deux espaces) selon la version d'Oracle
+    return next((h for h in headers if 'Elapsed' in h and 'Time' in h), None)
+
+
+def awr_records_from_sections(sections, filename, on_error=None):
+    """``extract_awr_records`` sur des sections déjà lues (cache, index de sections)."""
+    sql_texts = {}
+    for rows in sections.get(COMPLETE_SQL_TEXT, []):
+        for _, cols in rows[1:]:
+            if len(cols) >= 2:
+                sql_texts[cols[0].strip()] = cols[1].strip()
+
+    all_data = []
+    required_headers = ['Executions', 'Rows Processed', 'SQL Id']
+    for rows in sections.get(SQL_BY_EXECUTIONS, []):
+        if not rows:
+            continue
+        headers = [th.strip() for th in rows[0][0]]
+        elapsed_header = _elapsed_header(headers)
+        if elapsed_header is None or not all(header in headers for header in required_headers):
+            continue
+        header_map = {header: idx for idx, header in enumerate(headers)}
+
+        executions_idx = header_map['Executions']
+        rows_proc_idx = header_map['Rows Processed']
+        elapsed_time_idx = header_map[elapsed_header]
+        sql_id_idx = header_map['SQL Id']
+
+        cpu_idx = None
+        for i, h in enumerate(headers):
+            if '%' in h and 'CPU' in h.upper():
+                cpu_idx = i
+                break
+
+        for _, cells in rows[1:]:
+            if len(cells) < len(header_map):
+                continue
+            try:
+                executions = int(cells[executions_idx].strip().replace(',', ''))
+                rows_processed = int(cells[rows_proc_idx].strip().replace(',', ''))
+                elapsed_time = float(cells[elapsed_time_idx].strip().replace(',', ''))
+                sql_id = cells[sql_id_idx].strip()
+
+                cpu_percent = 0.0
+                if cpu_idx is not None:
+                    cpu_text = cells[cpu_idx].strip().replace('%', '').replace(',', '.')
+                    cpu_percent = float(cpu_text) if cpu_text else 0.0
+
+                all_data.append({
+                    'query_id': sql_id,
+                    'awr_file': filename,
+                    'elapsed_time': elapsed_time,
+                    'rows_processed': rows_processed,
+                    'cpu_percent': cpu_percent,
+                    'executions': executions,
+                    'query_text': sql_texts.get(sql_id, "")
+                })
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+
+    return all_data
+
+
+# === Toutes les tables "SQL ordered by ..." en une seule lecture
+SQL_STATISTICS_PREFIX = "SQL ordered by "
+
+# Sections connues (ordre de fusion des colonnes communes)
+SQL_STATISTICS_SECTIONS = (
+    "SQL ordered by Elapsed Time",
+    "SQL ordered by CPU Time",
+    "SQL ordered by User I/O Wait Time",
+    "SQL ordered by Gets",
+    "SQL ordered by Reads",
+    "SQL ordered by Physical Reads (UnOptimized)",
+    "SQL ordered by Executions",
+    "SQL ordered by Parse Calls",
+    "SQL ordered by Sharable Memory",
+    "SQL ordered by Version Count",
+)
+
+
+def _slug(text):
+    text = text.replace('%', ' pct ').replace('/', '')
+    return re.sub(r'[^0-9a-z]+', '_', text.lower()).strip('_')
+
+
+def _to_number(text):
+    text = text.strip().replace(',', '')
+    if not text:
+        return None
+    try:
+        return float(text) if any(c in text for c in '.eE') else int(text)
+    except ValueError:
+        return text
+
+
+def is_sql_statistics_section(title):
+    return title.startswith(SQL_STATISTICS_PREFIX) or title == COMPLETE_SQL_TEXT
+
+
+def sql_statistics_from_sections(sections, filename):
+    """Fusionne les tables "SQL ordered by ..." en un enregistrement large par SQL Id.
+
+    Les colonnes communes (Executions, Elapsed Time...) décrivent la même
+    période et sont prises à la première table qui les donne; "%Total" est
+    propre à chaque classement et suffixé par la section (``pct_total_gets``...).
+    Retourne ``{(awr_file, sql_id): enregistrement}``.
+    """
+    merged = {}
+    # Ordre du rapport pour les sections connues, quel que soit l'ordre du dict
+    order = {title: i for i, title in enumerate(SQL_STATISTICS_SECTIONS)}
+    titles = sorted(
+        (t for t in sections if t.startswith(SQL_STATISTICS_PREFIX)),
+        key=lambda t: order.get(t, len(order))
+    )
+    for title in titles:
+        tables = sections[title]
+        section = _slug(title[len(SQL_STATISTICS_PREFIX):])
+        for rows in tables:
+            if not rows:
+                continue
+            columns = [_slug(h) for h in rows[0][0]]
+            if 'sql_id' not in columns:
+                continue
+            columns = [
+                f"{c}_{section}" if c == 'pct_total' else c
+                for c in columns
+            ]
+            sql_id_idx = columns.index('sql_id')
+
+            for _, cells in rows[1:]:
+                if len(cells) < len(columns):
+                    continue
+                sql_id = cells[sql_id_idx].strip()
+                record = merged.get((filename, sql_id))
+                if record is None:
+                    record = merged[(filename, sql_id)] = {
+                        'awr_file': filename, 'sql_id': sql_id, 'sections': []
+                    }
+                record['sections'].append(section)
+                for column, cell in zip(columns, cells):
+                    # Le texte SQL tronqué des classements est remplacé par le texte complet
+                    if column in ('sql_id', 'sql_text') or column in record:
+                        continue
+                    record[column] = cell.strip() if column in ('sql_module', 'pdb_name') else _to_number(cell)
+
+    sql_texts = extract_complete_sql_texts(sections)
+    for (_, sql_id), record in merged.items():
+        record['query_text'] = sql_texts.get(sql_id, "")
+    return merged
+
+
+def extract_sql_statistics(source, filename):
+    """Lit en une passe toutes les sections "SQL ordered by ..." et le texte complet des requêtes."""
+    sections = read_sections(source, is_sql_statistics_section, until=COMPLETE_SQL_TEXT)
+    return sql_statistics_from_sections(sections, filename)
+
+
+def sql_statistics_records(source, filename):
+    """Variante liste de ``extract_sql_statistics`` (pour le pipeline d'extraction)."""
+    return list(extract_sql_statistics(source, filename).values())
@@ -0,0 +1,325 @@
+"""Ajustement des droites de seuil (temps écoulé vs lignes traitées / %CPU).
+
+Remplace les coefficients ``np.polyfit`` recopiés à la main depuis
+3-Courbes dans XGext.py, RandomForestLearn.py et app.py :
+
+- régression de Huber (moindres carrés repondérés, IRLS) : les requêtes
+  extrêmes, justement celles qu'on cherche à détecter, ne tirent plus la
+  droite ;
+- calcul par lots : chaque itération relit les métriques lot par lot
+  (``detection.iter_batches``) et n'accumule que quelques sommes, quelle
+  que soit la taille de l'historique ; l'échelle des résidus est estimée
+  de la même façon (« proposition 2 » de Huber) ;
+- ajustement optionnel par groupe (par rapport AWR, par module...) : les
+  étiqueteurs prennent la droite du groupe de chaque ligne, la droite
+  globale si son groupe n'a pas été ajusté (``ThresholdSet.params_for``) ;
+- résultats versionnés (``thresholds_v0001.json``, ``..._v0002.json``...) :
+  les étiqueteurs et l'application chargent la dernière version à
+  l'exécution.
+"""
+import glob
+import json
+import math
+import os
+import re
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from awrtools import labels
+
+THRESHOLDS_DIR = os.environ.get(
+    'AWR_THRESHOLDS_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '2-Models', 'thresholds')
+)
+
+HUBER_K = 1.345
+MAX_ITER = 30
+TOLERANCE = 1e-6
+CHUNK_SIZE = 500_000
+
+# Droites ajustées : variable explicative et filtre de nettoyage (mêmes règles que 3-Courbes)
+FITS = {
+    'rows': ('rows_processed', lambda x: (x > 0) & (x < 5_000_000)),
+    'cpu': ('cpu_percent', lambda x: (x > 0) & (x <= 100)),
+}
+
+_FILE_PATTERN = re.compile(r'thresholds_v(\d+)\.json$')
+
+
+def _huber_beta(k):
+    # E[min(Z², k²)] pour Z normale centrée réduite : rend l'échelle cohérente avec l'écart-type
+    phi = math.exp(-k * k / 2) / math.sqrt(2 * math.pi)
+    cdf = 0.5 * (1 + math.erf(k / math.sqrt(2)))
+    return (2 * cdf - 1) - 2 * k * phi + 2 * k * k * (1 - cdf)
+
+
+class _Sums:
+    """Sommes pondérées d'un groupe sur une passe : équations normales 2x2 + échelle."""
+
+    __slots__ = ('n', 'w', 'wx', 'wxx', 'wy', 'wxy', 'clipped')
+
+    def __init__(self):
+        self.n = self.w = self.wx = self.wxx = self.wy = self.wxy = self.clipped = 0.0
+
+    def add(self, x, y, w, clipped):
+        self.n += len(x)
+        self.w += w.sum()
+        self.wx += (w * x).sum()
+        self.wxx += (w * x * x).sum()
+        self.wy += (w * y).sum()
+        self.wxy += (w * x * y).sum()
+        self.clipped += clipped.sum()
+
+    def solve(self):
+        det = self.w * self.wxx - self.wx * self.wx
+        if self.n < 3 or det <= 0:
+            return None
+        slope = (self.w * self.wxy - self.wx * self.wy) / det
+        return slope, (self.wy - slope * self.wx) / self.w
+
+
+def _chunks(source, x_col, keep, group_by, chunk_size):
+    from awrtools.detection import iter_batches
+
+    columns = [x_col, 'elapsed_time'] + ([group_by] if group_by else [])
+    for df in iter_batches(source, chunk_size, columns):
+        df = df.dropna(subset=[x_col, 'elapsed_time'])
+        x = df[x_col].to_numpy(np.float64)
+        y = df['elapsed_time'].to_numpy(np.float64)
+        mask = keep(x) & (y > 0)
+        if mask.any():
+            yield x[mask], y[mask], df[group_by].to_numpy()[mask] if group_by else None
+
+
+def _split(x, y, groups):
+    """``(groupe, x, y)`` pour chaque groupe présent dans le lot."""
+    if groups is None:
+        yield None, x, y
+        return
+    import pandas as pd
+
+    # Valeurs manquantes : un groupe à part entière (sinon code -1, rangé avec le dernier groupe)
+    codes, uniques = pd.factorize(groups, use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    for part in np.split(order, bounds):
+        yield uniques[codes[part[0]]], x[part], y[part]
+
+
+def huber_fit(source, x_col, keep=None, group_by=None, k=HUBER_K, max_iter=MAX_ITER, tol=TOLERANCE,
+              chunk_size=CHUNK_SIZE):
+    """Droite robuste ``elapsed_time = slope * x + intercept``, calculée par lots.
+
+    ``keep(x)`` filtre les valeurs retenues. Retourne
+    ``{groupe: {'slope', 'intercept', 'scale', 'n', 'iterations'}}`` (groupe
+    ``None`` sans ``group_by``). Chaque itération est une passe sur les
+    données : la mémoire ne dépend que du nombre de groupes.
+    """
+    keep = keep or (lambda x: np.ones(len(x), dtype=bool))
+    beta = _huber_beta(k)
+    # x centré sur une valeur de référence : équations normales mieux conditionnées
+    shift = None
+    fits, scales, counts, iterations, converged = {}, {}, {}, {}, set()
+
+    for iteration in range(max_iter + 2):
+        sums = {}
+        for x, y, groups in _chunks(source, x_col, keep, group_by, chunk_size):
+            if shift is None:
+                shift = float(np.median(x))
+            for group, gx, gy in _split(x - shift, y, groups):
+                if group in converged:
+                    continue
+                s = sums.get(group)
+                if s is None:
+                    s = sums[group] = _Sums()
+                fit = fits.get(group)
+                if fit is None:
+                    # Première passe : moindres carrés ordinaires
+                    s.add(gx, gy, np.ones_like(gx), np.zeros_like(gx))
+                    continue
+                residual = np.abs(gy - (fit[0] * gx + fit[1]))
+                scale = scales.get(group)
+                if scale is None:
+                    # Deuxième passe : échelle initiale des résidus, droite inchangée
+                    s.add(gx, gy, np.ones_like(gx), residual ** 2)
+                    continue
+                limit = k * scale
+                w = np.minimum(1.0, limit / np.maximum(residual, 1e-300))
+                s.add(gx, gy, w, np.minimum(residual, limit) ** 2)
+
+        for group, s in sums.items():
+            fit = s.solve()
+            if fit is None:
+                converged.add(group)
+                continue
+            counts[group] = int(s.n)
+            previous = fits.get(group)
+            fits[group] = fit
+            if previous is None:
+                continue
+            if group not in scales:
+                scales[group] = math.sqrt(s.clipped / max(s.n - 2, 1)) or None
+                if scales[group] is None:
+                    # Résidus nuls : la droite passe par tous les points
+                    converged.add(group)
+                continue
+            iterations[group] = iterations.get(group, 0) + 1
+            scales[group] = math.sqrt(s.clipped / (max(s.n - 2, 1) * beta)) or scales[group]
+            change = max(abs(fit[0] - previous[0]) / (abs(previous[0]) + 1e-12),
+                         abs(fit[1] - previous[1]) / (abs(previous[1]) + 1e-12))
+            if change < tol:
+                converged.add(group)
+        if not sums or all(g in converged for g in fits):
+            break
+
+    return {
+        group: {
+            'slope': float(slope), 'intercept': float(intercept - slope * shift), 'scale': scales.get(group),
+            'n': counts.get(group, 0), 'iterations': iterations.get(group, 0),
+        }
+        for group, (slope, intercept) in fits.items()
+    }
+
+
+class ThresholdSet:
+    """Droites de seuil d'une version : ``fits['rows']``, ``fits['cpu']`` (+ groupes éventuels)."""
+
+    def __init__(self, fits, multiplier=labels.SEUIL_MULTIPLICATEUR, version=0, method='manuel',
+                 source=None, fitted_at=None, group_by=None, groups=None):
+        self.fits = fits
+        self.multiplier = multiplier
+        self.version = version
+        self.method = method
+        self.source = source
+        self.fitted_at = fitted_at
+        self.group_by = group_by
+        # Clés texte, comme après un passage par JSON
+        self.groups = {name: {str(g): fit for g, fit in fits.items()} for name, fits in (groups or {}).items()}
+
+    @property
+    def rows_params(self):
+        return self.fits['rows']['slope'], self.fits['rows']['intercept']
+
+    @property
+    def cpu_params(self):
+        return self.fits['cpu']['slope'], self.fits['cpu']['intercept']
+
+    def params_for(self, name, data=None):
+        """``(pente, ordonnée)`` de la droite ``name`` pour chaque ligne de ``data``.
+
+        ``data`` est un DataFrame ou un dict de colonnes. Si des droites par
+        groupe ont été ajustées et que ``data`` contient la colonne
+        ``group_by``, chaque ligne prend la droite de son groupe (la droite
+        globale à défaut) : deux tableaux. Sinon, la droite globale.
+        """
+        fit = self.fits[name]
+        groups = self.groups.get(name)
+        if not groups or data is None or self.group_by not in data:
+            return fit['slope'], fit['intercept']
+        import pandas as pd
+
+        codes, uniques = pd.factorize(np.asarray(data[self.group_by], dtype=object), use_na_sentinel=False)
+        lines = [groups.get(str(group), fit) for group in uniques]
+        slopes = np.array([line['slope'] for line in lines], dtype=np.float64)
+        intercepts = np.array([line['intercept'] for line in lines], dtype=np.float64)
+        return slopes[codes], intercepts[codes]
+
+    def describe(self):
+        (rs, ri), (cs, ci) = self.rows_params, self.cpu_params
+        text = (f"v{self.version} ({self.method}) : lignes {rs:.2e} x + {ri:.2f}, "
+                f"CPU {cs:.2f} x + {ci:.2f}, x {self.multiplier}")
+        if self.group_by and self.groups:
+            text += f", {len(self.groups.get('rows', {}))} droite(s) par {self.group_by}"
+        return text
+
+    def to_dict(self):
+        return {
+            'version': self.version, 'method': self.method, 'source': self.source,
+            'fitted_at': self.fitted_at, 'multiplier': self.multiplier, 'fits': self.fits,
+            'group_by': self.group_by,
+            'groups': self.groups,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['fits'], data['multiplier'], data['version'], data.get('method'),
+                   data.get('source'), data.get('fitted_at'), data.get('group_by'), data.get('groups'))
+
+
+DEFAULT_THRESHOLDS = ThresholdSet({
+    'rows': {'slope': labels.SLOPE_ROWS, 'intercept': labels.INTERCEPT_ROWS},
+    'cpu': {'slope': labels.SLOPE_CPU, 'intercept': labels.INTERCEPT_CPU},
+})
+
+
+def fit_thresholds(source, group_by=None, multiplier=labels.SEUIL_MULTIPLICATEUR, k=HUBER_K,
+                   chunk_size=CHUNK_SIZE):
+    """Ajuste les droites ``rows`` et ``cpu`` sur ``source`` (magasin, base, CSV ou Data.json).
+
+    La droite globale est toujours calculée; avec ``group_by`` (``'awr_file'``,
+    ``'sql_module'``...) une droite par groupe est ajoutée, utilisée par
+    ``ThresholdSet.params_for`` pour les lignes de ce groupe.
+    """
+    fits, groups = {}, {}
+    for name, (x_col, keep) in FITS.items():
+        fit = huber_fit(source, x_col, keep, k=k, chunk_size=chunk_size).get(None)
+        if fit is None:
+            raise ValueError(f"Pas assez de données pour ajuster la droite '{name}' ({x_col})")
+        fits[name] = fit
+        if group_by:
+            groups[name] = huber_fit(source, x_col, keep, group_by, k=k, chunk_size=chunk_size)
+    return ThresholdSet(
+        fits, multiplier, method=f'huber (k={k})', source=str(source),
+        fitted_at=datetime.now().isoformat(timespec='seconds'), group_by=group_by, groups=groups,
+    )
+
+
+def _versions(directory):
+    versions = {}
+    for path in glob.glob(os.path.join(directory, 'thresholds_v*.json')):
+        match = _FILE_PATTERN.search(os.path.basename(path))
+        if match:
+            versions[int(match.group(1))] = path
+    return versions
+
+
+def save_thresholds(thresholds, directory=THRESHOLDS_DIR):
+    """Enregistre une nouvelle version (numéro suivant la dernière); retourne le chemin."""
+    os.makedirs(directory, exist_ok=True)
+    thresholds.version = max(_versions(directory), default=0) + 1
+    path = os.path.join(directory, f'thresholds_v{thresholds.version:04d}.json')
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(thresholds.to_dict(), f, indent=4, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def load_thresholds(directory=THRESHOLDS_DIR, version=None):
+    """Dernière version (ou ``version``); les constantes historiques si aucune n'est enregistrée."""
+    versions = _versions(directory)
+    if version is None and not versions:
+        return DEFAULT_THRESHOLDS
+    if version is None:
+        version = max(versions)
+    if version not in versions:
+        raise FileNotFoundError(f"Seuils v{version} introuvables dans {directory}")
+    with open(versions[version], encoding='utf-8') as f:
+        return ThresholdSet.from_dict(json.load(f))
+
+
+_current = {}
+_lock = threading.Lock()
+
+
+def get_thresholds(directory=THRESHOLDS_DIR):
+    """Dernière version, gardée en mémoire et relue quand une nouvelle version apparaît."""
+    versions = _versions(directory)
+    key = max(versions, default=0)
+    with _lock:
+        cached = _current.get(directory)
+        if cached is None or cached.version != key:
+            cached = _current[directory] = load_thresholds(directory)
+        return cached
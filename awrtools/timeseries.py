@@ -0,0 +1,388 @@
+"""Série temporelle des snapshots AWR : sessions, DB time et métriques SQL réunis.
+
+Une base SQLite indexée par ``(dbid, instance, begin_snap, end_snap)`` :
+
+- ``snapshots`` : en-tête du rapport (dates, sessions, elapsed, DB time) et
+  agrégats de ses requêtes (nombre, elapsed total et max) ;
+- ``sql_metrics`` : une ligne par SQL Id et par snapshot, avec la date de
+  début du snapshot pour les requêtes par intervalle de temps ;
+- ``rollups`` et ``sql_rollups`` : agrégats par heure et par jour, recalculés
+  à l'ingestion pour les seules périodes touchées.
+
+Les dates sont stockées en ISO (``2025-03-07T09:00:05``) : l'ordre du texte
+est l'ordre chronologique, et l'heure ou le jour sont des préfixes.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from awrtools.header import read_header
+from awrtools.pipeline import iter_json_array
+from awrtools.stream import extract_awr_records, parse_awr_name
+
+# Longueur du préfixe ISO définissant la période de chaque agrégat
+GRANULARITIES = {'hour': 13, 'day': 10}
+
+_MONTHS = {m: i for i, m in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS snapshots (
+        dbid INTEGER,
+        instance INTEGER,
+        begin_snap INTEGER,
+        end_snap INTEGER,
+        db_name TEXT,
+        awr_file TEXT,
+        begin_time TEXT,
+        end_time TEXT,
+        elapsed_min REAL,
+        db_time_min REAL,
+        begin_sessions INTEGER,
+        end_sessions INTEGER,
+        avg_sessions REAL,
+        sql_count INTEGER,
+        sql_elapsed_total REAL,
+        sql_elapsed_max REAL,
+        PRIMARY KEY (dbid, instance, begin_snap, end_snap)
+    );
+    CREATE TABLE IF NOT EXISTS sql_metrics (
+        dbid INTEGER,
+        instance INTEGER,
+        begin_snap INTEGER,
+        end_snap INTEGER,
+        query_id TEXT,
+        begin_time TEXT,
+        elapsed_time REAL,
+        rows_processed INTEGER,
+        cpu_percent REAL,
+        executions INTEGER,
+        PRIMARY KEY (dbid, instance, begin_snap, end_snap, query_id)
+    );
+    CREATE TABLE IF NOT EXISTS sql_text (
+        query_id TEXT PRIMARY KEY,
+        query_text TEXT
+    );
+    CREATE TABLE IF NOT EXISTS rollups (
+        dbid INTEGER,
+        instance INTEGER,
+        granularity TEXT,
+        period TEXT,
+        snapshots INTEGER,
+        avg_sessions REAL,
+        max_sessions INTEGER,
+        elapsed_min REAL,
+        db_time_min REAL,
+        sql_count INTEGER,
+        sql_elapsed_total REAL,
+        PRIMARY KEY (dbid, instance, granularity, period)
+    );
+    CREATE TABLE IF NOT EXISTS sql_rollups (
+        dbid INTEGER,
+        instance INTEGER,
+        granularity TEXT,
+        period TEXT,
+        query_id TEXT,
+        snapshots INTEGER,
+        elapsed_total REAL,
+        elapsed_max REAL,
+        rows_processed INTEGER,
+        cpu_percent_avg REAL,
+        PRIMARY KEY (dbid, instance, granularity, period, query_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_snapshots_time ON snapshots (begin_time);
+    CREATE INDEX IF NOT EXISTS idx_sql_metrics_query_time ON sql_metrics (query_id, begin_time);
+    CREATE INDEX IF NOT EXISTS idx_sql_metrics_time ON sql_metrics (begin_time);
+    CREATE INDEX IF NOT EXISTS idx_snapshots_instance_time ON snapshots (dbid, instance, begin_time);
+    CREATE INDEX IF NOT EXISTS idx_sql_metrics_instance_time ON sql_metrics (dbid, instance, begin_time);
+    CREATE INDEX IF NOT EXISTS idx_sql_rollups_query ON sql_rollups (query_id, granularity, period);
+    CREATE INDEX IF NOT EXISTS idx_rollups_period ON rollups (granularity, period);
+'''
+
+_UPSERT_SNAPSHOT = '''
+    INSERT INTO snapshots (dbid, instance, begin_snap, end_snap, db_name, awr_file, begin_time, end_time,
+                           elapsed_min, db_time_min, begin_sessions, end_sessions, avg_sessions)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (dbid, instance, begin_snap, end_snap) DO UPDATE SET
+        db_name = excluded.db_name, awr_file = excluded.awr_file,
+        begin_time = excluded.begin_time, end_time = excluded.end_time,
+        elapsed_min = excluded.elapsed_min, db_time_min = excluded.db_time_min,
+        begin_sessions = excluded.begin_sessions, end_sessions = excluded.end_sessions,
+        avg_sessions = excluded.avg_sessions
+'''
+
+_UPSERT_SQL = '''
+    INSERT INTO sql_metrics (dbid, instance, begin_snap, end_snap, query_id, begin_time,
+                             elapsed_time, rows_processed, cpu_percent, executions)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (dbid, instance, begin_snap, end_snap, query_id) DO UPDATE SET
+        begin_time = excluded.begin_time, elapsed_time = excluded.elapsed_time,
+        rows_processed = excluded.rows_processed, cpu_percent = excluded.cpu_percent,
+        executions = excluded.executions
+'''
+
+# Un texte vide (requête absente de "Complete List of SQL Text") n'écrase pas un texte connu
+_UPSERT_SQL_TEXT = '''
+    INSERT INTO sql_text (query_id, query_text) VALUES (?, ?)
+    ON CONFLICT (query_id) DO UPDATE SET query_text = excluded.query_text
+    WHERE excluded.query_text != ''
+'''
+
+_REFRESH_SNAPSHOT = '''
+    UPDATE snapshots SET
+        sql_count = (SELECT COUNT(*) FROM sql_metrics m
+                     WHERE m.dbid = snapshots.dbid AND m.instance = snapshots.instance
+                       AND m.begin_snap = snapshots.begin_snap AND m.end_snap = snapshots.end_snap),
+        sql_elapsed_total = (SELECT TOTAL(elapsed_time) FROM sql_metrics m
+                             WHERE m.dbid = snapshots.dbid AND m.instance = snapshots.instance
+                               AND m.begin_snap = snapshots.begin_snap AND m.end_snap = snapshots.end_snap),
+        sql_elapsed_max = (SELECT MAX(elapsed_time) FROM sql_metrics m
+                           WHERE m.dbid = snapshots.dbid AND m.instance = snapshots.instance
+                             AND m.begin_snap = snapshots.begin_snap AND m.end_snap = snapshots.end_snap)
+    WHERE dbid = ? AND instance = ? AND begin_snap = ? AND end_snap = ?
+'''
+
+_SNAPSHOT_TIME = '''
+    SELECT begin_time FROM snapshots WHERE dbid = ? AND instance = ? AND begin_snap = ? AND end_snap = ?
+'''
+
+_DELETE_SQL = '''
+    DELETE FROM sql_metrics WHERE dbid = ? AND instance = ? AND begin_snap = ? AND end_snap = ?
+'''
+
+# Les agrégats d'une période sont recalculés entièrement (une requête peut en avoir disparu)
+_DELETE_ROLLUP = '''
+    DELETE FROM rollups
+    WHERE dbid = :dbid AND instance = :instance AND granularity = :granularity AND period = :period_start
+'''
+
+_DELETE_SQL_ROLLUP = '''
+    DELETE FROM sql_rollups
+    WHERE dbid = :dbid AND instance = :instance AND granularity = :granularity AND period = :period_start
+'''
+
+_REFRESH_ROLLUP = '''
+    INSERT OR REPLACE INTO rollups
+    SELECT dbid, instance, :granularity, :period_start,
+           COUNT(*), AVG(avg_sessions), MAX(MAX(begin_sessions), MAX(end_sessions)),
+           TOTAL(elapsed_min), TOTAL(db_time_min), TOTAL(sql_count), TOTAL(sql_elapsed_total)
+    FROM snapshots
+    WHERE dbid = :dbid AND instance = :instance
+      AND begin_time >= :period_start AND begin_time < :period_end
+    GROUP BY dbid, instance
+'''
+
+_REFRESH_SQL_ROLLUP = '''
+    INSERT OR REPLACE INTO sql_rollups
+    SELECT dbid, instance, :granularity, :period_start, query_id,
+           COUNT(*), TOTAL(elapsed_time), MAX(elapsed_time), TOTAL(rows_processed), AVG(cpu_percent)
+    FROM sql_metrics
+    WHERE dbid = :dbid AND instance = :instance
+      AND begin_time >= :period_start AND begin_time < :period_end
+    GROUP BY dbid, instance, query_id
+'''
+
+
+def connect(db_file, timeout=30.0):
+    conn = sqlite3.connect(db_file, timeout=timeout)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(_SCHEMA)
+    # Base créée avant l'ajout du nombre d'exécutions
+    if 'executions' not in {row[1] for row in conn.execute('PRAGMA table_info(sql_metrics)')}:
+        conn.execute('ALTER TABLE sql_metrics ADD COLUMN executions INTEGER')
+    return conn
+
+
+def parse_awr_time(text):
+    """``'07-Mar-25 09:00:05'`` → ``'2025-03-07T09:00:05'`` (sans dépendre de la locale)."""
+    try:
+        day, month, rest = text.strip().split('-', 2)
+        year, _, clock = rest.partition(' ')
+        if len(clock) == 5:
+            clock += ':00'
+        year = int(year)
+        return datetime(
+            year + 2000 if year < 100 else year, _MONTHS[month[:3].lower()], int(day),
+            *(int(part) for part in clock.split(':'))
+        ).isoformat()
+    except (AttributeError, KeyError, ValueError, TypeError):
+        return None
+
+
+def period_bounds(begin_time, granularity):
+    """``(début, fin)`` ISO de l'heure ou du jour contenant ``begin_time``, fin exclue.
+
+    ``'2025-03-07T09:00:05'``, ``'hour'`` → ``('2025-03-07T09', '2025-03-07T10')`` :
+    un intervalle sur ``begin_time`` utilise les index de date, un ``substr``
+    obligerait à parcourir tout l'historique de l'instance.
+    """
+    width = GRANULARITIES[granularity]
+    start = datetime.fromisoformat(begin_time).replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        start, step = start.replace(hour=0), timedelta(days=1)
+    else:
+        step = timedelta(hours=1)
+    return begin_time[:width], (start + step).isoformat()[:width]
+
+
+def snapshot_key(header, awr_file=None):
+    """``(dbid, instance, begin_snap, end_snap)``, complété par le nom du fichier; ``None`` si incomplet."""
+    parsed = parse_awr_name(awr_file or '') or (None, None, None)
+    key = (
+        header.get('dbid'),
+        header.get('instance_number', parsed[0]),
+        header.get('begin_snap', parsed[1]),
+        header.get('end_snap', parsed[2]),
+    )
+    return key if None not in key else None
+
+
+def ingest_snapshot(conn, header, records, awr_file=None):
+    """Insère ou met à jour un snapshot (en-tête de ``awrtools.header``) et ses requêtes.
+
+    ``records`` sont des dicts au format de Data.json. Rejouer le même rapport
+    remplace ses lignes (une requête disparue du rapport disparaît de
+    l'historique et des agrégats). Retourne la clé du snapshot, ou ``None``
+    si l'en-tête ne permet pas de l'identifier.
+    """
+    key = snapshot_key(header, awr_file)
+    begin_time = parse_awr_time(header.get('begin_time'))
+    if key is None or begin_time is None:
+        return None
+    begin_sessions, end_sessions = header.get('begin_sessions'), header.get('end_sessions')
+    avg_sessions = (begin_sessions + end_sessions) / 2 \
+        if begin_sessions is not None and end_sessions is not None else None
+
+    metrics, texts = [], []
+    for record in records:
+        metrics.append(key + (
+            record.get('query_id'), begin_time, record.get('elapsed_time'),
+            record.get('rows_processed'), record.get('cpu_percent'), record.get('executions'),
+        ))
+        texts.append((record.get('query_id'), record.get('query_text') or ''))
+
+    with conn:
+        previous = conn.execute(_SNAPSHOT_TIME, key).fetchone()
+        conn.execute(_DELETE_SQL, key)
+        conn.execute(_UPSERT_SNAPSHOT, key + (
+            header.get('db_name'), awr_file, begin_time, parse_awr_time(header.get('end_time')),
+            header.get('elapsed_min'), header.get('db_time_min'), begin_sessions, end_sessions, avg_sessions,
+        ))
+        conn.executemany(_UPSERT_SQL, metrics)
+        conn.executemany(_UPSERT_SQL_TEXT, texts)
+        conn.execute(_REFRESH_SNAPSHOT, key)
+        # Périodes touchées : celle du snapshot, et l'ancienne si sa date a changé
+        times = {begin_time, previous[0]} if previous and previous[0] else {begin_time}
+        for granularity in GRANULARITIES:
+            for period_start, period_end in {period_bounds(t, granularity) for t in times}:
+                params = {'granularity': granularity, 'dbid': key[0], 'instance': key[1],
+                          'period_start': period_start, 'period_end': period_end}
+                conn.execute(_DELETE_ROLLUP, params)
+                conn.execute(_DELETE_SQL_ROLLUP, params)
+                conn.execute(_REFRESH_ROLLUP, params)
+                conn.execute(_REFRESH_SQL_ROLLUP, params)
+    return key
+
+
+def read_snapshot(path, filename):
+    """``{'header', 'records'}`` d'un rapport (fonction de module, utilisable dans un pool de processus)."""
+    return {'header': read_header(path), 'records': extract_awr_records(path, filename)}
+
+
+def import_json(conn, data_json, sessions_json):
+    """Importe un ``Data.json`` et le ``sessions_moyenne.json`` de Sessions.py, joints par nom de rapport.
+
+    Seuls les rapports dont l'en-tête complet (avec le DB Id) figure dans le
+    fichier des sessions sont importés. Retourne ``(snapshots, ignorés)``.
+    """
+    with open(sessions_json, encoding='utf-8') as f:
+        headers = json.load(f)
+
+    by_file = {}
+    for record in iter_json_array(data_json):
+        record = {k.strip(): v for k, v in record.items()}
+        by_file.setdefault(record.get('awr_file'), []).append(record)
+
+    imported, skipped = 0, 0
+    for awr_file, records in by_file.items():
+        header = headers.get(os.path.splitext(awr_file or '')[0])
+        if header and ingest_snapshot(conn, header, records, awr_file):
+            imported += 1
+        else:
+            skipped += 1
+    return imported, skipped
+
+
+def iter_snapshot_records(conn, since=None, dbid=None, instance=None):
+    """Génère ``(snapshot, enregistrements)`` dans l'ordre chronologique, un snapshot à la fois.
+
+    ``snapshot`` est la ligne de ``snapshots`` (dict), les enregistrements
+    sont au format de Data.json.
+    """
+    where, params = _where([('begin_time', '>=', since), ('dbid', '=', dbid), ('instance', '=', instance)])
+    cursor = conn.execute(f'SELECT * FROM snapshots{where} ORDER BY begin_time, dbid, instance', params)
+    columns = [c[0] for c in cursor.description]
+    for row in cursor.fetchall():
+        snapshot = dict(zip(columns, row))
+        rows = conn.execute('''
+            SELECT query_id, elapsed_time, rows_processed, cpu_percent, executions FROM sql_metrics
+            WHERE dbid = ? AND instance = ? AND begin_snap = ? AND end_snap = ?
+        ''', (snapshot['dbid'], snapshot['instance'], snapshot['begin_snap'], snapshot['end_snap']))
+        yield snapshot, [
+            {'query_id': query_id, 'awr_file': snapshot['awr_file'], 'elapsed_time': elapsed,
+             'rows_processed': rows_processed, 'cpu_percent': cpu, 'executions': executions}
+            for query_id, elapsed, rows_processed, cpu, executions in rows
+        ]
+
+
+def _since(conn, days, since):
+    # "Les N derniers jours" : comptés depuis le snapshot le plus récent de la base
+    if days is None:
+        return since
+    latest, = conn.execute('SELECT MAX(begin_time) FROM snapshots').fetchone()
+    if latest is None:
+        return since
+    return (datetime.fromisoformat(latest) - timedelta(days=days)).isoformat()
+
+
+def _where(conditions):
+    clauses = [f'{column} {op} ?' for column, op, value in conditions if value is not None]
+    params = [value for _, _, value in conditions if value is not None]
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+def sql_history(conn, query_id, days=None, since=None, until=None, dbid=None, instance=None):
+    """Métriques d'un SQL Id par snapshot, dans l'ordre chronologique (index ``query_id, begin_time``)."""
+    where, params = _where([
+        ('query_id', '=', query_id), ('begin_time', '>=', _since(conn, days, since)),
+        ('begin_time', '<=', until), ('dbid', '=', dbid), ('instance', '=', instance),
+    ])
+    return pd.read_sql_query(f'SELECT * FROM sql_metrics{where} ORDER BY begin_time', conn, params=params)
+
+
+def snapshot_range(conn, days=None, since=None, until=None, dbid=None, instance=None):
+    """Snapshots (en-tête et agrégats SQL) d'un intervalle de temps."""
+    where, params = _where([
+        ('begin_time', '>=', _since(conn, days, since)), ('begin_time', '<=', until),
+        ('dbid', '=', dbid), ('instance', '=', instance),
+    ])
+    return pd.read_sql_query(f'SELECT * FROM snapshots{where} ORDER BY begin_time', conn, params=params)
+
+
+def rollup(conn, granularity='day', query_id=None, since=None, until=None, dbid=None, instance=None):
+    """Agrégats pré-calculés par ``'hour'`` ou ``'day'`` (d'un SQL Id si ``query_id``)."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularité inconnue : {granularity} (attendu : {', '.join(GRANULARITIES)})")
+    table = 'sql_rollups' if query_id else 'rollups'
+    # Les bornes sont comparées au préfixe de la période (jour ou heure)
+    width = GRANULARITIES[granularity]
+    where, params = _where([
+        ('granularity', '=', granularity), ('query_id', '=', query_id),
+        ('period', '>=', since[:width] if since else None), ('period', '<=', until[:width] if until else None),
+        ('dbid', '=', dbid), ('instance', '=', instance),
+    ])
+    return pd.read_sql_query(f'SELECT * FROM {table}{where} ORDER BY period', conn, params=params)
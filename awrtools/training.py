@@ -0,0 +1,97 @@
+"""Entraînement incrémental des modèles XGBoost et Random Forest.
+
+Au lieu de tout recharger et de tout réentraîner :
+
+- XGBoost reprend le boosting du modèle existant (``xgb_model=``) et ajoute
+  des arbres appris sur les seuls nouveaux snapshots ;
+- la Random Forest ajoute des arbres (``warm_start``) appris sur les nouveaux
+  snapshots et, avec ``max_estimators``, oublie les plus anciens (fenêtre
+  glissante).
+
+Un manifeste ``<modèle>.manifest.json`` à côté du ``.pkl`` garde la liste
+des rapports (snapshots) déjà vus par le modèle et l'historique des
+entraînements.
+"""
+import json
+import os
+from datetime import datetime
+
+MANIFEST_SUFFIX = '.manifest.json'
+
+# Arbres ajoutés à chaque mise à jour incrémentale
+XGB_ROUNDS = 20
+RF_TREES = 20
+
+
+def manifest_path(model_path):
+    return os.path.splitext(model_path)[0] + MANIFEST_SUFFIX
+
+
+class TrainingManifest:
+    """Snapshots vus par un modèle et historique de ses entraînements."""
+
+    def __init__(self, path, seen=None, history=None):
+        self.path = path
+        self.seen = set(seen or ())
+        self.history = list(history or [])
+
+    @classmethod
+    def load(cls, model_path):
+        path = manifest_path(model_path)
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(path, data.get('seen'), data.get('history'))
+
+    def new_files(self, awr_files):
+        """Rapports de ``awr_files`` que le modèle n'a pas encore vus (ordre conservé)."""
+        return [f for f in dict.fromkeys(awr_files) if f not in self.seen]
+
+    def record(self, mode, awr_files, rows, **details):
+        files = set(awr_files)
+        if mode == 'full':
+            self.seen = files
+        else:
+            self.seen |= files
+        self.history.append({
+            'at': datetime.now().isoformat(timespec='seconds'), 'mode': mode,
+            'snapshots': len(files), 'rows': int(rows), **details,
+        })
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'seen': sorted(self.seen), 'history': self.history}, f, indent=4)
+        os.replace(tmp, self.path)
+
+
+def has_all_classes(y):
+    # Un lot sans incident (ou sans cas normal) fausserait les classes du modèle
+    return len(set(y)) >= 2
+
+
+def continue_xgboost(model, X, y, rounds=XGB_ROUNDS, n_jobs=-1):
+    """Nouveau XGBClassifier : les arbres de ``model`` + ``rounds`` arbres appris sur ``X, y``."""
+    from xgboost import XGBClassifier
+
+    params = model.get_params()
+    params.pop('use_label_encoder', None)
+    params.update(n_estimators=rounds, n_jobs=n_jobs)
+    updated = XGBClassifier(**params)
+    updated.fit(X, y, xgb_model=model.get_booster())
+    return updated
+
+
+def warm_start_forest(model, X, y, trees=RF_TREES, max_estimators=None, n_jobs=-1):
+    """Ajoute ``trees`` arbres appris sur ``X, y`` à la forêt ``model`` (modifiée en place).
+
+    Avec ``max_estimators``, les arbres les plus anciens au-delà de cette
+    limite sont retirés : la forêt ne reflète que les derniers snapshots.
+    """
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees, n_jobs=n_jobs)
+    model.fit(X, y)
+    if max_estimators and len(model.estimators_) > max_estimators:
+        model.estimators_ = model.estimators_[-max_estimators:]
+        model.n_estimators = max_estimators
+    return model